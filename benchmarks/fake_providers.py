@@ -0,0 +1,375 @@
+"""
+수집 벤치마크용 가짜 provider (yfinance / pykrx / FinanceDataReader / dart_fss 대체 모듈)
+
+- 같은 종목 / 기간이면 항상 같은 값을 반환 (종목 코드 해시를 시드로 사용)
+- 네트워크 요청 없이 실제 라이브러리와 같은 모양(컬럼명, 인덱스)의 DataFrame 반환
+- install_fake_providers()로 sys.modules에 등록하면 수집 코드의 지연 import가 가짜 모듈을 사용
+"""
+
+import sys
+import types
+import zlib
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ✅ 가짜 종목 코드 (미국: FK0001..., 한국: 900001...)
+US_PREFIX = "FK"
+KR_START = 900_000
+
+# ✅ 합성 거래일 달력 (주말 제외, 오늘까지 CALENDAR_YEARS년)
+CALENDAR_YEARS = 11
+
+# ✅ 호출 횟수 (provider 함수별)
+calls = {}
+
+
+def _count(name):
+    calls[name] = calls.get(name, 0) + 1
+
+
+def make_universe(us_count, kr_count):
+    """가짜 종목 목록 → get_ticker_lists()와 같은 {벤치마크: {Symbol: Sector}} 구조"""
+    sectors = ["Technology", "Financials", "Industrials", "Energy", "Health Care"]
+    us = {f"{US_PREFIX}{i:04d}": sectors[i % len(sectors)] for i in range(us_count)}
+    kr = {
+        f"{KR_START + i:06d}": sectors[i % len(sectors)] for i in range(1, kr_count + 1)
+    }
+    return {"sp500": us, "nasdaq": {}, "nyse": {}, "kospi": kr, "kosdaq": {}}
+
+
+def _seed(symbol):
+    return zlib.crc32(str(symbol).encode("utf-8"))
+
+
+@lru_cache(maxsize=1)
+def trading_days():
+    """합성 거래일 (DatetimeIndex)"""
+    today = pd.Timestamp(date.today())
+    return pd.bdate_range(end=today, periods=CALENDAR_YEARS * 252)
+
+
+@lru_cache(maxsize=None)
+def _ohlcv(symbol):
+    """종목의 전체 달력 OHLCV (시가/고가/저가/종가/거래량 배열)"""
+    rng = np.random.default_rng(_seed(symbol))
+    count = len(trading_days())
+    close = np.round(
+        rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0, 0.015, count))), 2
+    )
+    return (
+        np.round(close * rng.uniform(0.99, 1.01, count), 2),
+        np.round(close * 1.02, 2),
+        np.round(close * 0.98, 2),
+        close,
+        rng.integers(10_000, 5_000_000, count),
+    )
+
+
+def _window(start, end):
+    """[start, end) 구간의 거래일 위치 (문자열 YYYYMMDD / YYYY-MM-DD 모두 허용)"""
+    days = trading_days()
+    lo = days.searchsorted(pd.Timestamp(start))
+    hi = days.searchsorted(pd.Timestamp(end)) if end is not None else len(days)
+    return slice(lo, hi)
+
+
+def price_frame(symbol, start, end, columns):
+    """종목의 기간 OHLCV → columns(시가, 고가, 저가, 종가, 거래량 순서 이름)를 가진 DataFrame"""
+    window = _window(start, end)
+    values = [array[window] for array in _ohlcv(symbol)]
+    return pd.DataFrame(dict(zip(columns, values)), index=trading_days()[window])
+
+
+def _report_dates(years):
+    """최근 years개 회계연도 말일"""
+    last = date.today().year - 1
+    return [pd.Timestamp(year, 12, 31) for year in range(last - years + 1, last + 1)]
+
+
+@lru_cache(maxsize=None)
+def statement_values(symbol, years=5):
+    """종목의 연도별 합성 재무 항목 {항목: 배열} (한국 / 미국 공용 원천 값)"""
+    rng = np.random.default_rng(_seed(symbol) + 1)
+    revenue = rng.uniform(1e9, 5e11) * np.cumprod(rng.uniform(0.9, 1.2, years))
+    assets = revenue * rng.uniform(0.8, 2.0)
+    liabilities = assets * rng.uniform(0.2, 0.7, years)
+    operating = revenue * rng.uniform(0.02, 0.25, years)
+    return {
+        "revenue": revenue,
+        "operating_income": operating,
+        "net_income": operating * rng.uniform(0.5, 0.9, years),
+        "total_assets": assets,
+        "total_liabilities": liabilities,
+        "current_assets": assets * 0.4,
+        "current_liabilities": liabilities * 0.5,
+        "total_debt": liabilities * 0.6,
+        "interest_expense": liabilities * 0.03,
+        "retained_earnings": (assets - liabilities) * 0.5,
+        "cash_equivalents": assets * 0.1,
+        "operating_cash_flow": operating * 1.1,
+        "capital_expenditure": revenue * 0.05,
+        "depreciation": revenue * 0.03,
+    }
+
+
+# ✅ yfinance 대체
+class FakeTicker:
+    """yf.Ticker 대체 (history / info / financials / balance_sheet / cashflow)"""
+
+    _HISTORY_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+    _STATEMENTS = {
+        "financials": {
+            "Total Revenue": "revenue",
+            "Operating Income": "operating_income",
+            "Net Income": "net_income",
+            "Interest Expense": "interest_expense",
+        },
+        "balance_sheet": {
+            "Total Assets": "total_assets",
+            "Total Liabilities Net Minority Interest": "total_liabilities",
+            "Current Assets": "current_assets",
+            "Current Liabilities": "current_liabilities",
+            "Total Debt": "total_debt",
+            "Retained Earnings": "retained_earnings",
+            "Cash And Cash Equivalents": "cash_equivalents",
+        },
+        "cashflow": {
+            "Operating Cash Flow": "operating_cash_flow",
+            "Capital Expenditure": "capital_expenditure",
+            "Depreciation And Amortization": "depreciation",
+        },
+    }
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, start=None, end=None, **kwargs):
+        _count("yfinance.history")
+        return price_frame(self.symbol, start, end, self._HISTORY_COLUMNS)
+
+    @property
+    def info(self):
+        _count("yfinance.info")
+        rng = np.random.default_rng(_seed(self.symbol) + 2)
+        return {
+            "longName": f"{self.symbol} Corp",
+            "sector": "Technology",
+            "sharesOutstanding": int(rng.integers(10_000_000, 5_000_000_000)),
+            "payoutRatio": float(rng.uniform(0, 0.6)),
+        }
+
+    def _statement(self, name):
+        _count(f"yfinance.{name}")
+        values = statement_values(self.symbol)
+        rows = {
+            label: values[field] * (-1 if field == "capital_expenditure" else 1)
+            for label, field in self._STATEMENTS[name].items()
+        }
+        # yfinance 재무제표: 항목 × 회계연도(최신 연도가 앞)
+        frame = pd.DataFrame(rows, index=_report_dates(len(values["revenue"]))).T
+        return frame[frame.columns[::-1]]
+
+    @property
+    def financials(self):
+        return self._statement("financials")
+
+    @property
+    def balance_sheet(self):
+        return self._statement("balance_sheet")
+
+    @property
+    def cashflow(self):
+        return self._statement("cashflow")
+
+
+def fake_download(
+    symbols, start=None, end=None, group_by="ticker", auto_adjust=True, **kwargs
+):
+    """yf.download 대체: (티커, 필드) MultiIndex 컬럼 프레임"""
+    _count("yfinance.download")
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    columns = ["Open", "High", "Low", "Close", "Volume"]
+    frames = {}
+    for symbol in symbols:
+        frame = price_frame(symbol, start, end, columns)
+        if not auto_adjust:
+            frame.insert(4, "Adj Close", frame["Close"])
+        frames[symbol] = frame
+    return pd.concat(frames, axis=1)
+
+
+# ✅ pykrx.stock 대체
+_PYKRX_COLUMNS = ["시가", "고가", "저가", "종가", "거래량"]
+
+
+def kr_symbols():
+    """install_fake_providers()에 등록된 한국 종목 코드"""
+    return list(_universe["kospi"]) + list(_universe["kosdaq"])
+
+
+def get_market_ohlcv(fromdate, todate=None, ticker=None, market="KOSPI", **kwargs):
+    """종목별 기간 조회 (fromdate, todate, ticker) 또는 하루 전체 시장 조회 (date, market=...)"""
+    _count("pykrx.get_market_ohlcv")
+    if ticker is not None:
+        end = pd.Timestamp(todate) + timedelta(days=1)
+        frame = price_frame(ticker, fromdate, end, _PYKRX_COLUMNS)
+        frame.index.name = "날짜"
+        return frame
+
+    day = pd.Timestamp(fromdate)
+    position = trading_days().searchsorted(day)
+    if position >= len(trading_days()) or trading_days()[position] != day:
+        return pd.DataFrame(columns=_PYKRX_COLUMNS)
+    symbols = kr_symbols()
+    rows = [[array[position] for array in _ohlcv(symbol)] for symbol in symbols]
+    frame = pd.DataFrame(
+        rows, index=pd.Index(symbols, name="티커"), columns=_PYKRX_COLUMNS
+    )
+    return frame
+
+
+def get_previous_business_days(fromdate=None, todate=None, **kwargs):
+    _count("pykrx.get_previous_business_days")
+    days = trading_days()
+    return list(days[_window(fromdate, pd.Timestamp(todate) + timedelta(days=1))])
+
+
+def get_index_ohlcv_by_date(fromdate, todate, ticker, **kwargs):
+    _count("pykrx.get_index_ohlcv_by_date")
+    end = pd.Timestamp(todate) + timedelta(days=1)
+    frame = price_frame(f"index-{ticker}", fromdate, end, _PYKRX_COLUMNS)
+    frame.index.name = "날짜"
+    return frame
+
+
+def get_market_dividend_by_date(fromdate, todate, ticker, **kwargs):
+    _count("pykrx.get_market_dividend_by_date")
+    rng = np.random.default_rng(_seed(ticker) + int(str(fromdate)[:4]))
+    return pd.DataFrame(
+        {"현금배당액": [float(rng.uniform(1e8, 1e10))]},
+        index=[pd.Timestamp(todate)],
+    )
+
+
+def get_market_ticker_name(ticker):
+    _count("pykrx.get_market_ticker_name")
+    return f"가짜종목{ticker}"
+
+
+def get_nearest_business_day_in_a_week(*args, **kwargs):
+    _count("pykrx.get_nearest_business_day_in_a_week")
+    return trading_days()[-1].strftime("%Y%m%d")
+
+
+def get_market_cap(date=None, market="ALL", **kwargs):
+    _count("pykrx.get_market_cap")
+    symbols = kr_symbols()
+    shares = [
+        int(np.random.default_rng(_seed(symbol) + 2).integers(1e6, 1e9))
+        for symbol in symbols
+    ]
+    return pd.DataFrame({"상장주식수": shares}, index=pd.Index(symbols, name="티커"))
+
+
+# ✅ FinanceDataReader 대체 (미국 / 한국 공용, yfinance와 같은 컬럼명)
+def fake_data_reader(symbol, start=None, end=None, **kwargs):
+    _count("fdr.DataReader")
+    end = pd.Timestamp(end) + timedelta(days=1) if end is not None else None
+    return price_frame(symbol, start, end, ["Open", "High", "Low", "Close", "Volume"])
+
+
+# ✅ dart_fss 대체
+_DART_COLUMNS = {
+    "매출액": "revenue",
+    "영업이익": "operating_income",
+    "당기순이익": "net_income",
+    "감가상각비": "depreciation",
+    "자산총계": "total_assets",
+    "부채총계": "total_liabilities",
+    "유동자산": "current_assets",
+    "유동부채": "current_liabilities",
+    "총차입금": "total_debt",
+    "이자비용": "interest_expense",
+    "이익잉여금": "retained_earnings",
+    "현금및현금성자산": "cash_equivalents",
+    "영업활동현금흐름": "operating_cash_flow",
+    "유형자산의취득": "capital_expenditure",
+}
+
+
+class FakeCorp:
+    """dart_fss Corp 대체 (extract_fs / search_filings)"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.corp_code = f"C{symbol}"
+
+    def extract_fs(self, report_tp="annual", year=5, **kwargs):
+        _count("dart.extract_fs")
+        values = statement_values(self.symbol, year)
+        index = [day.strftime("%Y-%m-%d") for day in _report_dates(year)]
+        return pd.DataFrame(
+            {label: values[field] for label, field in _DART_COLUMNS.items()},
+            index=index,
+        )
+
+    def search_filings(self, **kwargs):
+        _count("dart.search_filings")
+        report = types.SimpleNamespace(rcept_no=f"{date.today().year}{self.corp_code}")
+        return types.SimpleNamespace(report_list=[report])
+
+
+class FakeCorpList:
+    def find_by_stock_code(self, symbol):
+        return FakeCorp(symbol) if symbol in kr_symbols() else None
+
+
+def get_corp_list(api_key=None):
+    _count("dart.get_corp_list")
+    return FakeCorpList()
+
+
+_universe = make_universe(0, 0)
+
+
+def install_fake_providers(universe):
+    """가짜 yfinance / pykrx / FinanceDataReader / dart_fss 모듈을 sys.modules에 등록"""
+    global _universe
+    _universe = universe
+
+    yfinance = types.ModuleType("yfinance")
+    yfinance.Ticker = FakeTicker
+    yfinance.download = fake_download
+
+    stock = types.ModuleType("pykrx.stock")
+    for function in (
+        get_market_ohlcv,
+        get_previous_business_days,
+        get_index_ohlcv_by_date,
+        get_market_dividend_by_date,
+        get_market_ticker_name,
+        get_nearest_business_day_in_a_week,
+        get_market_cap,
+    ):
+        setattr(stock, function.__name__, function)
+    pykrx = types.ModuleType("pykrx")
+    pykrx.stock = stock
+
+    finance_data_reader = types.ModuleType("FinanceDataReader")
+    finance_data_reader.DataReader = fake_data_reader
+
+    dart_fss = types.ModuleType("dart_fss")
+    dart_fss.get_corp_list = get_corp_list
+
+    sys.modules.update(
+        {
+            "yfinance": yfinance,
+            "pykrx": pykrx,
+            "pykrx.stock": stock,
+            "FinanceDataReader": finance_data_reader,
+            "dart_fss": dart_fss,
+        }
+    )
@@ -0,0 +1,290 @@
+"""
+수집 단계별 처리량 측정 (가짜 provider + 로컬 SQLite / MySQL, 네트워크 사용 안 함)
+
+실행: python -m benchmarks.ingest_bench [--us 200] [--kr 200] [--years 5] [--db-url URL]
+      python -m benchmarks.ingest_bench --compare benchmarks/baselines/ingest_bench.json
+      python -m benchmarks.ingest_bench --save benchmarks/baselines/ingest_bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# ✅ (단계 이름, 저장 대상 테이블) — 실행 순서대로
+STAGES = [
+    ("process_all_companies", "companies"),
+    ("update_benchmark_prices", "benchmark_prices"),
+    ("update_stock_data", "stock_prices"),
+    ("update_financial_data", "financial_statements"),
+]
+
+# ✅ 회귀로 판단하는 지표와 방향 (1: 클수록 나쁨, -1: 작을수록 나쁨)
+REGRESSION_METRICS = {"rows_per_sec": -1, "queries": 1, "peak_mb": 1}
+
+
+def configure_environment(db_url, years):
+    """
+    저장소 모듈을 import하기 전에 환경 변수 설정 (config.settings는 import 시점에 값을 읽음)
+    - 캐시 / Parquet 저장소 / 실행 지표 파일 / 실행 일지 끄기, 요청 제한 해제 (가짜 provider라 대기할 필요 없음)
+    """
+    os.environ["DB_URL"] = db_url
+    os.environ["CACHE_ENABLED"] = "0"
+    os.environ["PRICE_STORE_MODE"] = "db"
+    os.environ["PRICE_REPLAY_MODE"] = "off"
+    os.environ["METRICS_DIR"] = ""
+    os.environ["RUN_JOURNAL_ENABLED"] = "0"
+    os.environ["BACKFILL_YEARS"] = str(years)
+    for provider in ("default", "yfinance", "pykrx", "krx", "dart"):
+        os.environ[f"RATE_LIMIT_{provider.upper()}"] = "1000000"
+
+
+def count_queries(engine):
+    """엔진에서 실행되는 SQL 문 수를 세는 카운터 (executemany는 1건)"""
+    from sqlalchemy import event
+
+    counter = {"queries": 0}
+
+    def before_cursor_execute(*args, **kwargs):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return counter
+
+
+def count_rows(engine, table):
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def rss_bytes():
+    """현재 프로세스 RSS (Linux /proc 기준, 없으면 지금까지의 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakMemory:
+    """with 블록 실행 중 프로세스 RSS 최대값을 interval초마다 샘플링"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def measure(engine, counter, table, fn, verbose=False):
+    """
+    fn() 한 번 실행의 벽시계 시간 / 저장 행 수 / SQL 문 수 / provider 호출 수 / 최대 RSS
+    (tracemalloc은 수집 속도를 크게 떨어뜨려 RSS 샘플링으로 측정)
+    """
+    from benchmarks import fake_providers
+
+    rows_before = count_rows(engine, table)
+    queries_before = counter["queries"]
+    calls_before = sum(fake_providers.calls.values())
+
+    output = (
+        contextlib.nullcontext()
+        if verbose
+        else contextlib.redirect_stdout(io.StringIO())
+    )
+    with output, PeakMemory() as memory:
+        started = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - started
+
+    peak = memory.peak
+    queries = counter["queries"] - queries_before
+    rows = count_rows(engine, table) - rows_before
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        "queries": queries,
+        "provider_calls": sum(fake_providers.calls.values()) - calls_before,
+        "peak_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def run_ingest_bench(us_count, kr_count, years, db_url, verbose=False):
+    """
+    빈 DB에 가짜 provider로 전체 수집을 실행하며 단계별 지표 측정
+    :return: {단계 이름: 지표 dict}
+    """
+    configure_environment(db_url, years)
+
+    from benchmarks import fake_providers
+
+    universe = fake_providers.make_universe(us_count, kr_count)
+    fake_providers.install_fake_providers(universe)
+
+    from data_fetch import companies_info
+    from data_fetch.benchmark_data import save_benchmark_indices
+    from data_fetch.benchmark_prices import update_benchmark_prices
+    from data_fetch.financial_data import update_financial_data
+    from data_fetch.stock_data import update_stock_data
+    from database.db_connection import get_engine
+    from scripts.initialize_db import create_tables
+
+    # ✅ 가짜 종목 목록을 티커 CSV 대신 사용
+    companies_info.get_ticker_lists = lambda: universe
+    stage_functions = {
+        "process_all_companies": companies_info.process_all_companies,
+        "update_benchmark_prices": update_benchmark_prices,
+        "update_stock_data": update_stock_data,
+        "update_financial_data": update_financial_data,
+    }
+
+    engine = get_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_tables()
+        save_benchmark_indices()
+    if count_rows(engine, "companies"):
+        raise RuntimeError(f"빈 DB에서 실행해야 합니다: {db_url}")
+
+    counter = count_queries(engine)
+    results = {}
+    try:
+        for name, table in STAGES:
+            results[name] = measure(
+                engine, counter, table, stage_functions[name], verbose
+            )
+            print(f"   ✅ {name} 완료 ({results[name]['seconds']}초)")
+    finally:
+        engine.dispose()
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """baseline 대비 tolerance(비율)보다 나빠진 (단계, 지표, 이전 값, 현재 값) 목록"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric, direction in REGRESSION_METRICS.items():
+            old, new = before.get(metric), result[metric]
+            if not old:
+                continue
+            change = (new - old) / old * direction
+            if change > tolerance:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    """단계별 지표 표 (baseline이 있으면 처리량 변화도 함께 표시)"""
+    lines = [
+        f"   {'단계':<24} {'행':>9} {'초':>8} {'행/초':>10} {'SQL':>7} "
+        f"{'provider':>9} {'RSS MB':>9}"
+    ]
+    for name, result in results.items():
+        line = (
+            f"   {name:<24} {result['rows']:>9,} {result['seconds']:>8.2f} "
+            f"{result['rows_per_sec']:>10,.0f} {result['queries']:>7,} "
+            f"{result['provider_calls']:>9,} {result['peak_mb']:>9.1f}"
+        )
+        before = (baseline or {}).get(name)
+        if before and before.get("rows_per_sec"):
+            ratio = result["rows_per_sec"] / before["rows_per_sec"]
+            line += f"  (처리량 {ratio:.2f}배, SQL {before['queries']:,} → {result['queries']:,})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--us", type=int, default=200, help="가짜 미국 종목 수")
+    parser.add_argument("--kr", type=int, default=200, help="가짜 한국 종목 수")
+    parser.add_argument("--years", type=int, default=5, help="신규 종목 수집 기간")
+    parser.add_argument(
+        "--db-url", help="빈 로컬 DB URL (기본값: 임시 디렉터리의 SQLite 파일)"
+    )
+    parser.add_argument("--verbose", action="store_true", help="수집 로그 출력")
+    parser.add_argument("--save", help="측정 결과를 baseline JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 baseline JSON 경로")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="회귀로 판단하는 baseline 대비 악화 비율",
+    )
+    args = parser.parse_args()
+
+    params = {"us": args.us, "kr": args.kr, "years": args.years}
+    temp_dir = None
+    db_url = args.db_url
+    if db_url is None:
+        temp_dir = tempfile.mkdtemp(prefix="ingest_bench_")
+        db_url = f"sqlite:///{os.path.join(temp_dir, 'ingest.db')}"
+
+    print(
+        f"📊 가짜 provider: 미국 {args.us}개 + 한국 {args.kr}개 종목, "
+        f"{args.years}년 수집 → {db_url}"
+    )
+    try:
+        results = run_ingest_bench(
+            args.us, args.kr, args.years, db_url, verbose=args.verbose
+        )
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("params") != params:
+            print(f"⚠️ baseline 측정 조건이 다릅니다: {saved.get('params')}")
+        baseline = saved["stages"]
+    print(format_results(results, baseline))
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"params": params, "stages": results}, f, ensure_ascii=False, indent=2
+            )
+        print(f"💾 baseline 저장: {args.save}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"❌ 회귀: {name} {metric} {old:,} → {new:,}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ baseline 대비 {args.tolerance:.0%} 이상 악화된 지표 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+주가 프레임 → 저장용 레코드 변환 속도 비교 (iterrows 방식 vs 컬럼 단위 변환)
+
+실행: python -m benchmarks.normalize_bench --symbols 1000 --years 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_fetch.normalize import (
+    YFINANCE_PRICE_COLUMNS,
+    frame_to_records,
+    normalize_price_frame,
+)
+
+
+def make_history(days, seed):
+    """yfinance Ticker.history()와 같은 형태의 합성 주가 프레임 생성 (NaN 일부 포함)"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-01-01", periods=days, tz="America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    frame = pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.002, days)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, days),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+    frame.iloc[rng.integers(0, days, days // 100), 0] = np.nan
+    return frame
+
+
+def legacy_records(data):
+    """기존 방식: iterrows + 셀 단위 NaN 변환"""
+
+    def convert_nan_to_none(value):
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+
+    stock_data = []
+    for date, row in data.iterrows():
+        stock_data.append(
+            {
+                "date": date.date(),
+                "open_price": convert_nan_to_none(row["Open"]),
+                "high_price": convert_nan_to_none(row["High"]),
+                "low_price": convert_nan_to_none(row["Low"]),
+                "close_price": convert_nan_to_none(row["Close"]),
+                "adjusted_close_price": convert_nan_to_none(row["Close"]),
+                "volume": convert_nan_to_none(row["Volume"]),
+            }
+        )
+    return stock_data
+
+
+def vectorized_records(data):
+    """신규 방식: normalize_price_frame + frame_to_records"""
+    return frame_to_records(normalize_price_frame(data, YFINANCE_PRICE_COLUMNS))
+
+
+def run(convert, frames):
+    """전체 프레임 변환 후 (행 수, 소요 시간) 반환"""
+    started = time.perf_counter()
+    rows = sum(len(convert(frame)) for frame in frames)
+    return rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    days = args.years * 252
+    frames = [make_history(days, seed) for seed in range(args.symbols)]
+    print(f"📊 합성 데이터: {args.symbols}개 종목 × {days}거래일")
+
+    results = {}
+    for name, convert in [
+        ("iterrows", legacy_records),
+        ("vectorized", vectorized_records),
+    ]:
+        rows, elapsed = run(convert, frames)
+        results[name] = rows / elapsed
+        print(
+            f"   {name:<10} {rows:>10,}행  {elapsed:8.2f}초  {rows / elapsed:>12,.0f} rows/sec"
+        )
+
+    print(f"✅ 속도 향상: {results['vectorized'] / results['iterrows']:.1f}배")
+
+
+if __name__ == "__main__":
+    main()
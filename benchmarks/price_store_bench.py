@@ -0,0 +1,86 @@
+"""
+Parquet 주가 저장소 쓰기/조회 속도 측정 (합성 데이터, 임시 디렉터리 사용)
+
+실행: python -m benchmarks.price_store_bench --companies 2000 --years 5
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from database.price_store import compact_store, read_prices, write_partitions
+
+
+def make_prices(companies, years, seed=0):
+    """company_id × 거래일 합성 주가 프레임 (저장소 스키마)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-01-01", periods=years * 252).date
+    ids = np.repeat(np.arange(1, companies + 1), len(dates))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(ids))))
+    return pd.DataFrame(
+        {
+            "company_id": ids,
+            "date": np.tile(dates, companies),
+            "open_price": close,
+            "high_price": close * 1.01,
+            "low_price": close * 0.99,
+            "close_price": close,
+            "adjusted_close_price": close,
+            "volume": rng.integers(1_000, 1_000_000, len(ids)),
+        }
+    )
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    rows = len(result) if hasattr(result, "__len__") else result
+    print(
+        f"   {label:<32} {rows:>12,}행  {elapsed:8.3f}초  {rows / elapsed:>14,.0f} rows/sec"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    frame = make_prices(args.companies, args.years)
+    countries = {
+        company_id: ("US" if company_id % 2 else "KR")
+        for company_id in range(1, args.companies + 1)
+    }
+    last_year = max(frame["date"]).year
+    print(f"📊 합성 데이터: {args.companies}개 종목 × {args.years * 252}거래일")
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        timed(
+            "쓰기 (country/year 파티션)",
+            lambda: write_partitions(frame, "stock_prices", countries, store_dir),
+        )
+        compact_store("stock_prices", store_dir)
+        timed("전체 조회", lambda: read_prices(store_dir=store_dir))
+        timed(
+            "수정 종가 컬럼만 전체 조회",
+            lambda: read_prices(columns=["adjusted_close_price"], store_dir=store_dir),
+        )
+        timed(
+            f"KR + {last_year}년 조회",
+            lambda: read_prices(
+                countries=["KR"], start=f"{last_year}-01-01", store_dir=store_dir
+            ),
+        )
+        timed(
+            "종목 10개 전체 기간 조회",
+            lambda: read_prices(ids=range(1, 11), store_dir=store_dir),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+주가 조회 패턴별 지연 시간 측정 (설정된 DB 사용, 읽기 전용)
+
+실행: python -m benchmarks.query_bench [--repeat 20] [--save before.json] [--compare before.json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, select, text
+
+from database.db_connection import get_engine
+from database.models import BenchmarkPrice, Company
+
+# ✅ 조회 패턴 (이름, SQL)
+QUERIES = [
+    (
+        "종목별 1년 기간 조회",
+        "SELECT date, adjusted_close_price FROM stock_prices "
+        "WHERE company_id = :company_id AND date BETWEEN :start AND :date",
+    ),
+    (
+        "단일 날짜 전 종목 조회",
+        "SELECT company_id, close_price FROM stock_prices WHERE date = :date",
+    ),
+    (
+        "국가별 단일 날짜 조회",
+        "SELECT s.company_id, s.close_price FROM stock_prices s "
+        "JOIN companies c ON c.id = s.company_id "
+        "WHERE c.country = :country AND s.date = :date",
+    ),
+    (
+        "종목별 최신 가격",
+        "SELECT s.company_id, s.date, s.close_price FROM stock_prices s "
+        "JOIN (SELECT company_id, MAX(date) AS date FROM stock_prices "
+        "GROUP BY company_id) latest "
+        "ON latest.company_id = s.company_id AND latest.date = s.date",
+    ),
+]
+
+
+def sample_params(connection, count, seed=0):
+    """
+    조회 파라미터 샘플 (종목 / 날짜는 작은 테이블에서 뽑아 측정 대상 테이블을 건드리지 않음)
+    - 날짜: benchmark_prices의 거래일, 종목: companies
+    """
+    rng = random.Random(seed)
+    companies = connection.execute(select(Company.id, Company.country)).all()
+    dates = connection.scalars(select(BenchmarkPrice.date).distinct()).all()
+    if not companies or not dates:
+        raise RuntimeError("companies / benchmark_prices 데이터가 없습니다.")
+
+    params = []
+    for _ in range(count):
+        company_id, country = rng.choice(companies)
+        date = rng.choice(dates)
+        params.append(
+            {
+                "company_id": company_id,
+                "country": country,
+                "date": date,
+                "start": date - timedelta(days=365),
+            }
+        )
+    return params
+
+
+def run_query_bench(repeat=20, seed=0):
+    """
+    QUERIES를 각각 repeat번 (매번 다른 파라미터로) 실행
+    :return: {이름: {"median_ms", "p95_ms", "rows"}}
+    """
+    results = {}
+    with get_engine().connect() as connection:
+        params = sample_params(connection, repeat, seed)
+        for name, sql in QUERIES:
+            statement = text(sql)
+            # ✅ 첫 실행은 캐시 준비용으로 측정에서 제외
+            connection.execute(statement, params[0]).fetchall()
+            timings, rows = [], 0
+            for param in params:
+                started = time.perf_counter()
+                rows += len(connection.execute(statement, param).fetchall())
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(
+                    timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2
+                ),
+                "rows": rows // len(params),
+            }
+    return results
+
+
+def format_results(results, baseline=None):
+    """측정 결과 표 (baseline이 있으면 이전 결과와 나란히 비교)"""
+    lines = []
+    for name, result in results.items():
+        line = (
+            f"   {name:<20} 중앙값 {result['median_ms']:>9.2f}ms  "
+            f"p95 {result['p95_ms']:>9.2f}ms  {result['rows']:>8,}행"
+        )
+        if baseline and name in baseline:
+            before = baseline[name]["median_ms"]
+            speedup = before / result["median_ms"] if result["median_ms"] else 0
+            line += f"  (이전 {before:.2f}ms → {speedup:.1f}배)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", help="측정 결과를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="이전 측정 결과 JSON (나란히 비교)")
+    args = parser.parse_args()
+
+    with get_engine().connect() as connection:
+        total = connection.scalar(
+            select(func.count()).select_from(text("stock_prices"))
+        )
+    print(f"📊 stock_prices {total:,}행, 패턴별 {args.repeat}회 측정")
+
+    results = run_query_bench(args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 측정 결과 저장: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
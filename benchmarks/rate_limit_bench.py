@@ -0,0 +1,115 @@
+"""
+provider rate limiter 동작 확인 (초당 처리량을 제한하는 로컬 가짜 서버 대상)
+
+실행: python -m benchmarks.rate_limit_bench --server-rate 20 --requests 200 --workers 8
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from data_fetch.rate_limit import AdaptiveRateLimiter, TokenBucket
+
+
+def start_fake_server(rate):
+    """초당 rate건을 넘는 요청에는 429를 반환하는 로컬 HTTP 서버 시작"""
+    bucket = TokenBucket(rate)
+    bucket_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with bucket_lock:
+                bucket._refill(time.monotonic())
+                allowed = bucket._tokens >= 1
+                if allowed:
+                    bucket._tokens -= 1
+            self.send_response(200 if allowed else 429)
+            self.end_headers()
+            self.wfile.write(b"ok" if allowed else b"Too Many Requests")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def get(session, url):
+    response = session.get(url, timeout=5)
+    response.raise_for_status()
+    return response
+
+
+def run_unlimited(url, total, workers):
+    """요청 제한 없이 동시에 호출 (429는 실패로 집계)"""
+    session = requests.Session()
+    failed = 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal failed
+        try:
+            get(session, url)
+        except requests.HTTPError:
+            with lock:
+                failed += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(call, range(total)))
+    return total - failed, failed, time.perf_counter() - started
+
+
+def run_limited(url, total, workers, rate):
+    """AdaptiveRateLimiter를 거쳐 호출 (429 시 감속 후 재시도)"""
+    session = requests.Session()
+    limiter = AdaptiveRateLimiter("fake", rate, base_delay=0.2, retries=10)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda _: limiter.call(lambda: get(session, url)), range(total)))
+    return limiter.metrics(), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--server-rate", type=float, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--client-rate",
+        type=float,
+        default=None,
+        help="limiter 초기 초당 요청 수 (기본값: 서버 허용량의 2배)",
+    )
+    args = parser.parse_args()
+    client_rate = args.client_rate or args.server_rate * 2
+
+    server, url = start_fake_server(args.server_rate)
+    print(f"📊 가짜 서버: 초당 {args.server_rate}건 허용, 요청 {args.requests}건")
+    try:
+        ok, failed, elapsed = run_unlimited(url, args.requests, args.workers)
+        print(
+            f"   제한 없음   성공 {ok:>5}건  429 {failed:>5}건  {elapsed:6.2f}초  "
+            f"{ok / elapsed:8.1f} 성공/초"
+        )
+
+        time.sleep(1)  # 서버 토큰 버킷 회복
+        metrics, elapsed = run_limited(url, args.requests, args.workers, client_rate)
+        print(
+            f"   AIMD 제한   성공 {metrics['succeeded']:>5}건  429 {metrics['throttled']:>5}건  "
+            f"{elapsed:6.2f}초  {metrics['succeeded'] / elapsed:8.1f} 성공/초  "
+            f"(초기 초당 {client_rate}건 → 최종 {metrics['rate']}건, "
+            f"평균 대기 {metrics['avg_wait_seconds']}초)"
+        )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+재무 비율 계산 속도 비교 (행 단위 계산 vs 컬럼 단위 일괄 계산, 합성 데이터, DB 사용 안 함)
+
+실행: python -m benchmarks.ratio_bench --companies 15000 --years 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_processing.process_financials import (
+    AMOUNT_COLUMNS,
+    prepare_financial_statements,
+)
+from data_processing.process_ratios import RATIO_FORMULAS, compute_ratios
+
+
+def make_statements(companies, years, seed=0):
+    """company_id × 회계연도 합성 재무제표 (결측 / 0 / 음수 값 일부 포함)"""
+    rng = np.random.default_rng(seed)
+    report_dates = pd.date_range(end="2024-12-31", periods=years, freq="YE")
+    rows = companies * years
+    frame = pd.DataFrame(
+        {
+            "company_id": np.repeat(np.arange(1, companies + 1), years),
+            "report_date": np.tile(report_dates, companies),
+        }
+    )
+    for name in AMOUNT_COLUMNS:
+        values = rng.normal(1e9, 6e8, rows)
+        values[rng.random(rows) < 0.05] = np.nan
+        values[rng.random(rows) < 0.01] = 0
+        frame[name] = values
+    frame["dividend_payout_ratio"] = rng.uniform(0, 60, rows)
+    return frame
+
+
+def row_by_row(statements):
+    """비교 기준: 행마다 파이썬 분기로 비율 계산 (성장성 지표 제외)"""
+    results = []
+    for row in statements.to_dict("records"):
+        row["working_capital"] = row["current_assets"] - row["current_liabilities"]
+        ratios = {"company_id": row["company_id"], "fiscal_year": row["fiscal_year"]}
+        for name, numerator, denominator, scale in RATIO_FORMULAS:
+            value = None
+            if (
+                row[denominator]
+                and row[denominator] > 0
+                and row[numerator] == row[numerator]
+            ):
+                value = round(row[numerator] / row[denominator] * scale, 2)
+            ratios[name] = value
+        results.append(ratios)
+    return results
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(
+        f"   {label:<28} {len(result):>10,}건  {elapsed:8.3f}초  "
+        f"{len(result) / elapsed:>12,.0f}건/초"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--companies", type=int, default=15000)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    statements = prepare_financial_statements(
+        make_statements(args.companies, args.years)
+    )
+    print(
+        f"📊 합성 데이터: {args.companies:,}개 기업 × {args.years}년 "
+        f"(재무제표 {len(statements):,}건)"
+    )
+
+    slow = timed("행 단위 계산", lambda: row_by_row(statements))
+    fast = timed("컬럼 단위 일괄 계산", lambda: compute_ratios(statements))
+    print(f"🚀 {slow / fast:.1f}배 빠름 (일괄 계산은 성장성 지표 포함)")
+
+
+if __name__ == "__main__":
+    main()
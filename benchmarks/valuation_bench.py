@@ -0,0 +1,63 @@
+"""
+밸류에이션 일괄 계산(as-of join + 벡터 연산) 속도 측정 (합성 데이터, DB 사용 안 함)
+
+실행: python -m benchmarks.valuation_bench --companies 2000 --years 5
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.price_store_bench import make_prices, timed
+from valuation.valuation_metrics import (
+    STATEMENT_COLUMNS,
+    compute_valuations,
+    prepare_statements,
+)
+
+
+def make_statements(companies, years, seed=0):
+    """company_id × 회계연도 합성 연간 재무제표"""
+    rng = np.random.default_rng(seed)
+    report_dates = pd.date_range(end="2024-12-31", periods=years + 1, freq="YE")
+    ids = np.repeat(np.arange(1, companies + 1), len(report_dates))
+    frame = pd.DataFrame(
+        {
+            "company_id": ids,
+            "report_date": np.tile(report_dates, companies),
+        }
+    )
+    for name in STATEMENT_COLUMNS:
+        frame[name] = rng.normal(1e9, 5e8, len(ids))
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    prices = make_prices(args.companies, args.years)[
+        ["company_id", "date", "close_price"]
+    ]
+    statements = prepare_statements(make_statements(args.companies, args.years))
+    shares = {company_id: 1e7 for company_id in range(1, args.companies + 1)}
+    print(
+        f"📊 합성 데이터: {args.companies}개 종목 × {args.years * 252}거래일 "
+        f"(재무제표 {len(statements):,}건)"
+    )
+
+    result = timed(
+        "as-of join + 배수 계산",
+        lambda: compute_valuations(prices, statements, shares),
+    )
+    latest = result[result["latest"]]
+    print(
+        f"   마지막 날짜 행 중 결측이 아닌 PER 비율: {latest['per'].notna().mean():.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,19 +16,44 @@ DB_CONFIG = {
 }
 
 
+class DictCursorConnection:
+    """
+    풀에서 빌린 PyMySQL 연결 래퍼: cursor()의 기본값을 DictCursor로 사용
+    - 공유 엔진의 connect_args로 cursorclass를 바꾸면 SQLAlchemy 자체 조회가 깨지므로
+      get_db_connection() 호출부에서만 딕셔너리 결과를 반환
+    - 그 외 속성 (commit, rollback, close 등)은 원래 연결로 위임
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, cursor=None):
+        return self._connection.cursor(cursor or DB_CONFIG["cursorclass"])
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
 def get_db_connection():
-    """PyMySQL을 사용하여 MySQL 데이터베이스 연결을 반환"""
+    """
+    공유 커넥션 풀에서 PyMySQL 연결을 빌려서 반환 (close() 시 풀로 반환됨)
+    결과는 기존처럼 딕셔너리로 반환 (DB_CONFIG의 cursorclass)
+    """
+    from database.db_connection import get_engine
+
     try:
-        conn = pymysql.connect(**DB_CONFIG)
+        conn = DictCursorConnection(get_engine().raw_connection())
         print("✅ MySQL 데이터베이스 연결 성공!")
         return conn
-    except pymysql.MySQLError as err:
+    except Exception as err:
         print(f"❌ MySQL 연결 실패: {err}")
         return None
 
 
 def get_db_url():
-    """SQLAlchemy에서 사용할 수 있는 MySQL 데이터베이스 URL을 반환"""
+    """SQLAlchemy에서 사용할 수 있는 MySQL 데이터베이스 URL을 반환 (DB_URL 환경 변수가 있으면 우선 사용)"""
+    if os.getenv("DB_URL"):
+        return os.getenv("DB_URL")
     return f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 
 
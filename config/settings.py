@@ -1 +1,169 @@
+import os
+from dotenv import load_dotenv
 
+# .env 파일에서 환경 변수 불러오기
+load_dotenv()
+
+# ✅ 대량 upsert 시 한 번의 INSERT 문에 담을 행 수
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 1000))
+
+# ✅ 증분 수집 설정
+# - INCREMENTAL_UPDATE: 0이면 항상 전체 기간 수집
+# - INCREMENTAL_OVERLAP_DAYS: 수정된 과거 데이터를 반영하기 위한 겹침 기간
+# - BACKFILL_YEARS: 신규 종목 전체 수집 기간
+INCREMENTAL_UPDATE = os.getenv("INCREMENTAL_UPDATE", "1") == "1"
+INCREMENTAL_OVERLAP_DAYS = int(os.getenv("INCREMENTAL_OVERLAP_DAYS", 7))
+BACKFILL_YEARS = int(os.getenv("BACKFILL_YEARS", 5))
+
+# ✅ 수집 파이프라인 설정 (fetch 워커 → bounded queue → DB writer 워커)
+# - PIPELINE_QUEUE_SIZE: 저장 대기 결과 최대 개수 (가득 차면 fetch 워커가 대기)
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 8))
+WRITE_WORKERS = int(os.getenv("WRITE_WORKERS", 2))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 32))
+
+# ✅ 기업 정보 등록 시 bulk upsert + 커밋 단위 (건수)
+COMPANY_COMMIT_SIZE = int(os.getenv("COMPANY_COMMIT_SIZE", 500))
+
+# ✅ 기업 메타데이터(yfinance info) 동시 수집 설정
+# - 요청 속도는 provider 공용 rate limiter(RATE_LIMITS["yfinance"])를 따름
+# - METADATA_PROGRESS_EVERY: 진행 상황을 출력할 조회 건수 간격
+METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", 8))
+METADATA_PROGRESS_EVERY = int(os.getenv("METADATA_PROGRESS_EVERY", 200))
+
+# ✅ provider별 요청 제한 (토큰 버킷 + AIMD)
+# - RATE_LIMITS: provider별 초기 초당 요청 수 (RATE_LIMIT_<PROVIDER> 로 변경, 목록에 없으면 default)
+# - RATE_LIMIT_INCREASE: 요청 성공 시 초당 요청 수 증가량 (초기값의 2배까지)
+# - RATE_LIMIT_DECREASE: 429/일시적 오류 시 초당 요청 수에 곱할 비율 (초기값의 1/10까지)
+# - RATE_LIMIT_MAX_RETRIES / RATE_LIMIT_BACKOFF_SECONDS: 지수 백오프 재시도 횟수 / 첫 대기 시간
+RATE_LIMITS = {
+    provider: float(os.getenv(f"RATE_LIMIT_{provider.upper()}", rate))
+    for provider, rate in {
+        "default": 2,
+        "yfinance": 5,
+        "pykrx": 5,
+        "krx": 2,
+        "dart": 5,
+        "fdr": 5,
+        "wikipedia": 1,
+        "nasdaqtrader": 1,
+    }.items()
+}
+RATE_LIMIT_INCREASE = float(os.getenv("RATE_LIMIT_INCREASE", 0.1))
+RATE_LIMIT_DECREASE = float(os.getenv("RATE_LIMIT_DECREASE", 0.5))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", 5))
+RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", 1))
+
+# ✅ 미국 주가 다중 티커 다운로드 시 한 번의 요청에 담을 종목 수
+US_BATCH_SIZE = int(os.getenv("US_BATCH_SIZE", 100))
+
+# ✅ 한국 주가 수집 방식
+# - by_ticker: 종목별로 기간 조회 (종목 수만큼 요청)
+# - by_date: 누락된 거래일마다 전체 시장을 한 번에 조회 (거래일 수만큼 요청)
+# - auto: 누락 거래일 수가 기존 종목 수보다 적으면 by_date 사용
+KR_FETCH_MODE = os.getenv("KR_FETCH_MODE", "auto")
+
+# ✅ 주가 provider 라우팅 (data_fetch/price_providers.py)
+# - PRICE_PROVIDERS: 사용할 provider와 우선순위 (yfinance / pykrx / fdr, 쉼표 구분)
+#   종목마다 국가를 지원하는 provider 중 평균 지연 시간이 가장 짧은 정상 provider를 사용하고
+#   실패하거나 데이터가 없으면 다음 provider로 자동 전환 (측정 전에는 우선순위 순서)
+# - PRICE_PROVIDER_MAX_ERRORS: 연속 실패가 이 횟수에 도달하면 쿨다운 (스로틀링은 즉시)
+# - PRICE_PROVIDER_COOLDOWN_SECONDS: 쿨다운 동안 라우팅 대상에서 제외하는 시간
+# - PRICE_PROVIDER_RETRIES: provider 요청의 스로틀링 재시도 횟수
+#   (다른 provider로 전환할 수 있으므로 RATE_LIMIT_MAX_RETRIES보다 짧게 재시도)
+# - PRICE_REPLAY_MODE: off / record (수집 결과를 기록) / replay (기록된 결과만 사용, 네트워크 없음)
+# - PRICE_REPLAY_DIR: 기록 저장 경로 (국가/종목.parquet)
+PRICE_PROVIDERS = [
+    name.strip()
+    for name in os.getenv("PRICE_PROVIDERS", "yfinance,pykrx,fdr").split(",")
+    if name.strip()
+]
+PRICE_PROVIDER_MAX_ERRORS = int(os.getenv("PRICE_PROVIDER_MAX_ERRORS", 3))
+PRICE_PROVIDER_COOLDOWN_SECONDS = float(
+    os.getenv("PRICE_PROVIDER_COOLDOWN_SECONDS", 300)
+)
+PRICE_PROVIDER_RETRIES = int(os.getenv("PRICE_PROVIDER_RETRIES", 1))
+PRICE_REPLAY_MODE = os.getenv("PRICE_REPLAY_MODE", "off")
+PRICE_REPLAY_DIR = os.getenv("PRICE_REPLAY_DIR", "data/replay")
+
+# ✅ 주가 저장 위치
+# - PRICE_STORE_MODE: db (MySQL만) / both (MySQL + Parquet 저장소) / parquet (Parquet 저장소만)
+# - PRICE_STORE_DIR: Parquet 저장소 경로 (테이블/country=국가/year=연도 파티션)
+# - PRICE_STORE_FLUSH_ROWS: 저장소에 part 파일로 기록할 버퍼 행 수
+PRICE_STORE_MODE = os.getenv("PRICE_STORE_MODE", "db")
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/price_store")
+PRICE_STORE_FLUSH_ROWS = int(os.getenv("PRICE_STORE_FLUSH_ROWS", 500_000))
+
+# ✅ 거래일 × 종목 가격 행렬 (memory-mapped .npy) 저장 경로
+PRICE_MATRIX_DIR = os.getenv("PRICE_MATRIX_DIR", "data/price_matrix")
+
+# ✅ 실행 계측 / 로그 (monitoring/metrics.py)
+# - LOG_VERBOSITY: 0 실행 요약만 / 1 경고 등 실행 단위 로그 / 2 종목 · 거래일 단위 로그
+#   / 3 행 단위 로그를 샘플링해서 출력
+# - LOG_SAMPLE_EVERY: LOG_VERBOSITY=3일 때 단계별로 N행마다 한 번 출력
+# - METRICS_DIR: 실행 종료 시 JSON / Prometheus 텍스트 요약을 저장할 경로 (빈 값이면 저장 안 함)
+LOG_VERBOSITY = int(os.getenv("LOG_VERBOSITY", 1))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 1000))
+METRICS_DIR = os.getenv("METRICS_DIR", "data/metrics")
+
+# ✅ 실행 일지 (data_fetch/run_journal.py, 중단된 수집을 이어서 실행)
+# - RUN_JOURNAL_ENABLED: 0이면 일지를 기록하지 않고 항상 전체 실행
+# - RUN_JOURNAL_PATH: 종목별 상태 / 시도 횟수 / 마지막 오류를 기록할 로컬 SQLite 파일
+# - RUN_JOURNAL_MAX_ATTEMPTS: 같은 날 이 횟수만큼 실패한 종목은 다시 실행할 때 건너뜀
+#   (실패 종목만 다시 실행하는 retry_failed 모드는 횟수와 관계없이 실행)
+# - RUN_JOURNAL_KEEP_DAYS: 이 기간보다 오래된 실행 기록은 삭제
+RUN_JOURNAL_ENABLED = os.getenv("RUN_JOURNAL_ENABLED", "1") == "1"
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH", "data/run_journal.sqlite")
+RUN_JOURNAL_MAX_ATTEMPTS = int(os.getenv("RUN_JOURNAL_MAX_ATTEMPTS", 3))
+RUN_JOURNAL_KEEP_DAYS = int(os.getenv("RUN_JOURNAL_KEEP_DAYS", 14))
+
+# ✅ 변경 이력 커서 (database/change_log.py)
+# - CHANGE_SETTLE_SECONDS: 파생 테이블 빌더가 최근 이 시간(초) 안에 기록된 변경 이력은 다음 실행에서 반영
+#   (수집과 빌더를 동시에 실행할 때 가장 긴 수집 트랜잭션보다 길게 설정, 순서대로 실행하면 0)
+CHANGE_SETTLE_SECONDS = int(os.getenv("CHANGE_SETTLE_SECONDS", 0))
+
+# ✅ DB 커넥션 풀 설정 (프로세스당 하나의 엔진을 공유)
+# - DB_POOL_RECYCLE: MySQL wait_timeout 전에 커넥션을 재생성할 주기(초)
+# - DB_POOL_PRE_PING: 커넥션 사용 전 끊김 여부 확인
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+
+# ✅ provider 응답 디스크 캐시 (Parquet)
+# - CACHE_ENABLED: 0이면 캐시를 사용하지 않고 항상 provider를 호출
+# - CACHE_MAX_MB: 캐시 디렉터리 최대 용량 (초과 시 오래 사용하지 않은 파일부터 삭제)
+# - CACHE_TTL_HOURS: 데이터셋별 유효 기간 (CACHE_TTL_<DATASET>_HOURS 로 변경)
+#   (오늘까지 포함하는 기간과 빈 응답은 TTL과 관계없이 캐싱하지 않음)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", 1024))
+CACHE_TTL_HOURS = {
+    dataset: float(os.getenv(f"CACHE_TTL_{dataset.upper()}_HOURS", hours))
+    for dataset, hours in {
+        "ohlcv": 12,
+        "financials": 24 * 7,
+        "dividends": 24,
+        "statements": 24 * 30,
+        "sector": 24,
+    }.items()
+}
+
+# ✅ DART 재무제표 추출 결과를 (corp_code, 직전 회계연도) 기준으로 디스크에 보관
+# - 같은 해 안에 새로 공시된 사업보고서는 CACHE_TTL_STATEMENTS_HOURS가 지나면 반영
+# - 0이면 실행 중 메모이제이션만 사용
+DART_PERSIST_STATEMENTS = os.getenv("DART_PERSIST_STATEMENTS", "1") == "1"
+
+# ✅ 밸류에이션 일괄 계산
+# - VALUATION_STATEMENT_LAG_DAYS: 보고서 기준일 이후 공시까지 걸리는 기간 (이 기간이 지난 뒤부터 재무제표 사용)
+# - VALUATION_CHUNK_ROWS: 한 번에 계산 / 커밋할 company-day 행 수
+VALUATION_STATEMENT_LAG_DAYS = int(os.getenv("VALUATION_STATEMENT_LAG_DAYS", 90))
+VALUATION_CHUNK_ROWS = int(os.getenv("VALUATION_CHUNK_ROWS", 200_000))
+
+# ✅ 롤링 베타 계산
+# - BETA_WINDOW: 롤링 윈도우 길이 (벤치마크 거래일 수)
+# - BETA_MIN_PERIODS: 베타를 계산하기 위한 윈도우 내 최소 유효 수익률 수
+# - BETA_CHUNK_COMPANIES: 한 번에 계산할 종목 수 (수익률 행렬 메모리 사용량 제한)
+BETA_WINDOW = int(os.getenv("BETA_WINDOW", 252))
+BETA_MIN_PERIODS = int(os.getenv("BETA_MIN_PERIODS", 126))
+BETA_CHUNK_COMPANIES = int(os.getenv("BETA_CHUNK_COMPANIES", 1000))
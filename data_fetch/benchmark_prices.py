@@ -1,137 +1,196 @@
-import os
-import pandas as pd
 import datetime
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from database.models import BenchmarkIndex, BenchmarkPrice, Base
-from config.db_config import get_db_url
-
-# 데이터 수집 라이브러리
-from pykrx import stock  # 한국 지수
-import yfinance as yf  # 미국 지수
-
-# 데이터베이스 연결 설정
-db_url = get_db_url()
-engine = create_engine(db_url)
-Session = sessionmaker(bind=engine)
-session = Session()
-
-# 📌 1️⃣ 벤치마크 지수 목록 조회
-benchmark_indices = session.query(BenchmarkIndex).all()
-if not benchmark_indices:
-    print(
-        "❌ 벤치마크 지수 데이터가 존재하지 않습니다. benchmark_data.py를 먼저 실행하세요."
-    )
-    exit()
-
-# 📌 2️⃣ 벤치마크 지수별 데이터 수집
-for benchmark in benchmark_indices:
-    index_symbol = benchmark.index_symbol
-    country = benchmark.country
-
-    # 📌 3️⃣ 데이터 수집 기간 설정 (5년치)
-    end_date = datetime.datetime.today().strftime("%Y-%m-%d")
-    start_date = (
-        datetime.datetime.today() - datetime.timedelta(days=5 * 365)
-    ).strftime("%Y-%m-%d")
-
-    print(f"📊 {benchmark.index_name} ({index_symbol}) 데이터 수집 중...")
-
-    # 📌 4️⃣ 한국 지수 (KOSPI, KOSDAQ) - pykrx 사용
-    if country == "KR":
-        df = stock.get_index_ohlcv_by_date(
-            start_date.replace("-", ""), end_date.replace("-", ""), index_symbol
+from database.models import BenchmarkIndex, BenchmarkPrice
+from database.change_log import record_changes
+from database.db_connection import get_session
+from database.queries import get_latest_dates
+from database.upsert import bulk_upsert
+from database.price_store import (
+    PriceStoreWriter,
+    compact_store,
+    get_store_latest_dates,
+)
+from config.settings import PRICE_STORE_MODE
+from data_fetch.cache import cached_frame, format_cache_stats
+from data_fetch.rate_limit import format_limiter_metrics
+from data_fetch.fetch_window import get_fetch_start_date
+from data_fetch.normalize import (
+    PYKRX_PRICE_COLUMNS,
+    YFINANCE_PRICE_COLUMNS,
+    frame_to_records,
+    normalize_price_frame,
+)
+from monitoring.metrics import log, reset_metrics, timer, write_metrics
+
+
+def update_benchmark_prices():
+    """벤치마크 지수별 가격 데이터를 수집하여 저장"""
+    # 데이터베이스 연결 설정
+    reset_metrics()
+    session = get_session()
+    try:
+        _update_benchmark_prices(session)
+    finally:
+        session.close()
+    write_metrics("update_benchmark_prices")
+
+
+def _update_benchmark_prices(session):
+    """벤치마크 지수 목록을 조회하고 지수별 가격 데이터를 upsert"""
+    # 데이터 수집 라이브러리 (import 비용이 크므로 실행 시점에 불러옴)
+    import pandas as pd
+    from pykrx import stock  # 한국 지수
+    import yfinance as yf  # 미국 지수
+
+    # 📌 1️⃣ 벤치마크 지수 목록 조회
+    benchmark_indices = session.query(BenchmarkIndex).all()
+    if not benchmark_indices:
+        print(
+            "❌ 벤치마크 지수 데이터가 존재하지 않습니다. benchmark_data.py를 먼저 실행하세요."
         )
-        if df.empty:
-            print(f"⚠️ {benchmark.index_name} 데이터가 없습니다.")
-            continue
+        return
+
+    # ✅ 지수별 마지막 저장일 (한 번의 GROUP BY 쿼리, parquet 모드는 저장소 기준)
+    if PRICE_STORE_MODE == "parquet":
+        latest_dates = get_store_latest_dates("benchmark_prices")
+    else:
+        latest_dates = get_latest_dates(session, BenchmarkPrice, "benchmark_id")
 
-        df.reset_index(inplace=True)
-        df.rename(
-            columns={
-                "날짜": "date",
-                "시가": "open",
-                "고가": "high",
-                "저가": "low",
-                "종가": "close",
-                "거래량": "volume",
-            },
-            inplace=True,
+    # ✅ Parquet 저장소 기록 (지수 수가 적으므로 마지막에 한 번에 기록)
+    store_writer = None
+    if PRICE_STORE_MODE in ("both", "parquet"):
+        store_writer = PriceStoreWriter(
+            "benchmark_prices", {b.id: b.country for b in benchmark_indices}
         )
 
-    # 📌 5️⃣ 미국 지수 (S&P 500, NASDAQ, DOW JONES) - yfinance 사용
-    elif country == "US":
-        df = yf.download(
-            index_symbol, start=start_date, end=end_date, auto_adjust=False
+    # ✅ 미국 지수는 yfinance 다중 티커 다운로드 한 번으로 수집 (가장 이른 시작일 기준)
+    us_benchmarks = [b for b in benchmark_indices if b.country == "US"]
+    us_data = pd.DataFrame()
+    if us_benchmarks:
+        us_start_date = min(
+            get_fetch_start_date(latest_dates.get(b.id)) for b in us_benchmarks
         )
+        us_symbols = [b.index_symbol for b in us_benchmarks]
+        us_start = us_start_date.strftime("%Y-%m-%d")
+        us_end = datetime.datetime.today().strftime("%Y-%m-%d")
+        with timer("fetch", provider="yfinance"):
+            us_data = cached_frame(
+                "yfinance",
+                "ohlcv",
+                {
+                    "symbols": sorted(us_symbols),
+                    "start": us_start,
+                    "end": us_end,
+                    "auto_adjust": False,
+                },
+                lambda: yf.download(
+                    us_symbols,
+                    start=us_start,
+                    end=us_end,
+                    group_by="ticker",
+                    auto_adjust=False,
+                ),
+            )
 
-        if df.empty:
-            print(f"⚠️ {benchmark.index_name} 데이터가 없습니다.")
-            continue
+    # 📌 2️⃣ 벤치마크 지수별 데이터 수집
+    for benchmark in benchmark_indices:
+        index_symbol = benchmark.index_symbol
+        country = benchmark.country
 
-        # ✅ MultiIndex 해제 (첫 번째 레벨만 남김)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-
-        # ✅ 컬럼명을 소문자로 변환
-        df.columns = df.columns.str.lower()
-
-        # ✅ 인덱스를 date 컬럼으로 변환
-        df["date"] = df.index.date
-
-        # ✅ 컬럼명 변경
-        df.rename(
-            columns={
-                "open": "open",
-                "high": "high",
-                "low": "low",
-                "close": "close",
-                "adj close": "adjusted_close",
-                "volume": "volume",
-            },
-            inplace=True,
+        # 📌 3️⃣ 데이터 수집 기간 설정 (신규 지수: 5년치, 기존 지수: 마지막 저장일 이후)
+        end_date = datetime.datetime.today().strftime("%Y-%m-%d")
+        start_date = get_fetch_start_date(latest_dates.get(benchmark.id)).strftime(
+            "%Y-%m-%d"
         )
 
-        # ✅ "adjusted_close"가 없으면 "close" 값 사용
-        if "adjusted_close" not in df.columns:
-            df["adjusted_close"] = df["close"]
+        log(f"📊 {benchmark.index_name} ({index_symbol}) 데이터 수집 중...", level=2)
+
+        # 📌 4️⃣ 한국 지수 (KOSPI, KOSDAQ) - pykrx 사용
+        if country == "KR":
+            kr_start, kr_end = start_date.replace("-", ""), end_date.replace("-", "")
+            with timer("fetch", provider="pykrx"):
+                df = cached_frame(
+                    "pykrx",
+                    "ohlcv",
+                    {"index": index_symbol, "start": kr_start, "end": kr_end},
+                    lambda: stock.get_index_ohlcv_by_date(
+                        kr_start, kr_end, index_symbol
+                    ),
+                )
+            if df.empty:
+                print(f"⚠️ {benchmark.index_name} 데이터가 없습니다.")
+                continue
+
+            # ✅ 컬럼명 표준화 (날짜 인덱스 → date, 수정 종가가 없으면 종가 사용)
+            df = normalize_price_frame(df, PYKRX_PRICE_COLUMNS)
+
+        # 📌 5️⃣ 미국 지수 (S&P 500, NASDAQ, DOW JONES) - yfinance 사용
+        elif country == "US":
+            # ✅ 일괄 다운로드 결과에서 해당 지수 컬럼만 분리 (MultiIndex: 티커, 필드)
+            if isinstance(us_data.columns, pd.MultiIndex):
+                if index_symbol not in us_data.columns.get_level_values(0):
+                    print(f"⚠️ {benchmark.index_name} 데이터가 없습니다.")
+                    continue
+                df = us_data[index_symbol].copy()
+            else:
+                df = us_data.copy()
+
+            df = df[df.index >= pd.Timestamp(start_date)].dropna(how="all")
+            if df.empty:
+                print(f"⚠️ {benchmark.index_name} 데이터가 없습니다.")
+                continue
+
+            # ✅ 컬럼명 표준화 ("Adj Close" → 수정 종가, 없으면 종가 사용)
+            df = normalize_price_frame(df, YFINANCE_PRICE_COLUMNS)
 
-    else:
-        print(f"❌ 지원하지 않는 국가 코드: {country}")
-        continue
-
-    # 📌 6️⃣ 데이터베이스에 저장 (중복 확인 후 삽입)
-    for _, row in df.iterrows():
-        existing_data = (
-            session.query(BenchmarkPrice)
-            .filter_by(benchmark_id=benchmark.id, date=row["date"])
-            .first()
-        )
-        if existing_data:
-            # 기존 데이터 업데이트
-            existing_data.open_price = row["open"]
-            existing_data.high_price = row["high"]
-            existing_data.low_price = row["low"]
-            existing_data.close_price = row["close"]
-            existing_data.adjusted_close_price = row.get(
-                "adjusted_close", row["close"]
-            )  # 수정 종가가 없으면 종가 사용
-            existing_data.volume = row["volume"]
         else:
-            # 새 데이터 삽입
-            new_price = BenchmarkPrice(
-                benchmark_id=benchmark.id,
-                date=row["date"],
-                open_price=row["open"],
-                high_price=row["high"],
-                low_price=row["low"],
-                close_price=row["close"],
-                adjusted_close_price=row.get("adjusted_close", row["close"]),
-                volume=row["volume"],
-            )
-            session.add(new_price)
+            print(f"❌ 지원하지 않는 국가 코드: {country}")
+            continue
+
+        # 📌 6️⃣ 데이터베이스에 저장 (benchmark_id + date 기준 bulk upsert)
+        records = frame_to_records(df, benchmark_id=benchmark.id)
+        if store_writer is not None:
+            store_writer.add(records)
+            if PRICE_STORE_MODE == "parquet":
+                # ✅ 저장소는 기존 값과 비교하지 않으므로 기록한 전체 기간을 변경으로 기록
+                record_changes(
+                    session,
+                    "benchmark_prices",
+                    [(benchmark.id, data["date"]) for data in records],
+                )
+                session.commit()
+                log(
+                    f"✅ {benchmark.index_name} ({index_symbol}) 저장소 기록 대기",
+                    level=2,
+                )
+                continue
+
+        changed = []
+        result = bulk_upsert(
+            session,
+            BenchmarkPrice,
+            records,
+            key_columns=("benchmark_id", "date"),
+            changed_keys=changed,
+        )
+        record_changes(session, "benchmark_prices", changed)
+
+        with timer("write", table="benchmark_prices"):
+            session.commit()
+        log(
+            f"✅ {benchmark.index_name} ({index_symbol}) 데이터 저장 완료 "
+            f"(신규 {result['inserted']}, 업데이트 {result['updated']}, 동일 {result['unchanged']})",
+            level=2,
+        )
+
+    if store_writer is not None:
+        store_writer.flush()
+        compact_store("benchmark_prices")
+        print(f"🗂️ Parquet 저장소 기록 {store_writer.written}행")
+
+    print("🎉 모든 벤치마크 지수 데이터 수집 및 저장 완료!")
+    print(f"📦 {format_cache_stats()}")
+    print(format_limiter_metrics())
 
-    session.commit()
-    print(f"✅ {benchmark.index_name} ({index_symbol}) 데이터 저장 완료!")
 
-print("🎉 모든 벤치마크 지수 데이터 수집 및 저장 완료!")
+if __name__ == "__main__":
+    update_benchmark_prices()
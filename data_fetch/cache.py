@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+
+from config.settings import CACHE_DIR, CACHE_ENABLED, CACHE_MAX_MB, CACHE_TTL_HOURS
+from data_fetch.rate_limit import limited_call
+
+# ✅ provider 응답(DataFrame)을 Parquet 파일로 저장하는 디스크 캐시
+# - 파일 경로: {CACHE_DIR}/{provider}/{dataset}/{(provider, dataset, key) 해시}.parquet
+# - 유효 기간: 파일 수정 시각(mtime) 기준, 데이터셋별 TTL
+# - LRU 삭제: 캐시 적중 시 접근 시각(atime)을 갱신하고, 용량 초과 시 오래 사용하지 않은 파일부터 삭제
+# - 캐싱하지 않는 경우
+#   - 빈 / 모든 값이 결측인 응답: yfinance는 요청 제한에 걸리면 예외 대신 빈 프레임을 반환하므로
+#     저장하면 같은 날 재실행 / retry_failed 실행이 다시 수집하지 않고 빈 결과를 받게 됨
+#   - 오늘(또는 그 이후)까지 포함하는 기간 (key의 end / date, end=None은 오늘까지):
+#     장중에 받은 오늘 봉이 TTL 동안 재사용되지 않도록 항상 provider 호출
+
+
+def _key_date(value):
+    """캐시 key의 날짜 값 (date / datetime / "YYYY-MM-DD" / "YYYYMMDD") → date (해석할 수 없으면 None)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).replace("-", "")[:8], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def includes_today(key, today=None):
+    """key의 기간(end / date)이 오늘 이후까지 포함하는지 (end가 None이면 오늘까지)"""
+    if not isinstance(key, dict):
+        return False
+    today = today or date.today()
+    for name in ("end", "date"):
+        if name not in key:
+            continue
+        day = today if key[name] is None else _key_date(key[name])
+        if day is not None and day >= today:
+            return True
+    return False
+
+
+def is_empty_frame(frame):
+    """행이 없거나 모든 값이 결측인 DataFrame"""
+    return frame.empty or bool(frame.isna().to_numpy().all())
+
+
+class ProviderCache:
+    """provider 응답 DataFrame을 Parquet으로 캐싱 (TTL + 용량 제한 LRU + 적중/실패 카운터)"""
+
+    def __init__(self, cache_dir=None, max_bytes=None, ttl_hours=None, enabled=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else CACHE_MAX_MB * 1024 * 1024
+        )
+        self.ttl_hours = dict(CACHE_TTL_HOURS if ttl_hours is None else ttl_hours)
+        self.enabled = CACHE_ENABLED if enabled is None else enabled
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """적중/실패 카운터와 적중률 반환"""
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def path_for(self, provider, dataset, key):
+        """(provider, dataset, key) 조합에 해당하는 캐시 파일 경로"""
+        payload = json.dumps([provider, dataset, key], sort_keys=True, default=str)
+        digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, provider, dataset, f"{digest}.parquet")
+
+    def get(self, provider, dataset, key):
+        """유효 기간 안의 캐시가 있으면 DataFrame, 없으면 None 반환"""
+        import pandas as pd
+
+        if not self.enabled:
+            return None
+
+        path = self.path_for(provider, dataset, key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+
+        # ✅ TTL이 지난 파일은 삭제하고 실패로 처리
+        ttl_hours = self.ttl_hours.get(dataset)
+        now = time.time()
+        if ttl_hours is not None and now - stat.st_mtime > ttl_hours * 3600:
+            self._remove(path, stat.st_size)
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        try:
+            frame = pd.read_parquet(path)
+        except Exception as e:
+            print(f"⚠️ 캐시 파일 읽기 실패 (삭제 후 다시 수집): {path} ({e})")
+            self._remove(path, stat.st_size)
+            self._count("misses")
+            return None
+
+        # ✅ LRU 순서를 위해 접근 시각만 갱신 (mtime은 TTL 기준이므로 유지)
+        try:
+            os.utime(path, (now, stat.st_mtime))
+        except OSError:
+            pass
+        self._count("hits")
+        return frame
+
+    def put(self, provider, dataset, key, frame):
+        """DataFrame을 캐시에 저장 (임시 파일에 쓴 뒤 교체하여 동시 읽기와 충돌 방지)"""
+        if not self.enabled:
+            return
+
+        path = self.path_for(provider, dataset, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            frame.to_parquet(tmp_path)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ 캐시 저장 실패 ({provider}/{dataset}): {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._count("writes")
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size - previous
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def get_or_fetch(self, provider, dataset, key, fetch_fn):
+        """
+        캐시에 있으면 캐시 데이터를, 없으면 fetch_fn() 결과를 저장 후 반환
+        - DataFrame이 아닌 결과(None 등), 빈 / 모든 값이 결측인 DataFrame과 예외는 캐싱하지 않음
+        - 오늘까지 포함하는 기간은 캐시를 거치지 않고 항상 fetch_fn() 호출
+        """
+        import pandas as pd
+
+        if includes_today(key):
+            return fetch_fn()
+
+        frame = self.get(provider, dataset, key)
+        if frame is not None:
+            return frame
+
+        frame = fetch_fn()
+        if isinstance(frame, pd.DataFrame) and not is_empty_frame(frame):
+            self.put(provider, dataset, key, frame)
+        return frame
+
+    def _files(self):
+        """캐시 디렉터리의 (경로, stat) 목록"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    files.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    continue
+        return files
+
+    def _scan_size(self):
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _remove(self, path, size):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def evict(self):
+        """용량 제한을 넘으면 마지막 접근 시각(atime)이 오래된 파일부터 삭제"""
+        files = sorted(self._files(), key=lambda item: item[1].st_atime)
+        total = sum(stat.st_size for _, stat in files)
+        with self._lock:
+            self._total_bytes = total
+
+        for path, stat in files:
+            if total <= self.max_bytes:
+                break
+            self._remove(path, stat.st_size)
+            total -= stat.st_size
+            self._count("evictions")
+
+    def clear(self):
+        """캐시 파일 전체 삭제"""
+        for path, stat in self._files():
+            self._remove(path, stat.st_size)
+        with self._lock:
+            self._total_bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 공용 캐시 인스턴스 (최초 사용 시 생성)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProviderCache()
+        return _cache
+
+
+def cached_frame(provider, dataset, key, fetch_fn, rate_limited=True, retries=None):
+    """
+    provider 호출 결과를 공용 디스크 캐시로 감싸서 반환
+    :param provider: 데이터 제공처 (예: "yfinance", "pykrx", "dart", "krx")
+    :param dataset: 데이터셋 이름 (CACHE_TTL_HOURS의 키, 예: "ohlcv")
+    :param key: 요청을 구분하는 값 (종목, 기간, 파라미터 등 JSON 직렬화 가능한 dict)
+    :param fetch_fn: 캐시가 없을 때 호출할 함수 (인자 없음, DataFrame 반환)
+    :param rate_limited: True면 캐시가 없을 때 provider 요청 제한을 거쳐 fetch_fn 호출
+        (fetch_fn 안에서 요청마다 직접 limited_call을 사용하는 경우 False)
+    :param retries: 스로틀링 / 일시적 오류 재시도 횟수 (None이면 limiter 기본값)
+    """
+    if rate_limited:
+        return get_cache().get_or_fetch(
+            provider,
+            dataset,
+            key,
+            lambda: limited_call(provider, fetch_fn, retries=retries),
+        )
+    return get_cache().get_or_fetch(provider, dataset, key, fetch_fn)
+
+
+def format_cache_stats(stats=None):
+    """캐시 카운터를 한 줄 요약 문자열로 변환"""
+    stats = stats or get_cache().stats()
+    return (
+        f"캐시 적중 {stats['hits']}, 실패 {stats['misses']} "
+        f"(만료 {stats['expired']}), 저장 {stats['writes']}, 삭제 {stats['evictions']}, "
+        f"적중률 {stats['hit_rate']:.1%}"
+    )
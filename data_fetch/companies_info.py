@@ -1,28 +1,42 @@
 import os
-import pandas as pd
-import yfinance as yf
-from pykrx import stock
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from database.models import Base, Company, BenchmarkIndex
-from config.db_config import get_db_url
+import threading
+import time
+from datetime import date
+from functools import lru_cache
 
-# ✅ 데이터베이스 연결
-db_url = get_db_url()
-engine = create_engine(db_url)
-Session = sessionmaker(bind=engine)
-session = Session()
+from sqlalchemy import update
 
-# ✅ `data/` 폴더 확인 및 생성
-os.makedirs("data", exist_ok=True)
+from database.change_log import record_changes
+from database.models import Company, BenchmarkIndex
+from database.db_connection import get_session
+from database.upsert import bulk_upsert
+from data_fetch.pipeline import run_pipeline
+from data_fetch.rate_limit import format_limiter_metrics, limited_call
+from config.settings import (
+    COMPANY_COMMIT_SIZE,
+    METADATA_PROGRESS_EVERY,
+    METADATA_WORKERS,
+)
 
-# ✅ 벤치마크 ID 가져오기
-benchmark_map = {b.index_symbol: b.id for b in session.query(BenchmarkIndex).all()}
+# ✅ yfinance / pykrx는 import 비용이 크므로 실제로 요청하는 함수 안에서 불러옴
+
+
+# ✅ 벤치마크 ID 가져오기 (최초 사용 시 한 번만 조회)
+@lru_cache(maxsize=1)
+def get_benchmark_map():
+    """{지수 티커: 벤치마크 ID} 매핑 반환"""
+    session = get_session()
+    try:
+        return {b.index_symbol: b.id for b in session.query(BenchmarkIndex).all()}
+    finally:
+        session.close()
 
 
 # ✅ NaN 값을 None으로 변환하는 함수 + 불필요한 Symbol 필터링 추가
 def clean_value(value, check_symbol=False):
     """NaN, 'nan', None, 빈 문자열을 None으로 변환하고, 심볼에 '.' 또는 '$'가 포함되면 제외"""
+    import pandas as pd
+
     if pd.isna(value) or value in ["nan", "None", "", None]:
         return None
 
@@ -37,9 +51,12 @@ def clean_value(value, check_symbol=False):
 # ✅ 벤치마크별 티커 리스트 로드
 def load_ticker_list(filename, symbol_col="Symbol"):
     """각 벤치마크별 티커 리스트를 로드하여 {Symbol: Sector} 형태로 반환"""
+    import pandas as pd
+
     filepath = f"data/{filename}"
     if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
+        # ✅ 한국 종목코드(005930 등)의 앞자리 0이 사라지지 않도록 문자열로 로드
+        df = pd.read_csv(filepath, dtype=str)
 
         # ✅ NYSE의 경우, "ACT Symbol" 컬럼을 사용
         if "ACT Symbol" in df.columns:
@@ -50,51 +67,71 @@ def load_ticker_list(filename, symbol_col="Symbol"):
             print(f"⚠️ {filename} 파일에서 '{symbol_col}' 컬럼을 찾을 수 없음.")
             return {}
 
-        # ✅ NaN 값 제거 후 Symbol & Sector 추출
-        df = df.dropna(subset=[symbol_col])  # ✅ NaN이 있는 행 제거
-        return {
-            clean_value(row[symbol_col], check_symbol=True): clean_value(
-                row.get("Sector", "")
-            )
-            for _, row in df.iterrows()
-            if clean_value(row[symbol_col], check_symbol=True)
-        }
+        # ✅ 컬럼 단위로 Symbol / Sector 정리 (NaN, 'nan', 'None', 빈 문자열 → None)
+        symbols = df[symbol_col]
+        sectors = (
+            df["Sector"]
+            if "Sector" in df.columns
+            else pd.Series(None, index=df.index, dtype=object)
+        )
+        invalid = ["", "nan", "None"]
+        sectors = sectors.astype(object).where(
+            ~sectors.isin(invalid) & sectors.notna(), None
+        )
+
+        # ✅ 비어 있거나 '.', '$'가 포함된 Symbol 제외
+        valid = symbols.notna() & ~symbols.isin(invalid)
+        special = valid & symbols.str.contains(r"[.$]", regex=True, na=False)
+        if special.any():
+            print(f"⏭️ {filename}: 특수 문자 포함 Symbol {int(special.sum())}개 스킵")
+
+        mask = valid & ~special
+        return dict(zip(symbols[mask], sectors[mask]))
     return {}
 
 
-# ✅ 티커 리스트 로드
-sp500_tickers = load_ticker_list("sp500_tickers.csv")
-nasdaq_tickers = load_ticker_list("nasdaq_tickers.csv")
-nyse_tickers = load_ticker_list("nyse_tickers.csv", symbol_col="ACT Symbol")
-kospi_tickers = load_ticker_list("kospi_tickers.csv")
-kosdaq_tickers = load_ticker_list("kosdaq_tickers.csv")
+# ✅ 티커 리스트 로드 (최초 사용 시 한 번만 CSV를 읽음)
+@lru_cache(maxsize=1)
+def get_ticker_lists():
+    """벤치마크별 {Symbol: Sector} 딕셔너리 반환"""
+    return {
+        "sp500": load_ticker_list("sp500_tickers.csv"),
+        "nasdaq": load_ticker_list("nasdaq_tickers.csv"),
+        "nyse": load_ticker_list("nyse_tickers.csv", symbol_col="ACT Symbol"),
+        "kospi": load_ticker_list("kospi_tickers.csv"),
+        "kosdaq": load_ticker_list("kosdaq_tickers.csv"),
+    }
 
 
 # ✅ 벤치마크 매핑 함수
 def get_benchmark_id(symbol):
     """기업의 벤치마크 ID를 반환 (우선순위: S&P 500 > NASDAQ > NYSE > KOSPI > KOSDAQ)"""
-    if symbol in sp500_tickers:
+    tickers = get_ticker_lists()
+    benchmark_map = get_benchmark_map()
+    if symbol in tickers["sp500"]:
         return benchmark_map.get("^GSPC")
-    elif symbol in nasdaq_tickers:
+    elif symbol in tickers["nasdaq"]:
         return benchmark_map.get("^IXIC")
-    elif symbol in nyse_tickers:
+    elif symbol in tickers["nyse"]:
         return benchmark_map.get("^NYA")
-    elif symbol in kospi_tickers:
+    elif symbol in tickers["kospi"]:
         return benchmark_map.get("1001")  # KOSPI
-    elif symbol in kosdaq_tickers:
+    elif symbol in tickers["kosdaq"]:
         return benchmark_map.get("2001")  # KOSDAQ
     return None
 
 
 # ✅ 미국 주식 정보 수집 (yfinance)
 def fetch_us_stock_info(symbol):
-    """yfinance를 활용하여 미국 주식 정보를 가져오기"""
+    """yfinance를 활용하여 미국 주식 정보를 가져오기 (요청 제한 + 스로틀링 시 재시도)"""
+    import yfinance as yf
+
     symbol = clean_value(symbol, check_symbol=True)
     if symbol is None:
         return None  # ✅ symbol이 없거나 필터링 대상이면 건너뜀
 
     try:
-        stock_data = yf.Ticker(symbol).info
+        stock_data = limited_call("yfinance", lambda: yf.Ticker(symbol).info)
         return {
             "symbol": symbol,
             "name": clean_value(
@@ -103,23 +140,45 @@ def fetch_us_stock_info(symbol):
             "sector": clean_value(stock_data.get("sector", "")),  # ✅ NaN 처리
             "country": "US",
             "benchmark_id": get_benchmark_id(symbol),
+            "shares_outstanding": clean_value(stock_data.get("sharesOutstanding")),
         }
     except Exception as e:
         print(f"⚠️ {symbol} 정보 조회 실패: {e}")
         return None
 
 
+# ✅ 한국 상장주식수 (전 종목을 한 번의 요청으로 조회)
+@lru_cache(maxsize=1)
+def get_kr_shares_outstanding():
+    """최근 거래일 기준 {종목코드: 상장주식수}"""
+    import pandas as pd
+    from pykrx import stock
+
+    day = limited_call("pykrx", stock.get_nearest_business_day_in_a_week)
+    frame = limited_call("pykrx", lambda: stock.get_market_cap(day, market="ALL"))
+    if frame is None or frame.empty or "상장주식수" not in frame:
+        return {}
+    return {
+        symbol: int(shares)
+        for symbol, shares in frame["상장주식수"].items()
+        if pd.notna(shares)
+    }
+
+
 # ✅ 한국 주식 정보 수집 (pykrx)
 def fetch_korean_stock_info(symbol):
     """pykrx를 활용하여 한국 주식 정보를 가져오기"""
+    from pykrx import stock
+
     symbol = clean_value(symbol, check_symbol=True)
     if symbol is None:
         return None  # ✅ symbol이 없거나 필터링 대상이면 건너뜀
 
     try:
-        name = stock.get_market_ticker_name(symbol)
+        name = limited_call("pykrx", lambda: stock.get_market_ticker_name(symbol))
+        tickers = get_ticker_lists()
         sector = clean_value(
-            kospi_tickers.get(symbol, "") or kosdaq_tickers.get(symbol, "")
+            tickers["kospi"].get(symbol, "") or tickers["kosdaq"].get(symbol, "")
         )  # ✅ CSV에서 업종 가져오기
         return {
             "symbol": symbol,
@@ -127,69 +186,230 @@ def fetch_korean_stock_info(symbol):
             "sector": sector,
             "country": "KR",
             "benchmark_id": get_benchmark_id(symbol),
+            "shares_outstanding": get_kr_shares_outstanding().get(symbol),
         }
     except Exception as e:
         print(f"⚠️ {symbol} 정보 조회 실패: {e}")
         return None
 
 
+# ✅ 기존 종목 조회 (한 번의 쿼리로 전체 symbol 로드)
+def get_existing_symbols(session):
+    """`companies` 테이블에 등록된 symbol 집합 반환"""
+    return {symbol for (symbol,) in session.query(Company.symbol)}
+
+
+def is_valid_company(company_data):
+    """symbol과 벤치마크 ID가 있는 기업 정보만 저장 대상"""
+    return bool(
+        company_data and company_data["symbol"] and company_data["benchmark_id"]
+    )
+
+
 # ✅ 기업 정보를 DB에 저장
-def save_company_info(company_data):
-    """기업 정보를 `companies` 테이블에 저장"""
-    if (
-        not company_data
-        or not company_data["symbol"]
-        or not company_data["benchmark_id"]
-    ):
+def save_companies(session, companies):
+    """
+    여러 기업 정보를 `companies` 테이블에 symbol 기준 bulk upsert 후 커밋
+    (실패하면 세션을 롤백한 뒤 예외를 그대로 전달)
+    :return: {"inserted": int, "updated": int, "unchanged": int}
+    """
+    valid = []
+    for company_data in companies:
+        if is_valid_company(company_data):
+            valid.append(company_data)
+        else:
+            print(f"⚠️ 벤치마크 ID가 없어 저장하지 않음: {company_data}")
+
+    try:
+        result = bulk_upsert(
+            session,
+            Company,
+            valid,
+            key_columns=("symbol",),
+            update_columns=(
+                "name",
+                "sector",
+                "country",
+                "benchmark_id",
+                "shares_outstanding",
+            ),
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return result
+
+
+def save_company_info(session, company_data):
+    """기업 정보 한 건을 `companies` 테이블에 저장"""
+    if not is_valid_company(company_data):
         print(f"⚠️ 벤치마크 ID가 없어 저장하지 않음: {company_data}")
         return
 
-    # ✅ 기존 데이터 확인
-    existing_company = (
-        session.query(Company).filter_by(symbol=company_data["symbol"]).first()
-    )
-    if existing_company:
-        # ✅ 기존 데이터 업데이트
-        existing_company.name = company_data["name"]
-        existing_company.sector = company_data["sector"]
-        existing_company.benchmark_id = company_data["benchmark_id"]
-    else:
-        # ✅ 새로운 데이터 삽입
-        new_company = Company(**company_data)
-        session.add(new_company)
-
-    session.commit()
+    save_companies(session, [company_data])
     print(f"✅ {company_data['symbol']} ({company_data['name']}) 저장 완료!")
 
 
+def register_companies(session, symbols, fetch_info, commit_size=None, workers=None):
+    """
+    신규 종목 정보를 워커 풀로 동시에 수집하여 commit_size 건마다 bulk upsert + 커밋
+    :param symbols: 등록할 종목 목록 (이미 존재하는 종목은 제외된 상태)
+    :param fetch_info: symbol → 기업 정보 dict (실패 시 None)
+    :param workers: 동시에 정보를 조회할 워커 수 (기본값: METADATA_WORKERS)
+    :return: 저장된 기업 수
+    """
+    commit_size = commit_size or COMPANY_COMMIT_SIZE
+    symbols = list(symbols)
+    pending = []
+    progress = {"done": 0, "found": 0, "saved": 0, "failed": 0}
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def report():
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(
+            f"📈 {progress['done']}/{len(symbols)} 조회 "
+            f"(성공 {progress['found']}, 저장 {progress['saved']}, 저장 실패 {progress['failed']}) "
+            f"{progress['done'] / elapsed:.1f}건/초"
+        )
+
+    def fetch(symbol):
+        company_data = fetch_info(symbol)
+        with lock:
+            progress["done"] += 1
+            progress["found"] += company_data is not None
+            if progress["done"] % METADATA_PROGRESS_EVERY == 0:
+                report()
+        return [(symbol, company_data)] if company_data else []
+
+    def flush():
+        # ✅ 배치 저장이 실패해도 (롤백된) 세션과 비운 pending으로 다음 배치를 계속 저장
+        try:
+            result = save_companies(session, pending)
+        except Exception as e:
+            print(f"❌ 기업 정보 {len(pending)}건 저장 실패: {e}")
+            with lock:
+                progress["failed"] += len(pending)
+        else:
+            with lock:
+                progress["saved"] += result["inserted"] + result["updated"]
+        finally:
+            pending.clear()
+
+    # ✅ writer 워커는 1개만 사용 (세션을 한 스레드에서만 사용)
+    def save(symbol, company_data):
+        pending.append(company_data)
+        if len(pending) >= commit_size:
+            flush()
+        return company_data
+
+    run_pipeline(
+        symbols, fetch, save, fetch_workers=workers or METADATA_WORKERS, write_workers=1
+    )
+    if pending:
+        flush()
+    report()
+    return progress["saved"]
+
+
 # ✅ 전체 주식 리스트 가져오기
 def process_all_companies():
     """미국 & 한국 주식 데이터를 모두 가져와서 DB에 저장"""
-    # ✅ 미국 주식 처리 (S&P 500, NASDAQ, NYSE)
-    us_tickers = (
-        set(sp500_tickers.keys())
-        | set(nasdaq_tickers.keys())
-        | set(nyse_tickers.keys())
-    )
-    for symbol in us_tickers:
-        if session.query(Company).filter_by(symbol=symbol).first():
-            print(f"⏭️ {symbol} 이미 존재: 스킵")
-            continue  # ✅ 이미 존재하는 경우 스킵
-        company_data = fetch_us_stock_info(symbol)
-        if company_data:
-            save_company_info(company_data)
-
-    # ✅ 한국 주식 처리 (KOSPI, KOSDAQ)
-    kr_tickers = set(kospi_tickers.keys()) | set(kosdaq_tickers.keys())
-    for symbol in kr_tickers:
-        if session.query(Company).filter_by(symbol=symbol).first():
-            print(f"⏭️ {symbol} 이미 존재: 스킵")
-            continue  # ✅ 이미 존재하는 경우 스킵
-        company_data = fetch_korean_stock_info(symbol)
-        if company_data:
-            save_company_info(company_data)
+    tickers = get_ticker_lists()
+    session = get_session()
+    try:
+        # ✅ 이미 등록된 종목은 한 번에 조회해서 제외
+        existing = get_existing_symbols(session)
+
+        # ✅ 미국 주식 처리 (S&P 500, NASDAQ, NYSE)
+        us_tickers = (
+            set(tickers["sp500"].keys())
+            | set(tickers["nasdaq"].keys())
+            | set(tickers["nyse"].keys())
+        )
+        new_us = sorted(us_tickers - existing)
+        print(
+            f"🇺🇸 미국 종목 {len(us_tickers)}개 중 신규 {len(new_us)}개 "
+            f"(기존 {len(us_tickers) - len(new_us)}개 스킵)"
+        )
+        register_companies(session, new_us, fetch_us_stock_info)
+
+        # ✅ 한국 주식 처리 (KOSPI, KOSDAQ)
+        kr_tickers = set(tickers["kospi"].keys()) | set(tickers["kosdaq"].keys())
+        new_kr = sorted(kr_tickers - existing)
+        print(
+            f"🇰🇷 한국 종목 {len(kr_tickers)}개 중 신규 {len(new_kr)}개 "
+            f"(기존 {len(kr_tickers) - len(new_kr)}개 스킵)"
+        )
+        register_companies(session, new_kr, fetch_korean_stock_info)
+    finally:
+        session.close()
+    print(format_limiter_metrics())
+
+
+# ✅ 기존 종목의 상장주식수 갱신 (시가총액 / 밸류에이션 계산용)
+def update_shares_outstanding(workers=None):
+    """
+    등록된 전체 종목의 상장주식수를 다시 조회해서 변경된 값만 갱신
+    - 한국: 전 종목 1회 요청 / 미국: 종목별 yfinance info를 워커 풀로 동시 조회
+    :return: 갱신된 기업 수
+    """
+    import yfinance as yf
+
+    session = get_session()
+    try:
+        companies = session.query(
+            Company.id, Company.symbol, Company.country, Company.shares_outstanding
+        ).all()
+        current = {company.id: company.shares_outstanding for company in companies}
+        shares = {}
+
+        kr_shares = get_kr_shares_outstanding()
+        for company in companies:
+            if company.country == "KR" and company.symbol in kr_shares:
+                shares[company.id] = kr_shares[company.symbol]
+
+        def fetch(company):
+            try:
+                info = limited_call("yfinance", lambda: yf.Ticker(company.symbol).info)
+            except Exception as e:
+                print(f"⚠️ {company.symbol} 상장주식수 조회 실패: {e}")
+                return []
+            value = clean_value(info.get("sharesOutstanding"))
+            return [(company.id, int(value))] if value else []
+
+        def save(company_id, value):
+            shares[company_id] = value
+            return value
+
+        run_pipeline(
+            [company for company in companies if company.country == "US"],
+            fetch,
+            save,
+            fetch_workers=workers or METADATA_WORKERS,
+            write_workers=1,
+        )
+
+        changed = [
+            {"id": company_id, "shares_outstanding": value}
+            for company_id, value in shares.items()
+            if current.get(company_id) != value
+        ]
+        today = date.today()
+        for start in range(0, len(changed), COMPANY_COMMIT_SIZE):
+            batch = changed[start : start + COMPANY_COMMIT_SIZE]
+            session.execute(update(Company), batch)
+            # ✅ 시가총액 / 배수를 다시 계산하도록 변경 이력 기록
+            record_changes(session, "companies", [(row["id"], today) for row in batch])
+            session.commit()
+    finally:
+        session.close()
+    print(f"✅ 상장주식수 갱신: {len(changed)}개 기업 (조회 {len(shares)}개)")
+    return len(changed)
 
 
 if __name__ == "__main__":
     process_all_companies()
+    update_shares_outstanding()
     print("🎉 모든 기업 정보 저장 완료!")
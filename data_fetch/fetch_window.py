@@ -0,0 +1,23 @@
+from datetime import date, datetime, timedelta
+
+from config.settings import BACKFILL_YEARS, INCREMENTAL_OVERLAP_DAYS, INCREMENTAL_UPDATE
+
+
+def get_fetch_start_date(latest_date=None, today=None):
+    """
+    수집 시작일 계산
+    - 저장된 데이터가 없는 신규 종목: 전체 기간(BACKFILL_YEARS) 수집
+    - 기존 종목: 마지막 저장일 - 겹침 기간(INCREMENTAL_OVERLAP_DAYS)부터 수집
+    """
+    today = today or datetime.today().date()
+    backfill_start = today - timedelta(days=BACKFILL_YEARS * 365)
+
+    if not INCREMENTAL_UPDATE or latest_date is None:
+        return backfill_start
+
+    if isinstance(latest_date, datetime):
+        latest_date = latest_date.date()
+    elif not isinstance(latest_date, date):
+        latest_date = datetime.strptime(str(latest_date)[:10], "%Y-%m-%d").date()
+
+    return max(backfill_start, latest_date - timedelta(days=INCREMENTAL_OVERLAP_DAYS))
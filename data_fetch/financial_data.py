@@ -1,38 +1,162 @@
 import os
-import pandas as pd
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from database.models import FinancialStatement, Company
-from config.db_config import get_db_url
-
-# 재무 데이터 수집 api
-import yfinance as yf
-from pykrx import stock
-from dart_fss import get_corp_list
+import re
+import sys
+from datetime import date
+from functools import lru_cache
 
-# ✅ 데이터베이스 연결 설정
-engine = create_engine(get_db_url())
-Session = sessionmaker(bind=engine)
-session = Session()
+from database.models import FinancialStatement, Company
+from database.change_log import record_changes
+from database.db_connection import get_session
+from database.upsert import bulk_upsert
+from data_fetch.cache import cached_frame
+from data_fetch.rate_limit import limited_call
+from data_fetch.run_journal import RunJournal
+from config.settings import DART_PERSIST_STATEMENTS
+from monitoring.metrics import count, log, reset_metrics, timer, write_metrics
+
+# ✅ 재무 데이터 수집 api (yfinance, pykrx, dart_fss)와 pandas는 import 비용이 크므로
+#    실제로 요청하는 함수 안에서 불러옴
 
 # ✅ DART API 키 설정
 DART_API_KEY = os.getenv("DART_API_KEY", "")
-corp_list = get_corp_list(api_key=DART_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def get_dart_corp_list():
+    """DART 기업 목록 (대용량 다운로드/파싱이므로 최초 사용 시 한 번만 불러옴)"""
+    from dart_fss import get_corp_list
+
+    return limited_call("dart", lambda: get_corp_list(api_key=DART_API_KEY))
+
+
+@lru_cache(maxsize=None)
+def find_dart_corp(symbol):
+    """종목코드 → DART 기업 (실행 중 종목당 한 번만 검색, 없으면 None)"""
+    return get_dart_corp_list().find_by_stock_code(symbol)
+
+
+# ✅ DART 재무제표 종류 (재무상태표, 손익계산서, 포괄손익계산서, 현금흐름표)
+_DART_STATEMENT_TYPES = ("bs", "is", "cis", "cf")
+
+
+def statements_frame(fs):
+    """
+    dart_fss 재무제표 추출 결과 → (보고서 기준일 "YYYY-MM-DD" × 계정명) DataFrame
+    - 재무제표 종류별 표를 계정명(label_ko) 컬럼으로 합침 (같은 계정명은 앞선 표의 값 사용)
+    - 기간 컬럼("20230101-20231231")은 종료일, 시점 컬럼("20231231")은 그 날짜가 기준일
+    """
+    import pandas as pd
+
+    if fs is None or isinstance(fs, pd.DataFrame):
+        return fs
+
+    parts = []
+    for statement_type in _DART_STATEMENT_TYPES:
+        table = fs[statement_type]
+        if table is None or table.empty:
+            continue
+        label = next((c for c in table.columns if c[-1] == "label_ko"), None)
+        if label is None:
+            continue
+        values = {}
+        for column in table.columns:
+            period = str(column[0])
+            if re.fullmatch(r"\d{8}(-\d{8})?", period) and period[-8:] not in values:
+                values[period[-8:]] = pd.to_numeric(
+                    table[column], errors="coerce"
+                ).to_numpy()
+        part = pd.DataFrame(values, index=table[label].str.strip().tolist()).T
+        parts.append(part.loc[:, ~part.columns.duplicated()])
+
+    if not parts:
+        return pd.DataFrame()
+    frame = pd.concat(parts, axis=1)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    frame.index = pd.to_datetime(frame.index, format="%Y%m%d").strftime("%Y-%m-%d")
+    return frame.sort_index()
+
+
+def extract_kr_statements(corp, today=None):
+    """
+    DART 연간 재무제표 5년치 추출 (statements_frame() 형태)
+    - DART_PERSIST_STATEMENTS가 켜져 있으면 (corp_code, 직전 회계연도) 기준으로 디스크 캐시
+      → 해가 바뀌면 키가 바뀌어 다시 추출, 같은 해 안의 새 공시는 statements TTL이 지나면 반영
+    """
+
+    def extract():
+        return statements_frame(
+            limited_call("dart", lambda: corp.extract_fs(report_tp="annual", year=5))
+        )
+
+    if not DART_PERSIST_STATEMENTS:
+        return extract()
+    fiscal_year = (today or date.today()).year - 1
+    return cached_frame(
+        "dart",
+        "statements",
+        {
+            "corp_code": corp.corp_code,
+            "fiscal_year": fiscal_year,
+            "report_tp": "annual",
+        },
+        extract,
+        rate_limited=False,  # extract()가 직접 요청 제한을 거침
+    )
+
+
+@lru_cache(maxsize=128)
+def get_kr_statements(symbol):
+    """
+    종목의 DART 연간 재무제표 (실행 중 종목당 한 번만 추출)
+    fetch_kr_financials → fetch_kr_dividend_payout_ratio → fetch_kr_net_income 이
+    같은 재무제표를 공유하도록 메모이제이션 (기업이 없으면 None)
+    """
+    corp = find_dart_corp(symbol)
+    if corp is None:
+        return None
+    return extract_kr_statements(corp)
+
+
+def clear_run_caches():
+    """실행 단위 메모이제이션 초기화 (같은 프로세스의 다음 실행이 이전 실행의 DART 결과를 쓰지 않도록)"""
+    for cached in (get_dart_corp_list, find_dart_corp, get_kr_statements):
+        cached.cache_clear()
 
 
 def fetch_us_financials(symbol):
     """미국 주식의 5년 치 연간 재무 데이터(yfinance 사용)"""
+    import pandas as pd
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(symbol)
-        financials = stock.financials.T  # 연간 손익계산서
-        balance_sheet = stock.balance_sheet.T  # 연간 대차대조표
-        cashflow = stock.cashflow.T  # 연간 현금흐름표
+
+        # ✅ 연간 재무제표 (전치 후 캐싱: 날짜 인덱스, 항목명 컬럼)
+        def statement(name):
+            return cached_frame(
+                "yfinance",
+                "financials",
+                {"symbol": symbol, "statement": name},
+                lambda: getattr(stock, name).T,
+            )
+
+        financials = statement("financials")  # 연간 손익계산서
+        balance_sheet = statement("balance_sheet")  # 연간 대차대조표
+        cashflow = statement("cashflow")  # 연간 현금흐름표
 
         # ✅ 5년치 연간 데이터만 선택
         report_dates = financials.index.astype(str)[-5:]  # 최신 5개 연도 선택
 
         # ✅ 배당성향 (payoutRatio) 가져오기
-        dividend_payout_ratio = stock.info.get("payoutRatio", None)
+        info = cached_frame(
+            "yfinance",
+            "financials",
+            {"symbol": symbol, "statement": "payout_ratio"},
+            lambda: pd.DataFrame({"payoutRatio": [stock.info.get("payoutRatio")]}),
+        )
+        dividend_payout_ratio = info["payoutRatio"].iloc[0]
+        if pd.isna(dividend_payout_ratio):
+            dividend_payout_ratio = None
         if dividend_payout_ratio is not None:
             dividend_payout_ratio = round(
                 float(dividend_payout_ratio) * 100, 2
@@ -68,6 +192,13 @@ def fetch_us_financials(symbol):
                 cashflow.get("Operating Cash Flow", {}).get(report_date)
             )
 
+            # ✅ 설비투자 (yfinance는 음수로 제공 → 절댓값으로 저장)
+            capital_expenditure = clean_value(
+                cashflow.get("Capital Expenditure", {}).get(report_date)
+            )
+            if capital_expenditure is not None:
+                capital_expenditure = abs(capital_expenditure)
+
             net_income = clean_value(financials.get("Net Income", {}).get(report_date))
             operating_income = clean_value(
                 financials.get("Operating Income", {}).get(report_date)
@@ -119,13 +250,14 @@ def fetch_us_financials(symbol):
                             )
                         ),
                         "operating_cash_flow": operating_cash_flow,
+                        "capital_expenditure": capital_expenditure,
                         "dividend_payout_ratio": dividend_payout_ratio,
                         "ebitda": ebitda,
                     }
                 )
         return data
     except Exception as e:
-        print(f"❌ {symbol} 재무 데이터 수집 실패: {e}")
+        log(f"❌ {symbol} 재무 데이터 수집 실패: {e}")
         return None
 
 
@@ -137,13 +269,11 @@ def fetch_kr_net_income(symbol, report_date):
     :return: 당기순이익 (Net Income) or None
     """
     try:
-        corp = corp_list.find_by_stock_code(symbol)
-        if corp is None:
+        fs = get_kr_statements(symbol)  # 5년치 데이터 (실행 중 한 번만 추출)
+        if fs is None:
             print(f"⚠️ {symbol} 기업을 찾을 수 없음")
             return None
 
-        fs = corp.extract_fs(report_tp="annual", year=5)  # 5년치 데이터
-
         if report_date in fs.index:
             return fs.loc[report_date, "당기순이익"] if "당기순이익" in fs else None
         else:
@@ -155,13 +285,20 @@ def fetch_kr_net_income(symbol, report_date):
 
 def fetch_kr_dividend_payout_ratio(symbol, report_date):
     """한국 주식의 배당성향을 pykrx와 DART 데이터를 활용하여 계산"""
+    from pykrx import stock
+
     try:
         year = report_date[:4]
         start_date = f"{year}0101"
         end_date = f"{year}1231"
 
         # 📌 배당금 데이터 조회 (연간 기준)
-        df = stock.get_market_dividend_by_date(start_date, end_date, symbol)
+        df = cached_frame(
+            "pykrx",
+            "dividends",
+            {"symbol": symbol, "start": start_date, "end": end_date},
+            lambda: stock.get_market_dividend_by_date(start_date, end_date, symbol),
+        )
         if df.empty:
             return None
 
@@ -181,13 +318,11 @@ def fetch_kr_dividend_payout_ratio(symbol, report_date):
 def fetch_kr_financials(symbol):
     """한국 주식의 5년 치 재무 데이터(DART API + pykrx 활용)"""
     try:
-        corp = corp_list.find_by_stock_code(symbol)
-        if corp is None:
+        fs = get_kr_statements(symbol)
+        if fs is None:
             print(f"⚠️ {symbol} 기업을 찾을 수 없음")
             return None
 
-        fs = corp.extract_fs(report_tp="annual", year=5)
-
         data = []
         for report_date in fs.index.astype(str):
             net_income = (
@@ -252,64 +387,111 @@ def fetch_kr_financials(symbol):
                         if "영업활동현금흐름" in fs
                         else None
                     ),
+                    "capital_expenditure": (
+                        abs(fs.loc[report_date, "유형자산의취득"])
+                        if "유형자산의취득" in fs
+                        else None
+                    ),
                     "dividend_payout_ratio": dividend_payout_ratio,
                     "ebitda": ebitda,
                 }
             )
         return data
     except Exception as e:
-        print(f"❌ {symbol} 재무 데이터 수집 실패: {e}")
+        log(f"❌ {symbol} 재무 데이터 수집 실패: {e}")
         return None
 
 
 def save_financial_data(company_id, financial_data):
-    """재무 데이터를 저장"""
-    session = Session()
-    try:
-        for data in financial_data:
-            existing_entry = (
-                session.query(FinancialStatement)
-                .filter_by(company_id=company_id, report_date=data["report_date"])
-                .first()
-            )
-
-            if existing_entry:
-                print(
-                    f"⚠️ {company_id} {data['report_date']} 기존 데이터 존재, 업데이트 안함"
-                )
-            else:
-                new_entry = FinancialStatement(company_id=company_id, **data)
-                session.add(new_entry)
+    """
+    재무 데이터를 (company_id, report_date) 기준 bulk upsert로 저장
+    (정정 공시 등으로 값이 바뀐 보고서도 갱신하고, 신규/변경분은 변경 이력에 기록)
+    """
+    import pandas as pd
 
-        session.commit()
-        print(f"✅ {company_id} 재무 데이터 저장 완료")
+    session = get_session()
+    try:
+        # ✅ report_date를 date로 통일 (기존 행과 키를 비교하기 위해)
+        records = [
+            {
+                "company_id": company_id,
+                **data,
+                "report_date": pd.Timestamp(data["report_date"]).date(),
+            }
+            for data in financial_data
+        ]
+        changed = []
+        result = bulk_upsert(
+            session,
+            FinancialStatement,
+            records,
+            key_columns=("company_id", "report_date"),
+            changed_keys=changed,
+        )
+        record_changes(session, "financial_statements", changed)
+
+        with timer("write", table="financial_statements"):
+            session.commit()
+        log(
+            f"✅ {company_id} 재무 데이터 저장 완료 "
+            f"(신규 {result['inserted']}, 업데이트 {result['updated']}, 동일 {result['unchanged']})",
+            level=2,
+        )
+        return result
     except Exception as e:
         session.rollback()
         print(f"❌ 데이터 저장 실패: {e}")
+        return None
     finally:
         session.close()
 
 
-def update_financial_data():
-    """모든 기업의 재무 데이터를 수집 및 저장"""
-    companies = session.query(Company.id, Company.symbol, Company.country).all()
+def update_financial_data(retry_failed=False):
+    """
+    모든 기업의 재무 데이터를 수집 및 저장
+    (같은 날 다시 실행하면 실행 일지 기준으로 완료한 기업은 건너뛰고 이어서 수집)
+    :param retry_failed: True면 오늘 실행에서 실패한 기업만 다시 수집
+    """
+    reset_metrics()
+    clear_run_caches()
+    session = get_session()
+    try:
+        companies = session.query(Company.id, Company.symbol, Company.country).all()
+    finally:
+        session.close()
 
+    journal = RunJournal("update_financial_data")
+    selected = journal.select([symbol for _, symbol, _ in companies], retry_failed)
     for company in companies:
         company_id, symbol, country = company
+        if symbol not in selected:
+            continue
+        journal.start([symbol])
 
         if country == "US":
-            financial_data = fetch_us_financials(symbol)
+            with timer("fetch", provider="yfinance"):
+                financial_data = fetch_us_financials(symbol)
         elif country == "KR":
-            financial_data = fetch_kr_financials(symbol)
+            with timer("fetch", provider="dart"):
+                financial_data = fetch_kr_financials(symbol)
         else:
-            print(f"⚠️ 지원되지 않는 국가: {country}")
+            log(f"⚠️ 지원되지 않는 국가: {country}")
+            journal.fail([symbol], f"지원되지 않는 국가: {country}")
             continue
 
-        if financial_data:
-            save_financial_data(company_id, financial_data)
+        if not financial_data:
+            count("symbols", stage="fetch", result="missing")
+            log(f"⚠️ {symbol} 재무 데이터 없음, 저장 건너뜀", level=2)
+            journal.fail([symbol], "데이터 없음")
+        elif save_financial_data(company_id, financial_data) is None:
+            journal.fail([symbol], "저장 실패")
         else:
-            print(f"⚠️ {symbol} 재무 데이터 없음, 저장 건너뜀")
+            journal.done([symbol])
+
+    journal.finish()
+    journal.close()
+    write_metrics("update_financial_data")
 
 
 if __name__ == "__main__":
-    update_financial_data()
+    update_financial_data(retry_failed="--retry-failed" in sys.argv[1:])
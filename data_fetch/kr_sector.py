@@ -2,12 +2,33 @@ import os
 import io
 import pandas as pd
 import requests
+from data_fetch.cache import cached_frame
+from data_fetch.rate_limit import limited_call
 
 
 def fetch_krx_sector_data(market: str):
     """
     KRX 한국거래소에서 특정 시장(KOSPI/KOSDAQ)의 업종(Sector) 정보 크롤링
+    (같은 시장/기준일 요청은 디스크 캐시 사용)
     """
+    trade_date = pd.to_datetime("today").strftime("%Y%m%d")
+    return cached_frame(
+        "krx",
+        "sector",
+        {"market": market, "date": trade_date},
+        lambda: _download_krx_sector_data(market, trade_date),
+        rate_limited=False,  # OTP 발급 / 다운로드 요청을 각각 제한
+    )
+
+
+def _checked(response):
+    """HTTP 오류 응답(429 / 5xx 등)은 limiter 안에서 예외로 바꿔 감속 / 재시도 대상이 되도록 함"""
+    response.raise_for_status()
+    return response
+
+
+def _download_krx_sector_data(market: str, trade_date: str):
+    """KRX OTP 발급 → CSV 다운로드 후 Symbol / Name / Sector 프레임 반환"""
     headers = {"User-Agent": "Mozilla/5.0"}
 
     # ✅ OTP 요청 URL
@@ -15,7 +36,7 @@ def fetch_krx_sector_data(market: str):
     otp_data = {
         "locale": "ko_KR",
         "mktId": "STK" if market == "KOSPI" else "KSQ",  # KOSPI: STK, KOSDAQ: KSQ
-        "trdDd": pd.to_datetime("today").strftime("%Y%m%d"),
+        "trdDd": trade_date,
         "share": "1",
         "money": "1",
         "csvxls_isNo": "false",
@@ -24,13 +45,19 @@ def fetch_krx_sector_data(market: str):
     }
 
     # ✅ OTP 요청
-    otp_response = requests.post(otp_url, data=otp_data, headers=headers)
+    otp_response = limited_call(
+        "krx",
+        lambda: _checked(requests.post(otp_url, data=otp_data, headers=headers)),
+    )
     otp_code = otp_response.text.strip()
 
     # ✅ KRX 데이터 다운로드 URL
     download_url = "http://data.krx.co.kr/comm/fileDn/download_csv/download.cmd"
-    download_response = requests.post(
-        download_url, data={"code": otp_code}, headers=headers
+    download_response = limited_call(
+        "krx",
+        lambda: _checked(
+            requests.post(download_url, data={"code": otp_code}, headers=headers)
+        ),
     )
 
     # ✅ 📌 인코딩 변환 (한글 깨짐 방지)
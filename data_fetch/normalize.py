@@ -0,0 +1,75 @@
+# ✅ pandas는 import 비용이 크므로 날짜 변환 시점에 불러옴 (프레임 메서드는 import 불필요)
+
+# ✅ stock_prices / benchmark_prices 저장용 표준 컬럼
+PRICE_COLUMNS = [
+    "date",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "adjusted_close_price",
+    "volume",
+]
+
+# ✅ provider별 컬럼명 → 표준 컬럼명 매핑
+YFINANCE_PRICE_COLUMNS = {
+    "Open": "open_price",
+    "High": "high_price",
+    "Low": "low_price",
+    "Close": "close_price",
+    "Adj Close": "adjusted_close_price",
+    "Volume": "volume",
+}
+PYKRX_PRICE_COLUMNS = {
+    "날짜": "date",
+    "시가": "open_price",
+    "고가": "high_price",
+    "저가": "low_price",
+    "종가": "close_price",
+    "거래량": "volume",
+}
+
+
+def to_dates(values):
+    """문자열(YYYYMMDD, YYYY-MM-DD HH:MM:SS)/Timestamp/DatetimeIndex를 date 배열로 일괄 변환"""
+    import pandas as pd
+
+    if not isinstance(values, pd.DatetimeIndex):
+        values = pd.DatetimeIndex(pd.to_datetime(pd.Series(values), format="mixed"))
+    return values.date
+
+
+def normalize_price_frame(data, column_map, date_column=None):
+    """
+    provider 주가 프레임을 표준 컬럼(PRICE_COLUMNS) 프레임으로 변환
+    :param data: provider 원본 DataFrame
+    :param column_map: provider 컬럼명 → 표준 컬럼명
+    :param date_column: 날짜 컬럼명 (None이면 인덱스를 날짜로 사용)
+    :return: PRICE_COLUMNS 순서의 DataFrame (수정 종가가 없으면 종가로 채움)
+    """
+    frame = data.rename(columns=column_map)
+    dates = (
+        frame.index
+        if date_column is None
+        else frame[column_map.get(date_column, date_column)]
+    )
+    frame = frame.assign(date=to_dates(dates))
+
+    if "adjusted_close_price" not in frame.columns:
+        frame["adjusted_close_price"] = frame["close_price"]
+    return frame[PRICE_COLUMNS].reset_index(drop=True)
+
+
+def frame_to_records(frame, **constants):
+    """
+    DataFrame을 NaN → None 변환된 레코드(dict) 리스트로 변환 (컬럼 단위 처리)
+    :param constants: 모든 레코드에 추가할 고정 값 (예: company_id=1)
+    """
+    columns = list(constants) + list(frame.columns)
+    values = [[value] * len(frame) for value in constants.values()]
+    for name in frame.columns:
+        column = frame[name]
+        array = column.to_numpy(dtype=object, copy=True)
+        array[column.isna().to_numpy()] = None
+        values.append(array.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)]
@@ -0,0 +1,106 @@
+import queue
+import threading
+
+from config.settings import FETCH_WORKERS, PIPELINE_QUEUE_SIZE, WRITE_WORKERS
+from monitoring.metrics import log
+
+_DONE = object()  # ✅ writer 워커 종료 신호
+
+
+def run_pipeline(
+    jobs,
+    fetch_fn,
+    save_fn,
+    fetch_workers=None,
+    write_workers=None,
+    queue_size=None,
+):
+    """
+    fetch 워커 풀과 DB writer 워커를 bounded queue로 연결해 실행
+    :param jobs: 수집 작업 목록 (예: (company_id, symbol, country, start_date))
+    :param fetch_fn: fetch_fn(job) → [(key, payload), ...] 또는 None
+    :param save_fn: save_fn(key, payload) → DB 저장 (None을 반환하거나 예외가 나면 저장 실패)
+    :param fetch_workers: 동시에 네트워크 요청을 수행할 워커 수
+    :param write_workers: DB에 쓰는 워커 수
+    :param queue_size: 저장 대기 결과의 최대 개수 (가득 차면 fetch 워커가 대기)
+    :return: {"jobs", "fetched", "saved", "fetch_failed", "save_failed"} 건수
+    """
+    fetch_workers = fetch_workers or FETCH_WORKERS
+    write_workers = write_workers or WRITE_WORKERS
+    queue_size = queue_size or PIPELINE_QUEUE_SIZE
+
+    job_queue = queue.Queue()
+    for job in jobs:
+        job_queue.put(job)
+
+    result_queue = queue.Queue(maxsize=queue_size)
+    stats = {
+        "jobs": job_queue.qsize(),
+        "fetched": 0,
+        "saved": 0,
+        "fetch_failed": 0,
+        "save_failed": 0,
+    }
+    lock = threading.Lock()
+
+    def count(name):
+        with lock:
+            stats[name] += 1
+
+    def fetch_worker():
+        while True:
+            try:
+                job = job_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results = fetch_fn(job) or []
+            except Exception as e:
+                log(f"❌ 수집 실패: {job} ({e})")
+                count("fetch_failed")
+                continue
+            for key, payload in results:
+                count("fetched")
+                result_queue.put(
+                    (key, payload)
+                )  # ✅ 큐가 가득 차면 여기서 대기 (backpressure)
+
+    def write_worker():
+        while True:
+            item = result_queue.get()
+            if item is _DONE:
+                return
+            key, payload = item
+            try:
+                result = save_fn(key, payload)
+            except Exception as e:
+                log(f"❌ 저장 실패: {key} ({e})")
+                count("save_failed")
+                continue
+            if result is None:
+                # ✅ 저장 함수가 예외를 직접 처리하고 None을 반환한 경우도 저장 실패
+                log(f"❌ 저장 실패: {key}")
+                count("save_failed")
+            else:
+                count("saved")
+
+    fetchers = [
+        threading.Thread(target=fetch_worker, name=f"fetch-{i}", daemon=True)
+        for i in range(fetch_workers)
+    ]
+    writers = [
+        threading.Thread(target=write_worker, name=f"write-{i}", daemon=True)
+        for i in range(write_workers)
+    ]
+    for thread in fetchers + writers:
+        thread.start()
+
+    # ✅ 모든 fetch 워커가 끝나면 writer 워커에 종료 신호 전달
+    for thread in fetchers:
+        thread.join()
+    for _ in writers:
+        result_queue.put(_DONE)
+    for thread in writers:
+        thread.join()
+
+    return stats
@@ -0,0 +1,508 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config.settings import (
+    PRICE_PROVIDER_COOLDOWN_SECONDS,
+    PRICE_PROVIDER_MAX_ERRORS,
+    PRICE_PROVIDER_RETRIES,
+    PRICE_PROVIDERS,
+    PRICE_REPLAY_DIR,
+    PRICE_REPLAY_MODE,
+)
+from data_fetch.cache import cached_frame
+from data_fetch.normalize import (
+    PYKRX_PRICE_COLUMNS,
+    YFINANCE_PRICE_COLUMNS,
+    frame_to_records,
+    normalize_price_frame,
+)
+from data_fetch.rate_limit import is_throttle_error
+from monitoring.metrics import count, log, observe, timer
+
+# ✅ 주가 provider 추상화 + 라우팅
+# - provider: 종목 하나의 기간 OHLCV를 표준 레코드(PRICE_COLUMNS) 리스트로 반환
+#   (데이터가 없으면 빈 리스트, 요청 실패는 예외를 그대로 올려서 라우터가 판단)
+# - 라우터: 국가를 지원하는 provider 중 정상(쿨다운이 아닌) provider를
+#   종목당 평균 지연 시간 순으로 시도하고, 실패하거나 데이터가 없으면 다음 provider로 전환
+# - 연속 실패가 PRICE_PROVIDER_MAX_ERRORS에 도달하거나 스로틀링이면
+#   PRICE_PROVIDER_COOLDOWN_SECONDS 동안 뒤로 밀림 (모두 쿨다운이면 우선순위 순서로 시도)
+# - 스로틀링 재시도는 PRICE_PROVIDER_RETRIES만큼만 하고 다른 provider로 넘김
+# - pandas / yfinance / pykrx / FinanceDataReader는 실제로 요청하는 함수 안에서 불러옴
+
+
+def _today():
+    return datetime.today().date()
+
+
+def _to_records(data, column_map):
+    """provider 원본 프레임 → 표준 레코드 리스트 (빈 프레임이면 빈 리스트)"""
+    if data is None or data.empty:
+        return []
+    with timer("normalize"):
+        data = data.dropna(how="all")
+        if data.empty:
+            return []
+        return frame_to_records(normalize_price_frame(data, column_map))
+
+
+class PriceProvider:
+    """
+    주가 provider 인터페이스
+    - fetch(symbol, start_date, end_date=None): 기간 OHLCV 레코드 리스트
+      (end_date는 포함, None이면 provider 기본값 = 오늘까지)
+    - fetch_batch(symbols, start_date, end_date=None): {symbol: 레코드 리스트}
+      (supports_batch가 True인 provider는 한 번의 요청으로 여러 종목 조회)
+    """
+
+    name = None
+    countries = ()
+    supports_batch = False
+
+    def fetch(self, symbol, start_date, end_date=None):
+        raise NotImplementedError
+
+    def fetch_batch(self, symbols, start_date, end_date=None):
+        return {symbol: self.fetch(symbol, start_date, end_date) for symbol in symbols}
+
+
+class YFinanceProvider(PriceProvider):
+    """yfinance (미국, auto_adjust 기준 가격 / 다중 티커 다운로드 지원)"""
+
+    name = "yfinance"
+    countries = ("US",)
+    supports_batch = True
+
+    @staticmethod
+    def _window(start_date, end_date):
+        # yfinance의 end는 포함하지 않으므로 end_date 다음 날까지 요청
+        end = _today() if end_date is None else end_date + timedelta(days=1)
+        return start_date.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+    def fetch(self, symbol, start_date, end_date=None):
+        import yfinance as yf
+
+        start, end = self._window(start_date, end_date)
+        data = cached_frame(
+            "yfinance",
+            "ohlcv",
+            {"symbol": symbol, "start": start, "end": end},
+            lambda: yf.Ticker(symbol).history(start=start, end=end),
+            retries=PRICE_PROVIDER_RETRIES,
+        )
+        return _to_records(data, YFINANCE_PRICE_COLUMNS)
+
+    def fetch_batch(self, symbols, start_date, end_date=None):
+        import pandas as pd
+        import yfinance as yf
+
+        symbols = list(symbols)
+        start, end = self._window(start_date, end_date)
+        # ✅ Ticker.history()와 같은 기준(auto_adjust=True)으로 다운로드
+        data = cached_frame(
+            "yfinance",
+            "ohlcv",
+            {
+                "symbols": sorted(symbols),
+                "start": start,
+                "end": end,
+                "auto_adjust": True,
+            },
+            lambda: yf.download(
+                symbols,
+                start=start,
+                end=end,
+                group_by="ticker",
+                auto_adjust=True,
+                progress=False,
+            ),
+            retries=PRICE_PROVIDER_RETRIES,
+        )
+        if data.empty:
+            return {}
+
+        # ✅ MultiIndex (티커, 필드) 프레임을 종목별로 분리
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {symbols[0]: _to_records(data, YFINANCE_PRICE_COLUMNS)}
+        tickers = set(data.columns.get_level_values(0))
+        return {
+            symbol: _to_records(data[symbol], YFINANCE_PRICE_COLUMNS)
+            for symbol in symbols
+            if symbol in tickers
+        }
+
+
+class PykrxProvider(PriceProvider):
+    """pykrx (한국, 종목별 기간 조회)"""
+
+    name = "pykrx"
+    countries = ("KR",)
+
+    def fetch(self, symbol, start_date, end_date=None):
+        from pykrx import stock
+
+        start = start_date.strftime("%Y%m%d")
+        end = (end_date or _today()).strftime("%Y%m%d")
+        data = cached_frame(
+            "pykrx",
+            "ohlcv",
+            {"symbol": symbol, "start": start, "end": end},
+            lambda: stock.get_market_ohlcv(start, end, symbol),
+            retries=PRICE_PROVIDER_RETRIES,
+        )
+        return _to_records(data, PYKRX_PRICE_COLUMNS)
+
+
+def _auto_adjust(data):
+    """
+    Adj Close가 있는 원본 프레임을 yfinance auto_adjust=True와 같은 기준으로 변환
+    (시가 / 고가 / 저가 / 종가에 Adj Close / Close 비율을 곱하고 Adj Close 컬럼 제거)
+    """
+    if data is None or data.empty or "Adj Close" not in data.columns:
+        return data
+    ratio = data["Adj Close"] / data["Close"]
+    adjusted = data.drop(columns=["Adj Close"])
+    for column in ("Open", "High", "Low"):
+        if column in adjusted.columns:
+            adjusted[column] = adjusted[column] * ratio
+    adjusted["Close"] = data["Adj Close"]
+    return adjusted
+
+
+class FinanceDataReaderProvider(PriceProvider):
+    """
+    FinanceDataReader (미국 / 한국 모두 지원, Open/High/Low/Close/Volume 컬럼)
+    - 미국: 원본 Close는 수정 전 가격이므로 Adj Close 기준으로 환산해서
+      yfinance provider(auto_adjust=True)와 같은 수정 가격으로 반환
+      (failover로 provider가 바뀌어도 한 종목의 가격 기준이 섞이지 않도록)
+    - 한국: pykrx와 같은 수정 전 가격 (수정 종가 = 종가)
+    """
+
+    name = "fdr"
+    countries = ("US", "KR")
+
+    def fetch(self, symbol, start_date, end_date=None):
+        import FinanceDataReader as fdr
+
+        start = start_date.strftime("%Y-%m-%d")
+        end = (end_date or _today()).strftime("%Y-%m-%d")
+        data = cached_frame(
+            "fdr",
+            "ohlcv",
+            {"symbol": symbol, "start": start, "end": end},
+            lambda: fdr.DataReader(symbol, start, end),
+            retries=PRICE_PROVIDER_RETRIES,
+        )
+        return _to_records(_auto_adjust(data), YFINANCE_PRICE_COLUMNS)
+
+
+class ReplayProvider(PriceProvider):
+    """
+    기록된 수집 결과를 다시 사용하는 provider (네트워크 없음, 국가별 인스턴스)
+    - PRICE_REPLAY_MODE=record: 라우터가 다른 provider의 수집 결과를 국가/종목별 Parquet로 기록
+    - PRICE_REPLAY_MODE=replay: 기록된 결과만으로 수집 (재현 가능한 테스트 / 벤치마크용)
+    """
+
+    name = "replay"
+
+    def __init__(self, country, directory=None):
+        self.country = country
+        self.countries = (country,)
+        self.directory = directory or PRICE_REPLAY_DIR
+        self._lock = threading.Lock()
+
+    def path_for(self, symbol):
+        """{PRICE_REPLAY_DIR}/{국가}/{종목}.parquet (국가가 다른 같은 종목 코드가 섞이지 않도록)"""
+        return os.path.join(self.directory, self.country, f"{symbol}.parquet")
+
+    def _read(self, symbol):
+        import pandas as pd
+
+        path = self.path_for(symbol)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def fetch(self, symbol, start_date, end_date=None):
+        frame = self._read(symbol)
+        if frame is None:
+            return []
+        mask = frame["date"] >= start_date
+        if end_date is not None:
+            mask &= frame["date"] <= end_date
+        return frame_to_records(frame[mask])
+
+    def record(self, symbol, records):
+        """수집 결과를 기존 기록과 합쳐 저장 (같은 날짜는 새 값으로 교체)"""
+        import pandas as pd
+
+        with self._lock:
+            frame = pd.DataFrame(records)
+            existing = self._read(symbol)
+            if existing is not None:
+                frame = pd.concat([existing, frame], ignore_index=True)
+            frame = frame.drop_duplicates("date", keep="last").sort_values("date")
+
+            path = self.path_for(symbol)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            frame.to_parquet(temp_path, index=False)
+            os.replace(temp_path, path)
+
+
+# ✅ 기록 / 재생 대상 국가 (국가별 디렉터리)
+REPLAY_COUNTRIES = ("US", "KR")
+
+PROVIDER_CLASSES = {
+    provider.name: provider
+    for provider in (YFinanceProvider, PykrxProvider, FinanceDataReaderProvider)
+}
+
+
+class ProviderStats:
+    """provider 하나의 호출 / 오류 / 지연 시간 통계와 쿨다운 상태"""
+
+    def __init__(self, name, alpha=0.2):
+        self.name = name
+        self.alpha = alpha
+        self.counters = {
+            "calls": 0,
+            "succeeded": 0,
+            "empty": 0,
+            "failed": 0,
+            "throttled": 0,
+            "symbols": 0,
+            "seconds": 0.0,
+        }
+        self.latency = None  # 종목당 지연 시간 지수이동평균 (초)
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, seconds, symbols=1, empty=False):
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["empty" if empty else "succeeded"] += 1
+            self.counters["symbols"] += symbols
+            self.counters["seconds"] += seconds
+            per_symbol = seconds / max(symbols, 1)
+            self.latency = (
+                per_symbol
+                if self.latency is None
+                else self.alpha * per_symbol + (1 - self.alpha) * self.latency
+            )
+            self.consecutive_errors = 0
+
+    def record_failure(self, exc, seconds, max_errors, cooldown):
+        """실패 기록 :return: 이번 실패로 쿨다운에 들어갔으면 True"""
+        throttled = is_throttle_error(exc)
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["throttled" if throttled else "failed"] += 1
+            self.counters["seconds"] += seconds
+            self.consecutive_errors += 1
+            if throttled or self.consecutive_errors >= max_errors:
+                self.cooldown_until = time.monotonic() + cooldown
+                self.consecutive_errors = 0
+                return True
+        return False
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self.cooldown_until
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self.counters)
+            latency = self.latency
+        calls = metrics["calls"]
+        errors = metrics["failed"] + metrics["throttled"]
+        metrics["latency_ms"] = (
+            round(latency * 1000, 1) if latency is not None else None
+        )
+        metrics["error_rate"] = round(errors / calls, 4) if calls else 0.0
+        metrics["healthy"] = self.healthy()
+        return metrics
+
+
+class PriceRouter:
+    """종목마다 가장 빠른 정상 provider로 보내고, 실패하면 다음 provider로 자동 전환"""
+
+    def __init__(self, providers, max_errors=None, cooldown=None, recorders=None):
+        self.providers = list(providers)  # 우선순위 순서
+        self.max_errors = max_errors or PRICE_PROVIDER_MAX_ERRORS
+        self.cooldown = (
+            PRICE_PROVIDER_COOLDOWN_SECONDS if cooldown is None else cooldown
+        )
+        self.recorders = recorders or {}  # 국가 → ReplayProvider (record 모드)
+        self.stats = {
+            provider.name: ProviderStats(provider.name) for provider in providers
+        }
+
+    def available(self, name):
+        """provider가 라우팅 대상이고 쿨다운 중이 아닌지"""
+        return name in self.stats and self.stats[name].healthy()
+
+    def candidates(self, country, exclude=()):
+        """
+        시도할 provider 순서
+        - 정상 provider: 측정된 provider는 평균 지연 시간 순, 측정 전 provider는 그 뒤에 우선순위 순
+        - 쿨다운 중인 provider: 마지막에 우선순위 순 (모두 쿨다운이어도 수집은 계속)
+        """
+        now = time.monotonic()
+        usable = [
+            provider
+            for provider in self.providers
+            if country in provider.countries and provider.name not in exclude
+        ]
+        healthy = [p for p in usable if self.stats[p.name].healthy(now)]
+        cooling = [p for p in usable if not self.stats[p.name].healthy(now)]
+        healthy.sort(
+            key=lambda p: (
+                self.stats[p.name].latency is None,
+                self.stats[p.name].latency or 0.0,
+            )
+        )
+        return healthy + cooling
+
+    def measure(self, name, fn, symbols=1):
+        """fn() 호출 결과를 provider 통계 / 실행 계측(fetch 단계)에 기록 (예외는 그대로 전달)"""
+        stats = self.stats[name]
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            seconds = time.perf_counter() - started
+            observe("fetch", seconds, provider=name)
+            count(
+                "requests",
+                provider=name,
+                result="throttled" if is_throttle_error(e) else "failed",
+            )
+            if stats.record_failure(e, seconds, self.max_errors, self.cooldown):
+                log(f"🧊 {name} 쿨다운 {self.cooldown:.0f}초 (최근 오류: {e})")
+            raise
+        seconds = time.perf_counter() - started
+        observe("fetch", seconds, provider=name)
+        count("requests", provider=name, result="ok" if result else "empty")
+        stats.record_success(seconds, symbols=symbols, empty=not result)
+        return result
+
+    def _record(self, provider, symbol, country, records):
+        """수집 성공: 행 수 집계 + record 모드면 기록"""
+        count("rows", len(records), stage="fetch", provider=provider)
+        recorder = self.recorders.get(country)
+        if recorder is not None and records:
+            recorder.record(symbol, records)
+
+    def fetch(self, symbol, country, start_date, end_date=None, exclude=()):
+        """종목 하나의 기간 OHLCV (모든 provider가 실패하거나 데이터가 없으면 빈 리스트)"""
+        for provider in self.candidates(country, exclude):
+            try:
+                records = self.measure(
+                    provider.name,
+                    lambda: provider.fetch(symbol, start_date, end_date),
+                )
+            except Exception as e:
+                count("failovers", provider=provider.name)
+                log(
+                    f"⚠️ {provider.name} {symbol} 수집 실패, 다음 provider로 전환: {e}",
+                    level=2,
+                )
+                continue
+            if records:
+                self._record(provider.name, symbol, country, records)
+                return records
+        return []
+
+    def fetch_batch(self, companies, country, end_date=None):
+        """
+        여러 종목 수집: 첫 번째 provider가 묶음 조회를 지원하면 한 번에 조회 (가장 이른 시작일 기준)
+        누락 / 실패한 종목은 종목별로 다른 provider에 다시 요청
+        :param companies: [(symbol, start_date), ...]
+        :return: {symbol: 레코드 리스트} (데이터를 찾은 종목만)
+        """
+        starts = dict(companies)
+        results = {}
+        candidates = self.candidates(country)
+        exclude = ()
+        if candidates and candidates[0].supports_batch and len(starts) > 1:
+            provider = candidates[0]
+            exclude = (provider.name,)
+
+            def fetch_batch():
+                batch = provider.fetch_batch(
+                    list(starts), min(starts.values()), end_date
+                )
+                if not any(batch.values()):
+                    raise LookupError(f"{len(starts)}개 종목 모두 빈 응답")
+                return batch
+
+            try:
+                batch = self.measure(provider.name, fetch_batch, symbols=len(starts))
+            except Exception as e:
+                log(f"⚠️ {provider.name} 일괄 수집 실패, 종목별로 전환: {e}")
+                batch = {}
+            for symbol, records in batch.items():
+                if records:
+                    results[symbol] = records
+                    self._record(provider.name, symbol, country, records)
+
+        for symbol, start_date in starts.items():
+            if symbol not in results:
+                records = self.fetch(symbol, country, start_date, end_date, exclude)
+                if records:
+                    results[symbol] = records
+        return results
+
+    def metrics(self):
+        """{provider: 통계} (한 번이라도 호출된 provider만)"""
+        return {
+            name: stats.metrics()
+            for name, stats in self.stats.items()
+            if stats.counters["calls"]
+        }
+
+
+def build_price_router(names=None, replay_mode=None):
+    """설정(PRICE_PROVIDERS / PRICE_REPLAY_MODE)에 맞는 라우터 생성"""
+    names = PRICE_PROVIDERS if names is None else names
+    replay_mode = replay_mode or PRICE_REPLAY_MODE
+    if replay_mode == "replay":
+        return PriceRouter([ReplayProvider(country) for country in REPLAY_COUNTRIES])
+
+    providers = []
+    for name in names:
+        if name in PROVIDER_CLASSES:
+            providers.append(PROVIDER_CLASSES[name]())
+        else:
+            log(f"⚠️ 알 수 없는 주가 provider: {name}", 0)
+    recorders = None
+    if replay_mode == "record":
+        recorders = {country: ReplayProvider(country) for country in REPLAY_COUNTRIES}
+    return PriceRouter(providers, recorders=recorders)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_price_router():
+    """프로세스 공용 라우터 (최초 사용 시 생성, provider 통계를 실행 전체에서 공유)"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = build_price_router()
+        return _router
+
+
+def format_provider_metrics(metrics=None):
+    """provider별 지연 시간 / 오류 통계를 한 줄씩 요약한 문자열"""
+    metrics = get_price_router().metrics() if metrics is None else metrics
+    return "\n".join(
+        f"{name}: 호출 {m['calls']}건 (종목 {m['symbols']}개), "
+        f"종목당 {m['latency_ms'] if m['latency_ms'] is not None else '-'}ms, 오류율 {m['error_rate']:.1%} "
+        f"(실패 {m['failed']}, 제한 {m['throttled']}, 빈 응답 {m['empty']})"
+        f"{'' if m['healthy'] else ', 쿨다운 중'}"
+        for name, m in metrics.items()
+    )
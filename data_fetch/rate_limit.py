@@ -0,0 +1,237 @@
+import random
+import threading
+import time
+
+from config.settings import (
+    RATE_LIMIT_BACKOFF_SECONDS,
+    RATE_LIMIT_DECREASE,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMITS,
+)
+from monitoring.metrics import count, log
+
+# ✅ 스로틀링(요청 과다)으로 판단하는 오류 메시지
+_THROTTLE_MARKERS = ("429", "too many requests", "rate limit", "ratelimit")
+
+# ✅ 일시적인 네트워크 오류로 판단하는 오류 메시지 (재시도 + 속도 감소 대상)
+_TRANSIENT_MARKERS = ("timed out", "timeout", "connection reset", "connection aborted")
+
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷 (여러 스레드가 공유)"""
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: 초당 허용 요청 수
+        :param capacity: 한 번에 몰아서 보낼 수 있는 최대 요청 수 (기본값: rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_rate(self, rate):
+        """지금까지 쌓인 토큰을 반영한 뒤 채우는 속도 변경"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기하고, 대기한 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def _http_status(exc):
+    """requests HTTPError 등 응답이 붙은 오류의 HTTP 상태 코드 (없으면 None)"""
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def is_throttle_error(exc):
+    """HTTP 429 / rate limit 계열 오류인지 판단 (yfinance의 YFRateLimitError 포함)"""
+    if type(exc).__name__ == "YFRateLimitError" or _http_status(exc) == 429:
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in _THROTTLE_MARKERS)
+
+
+def is_transient_error(exc):
+    """타임아웃 / 연결 끊김 / HTTP 5xx 등 다시 시도하면 성공할 수 있는 오류인지 판단"""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = _http_status(exc)
+    if status is not None and status >= 500:
+        return True
+    if type(exc).__name__ in ("ConnectionError", "Timeout", "ReadTimeout"):
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+
+def backoff_delay(attempt, base_delay, max_delay=60.0):
+    """attempt번째 재시도 대기 시간 (지수 백오프 + 지터)"""
+    return min(max_delay, base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+
+
+class AdaptiveRateLimiter:
+    """
+    provider 하나의 요청 속도를 AIMD 방식으로 조절하는 토큰 버킷
+    - 성공: 초당 허용 요청 수를 increase만큼 증가 (max_rate까지)
+    - 스로틀링/일시적 오류: decrease 배로 감소 (min_rate까지) 후 백오프 재시도
+    """
+
+    def __init__(
+        self,
+        name,
+        rate,
+        min_rate=None,
+        max_rate=None,
+        increase=None,
+        decrease=None,
+        retries=None,
+        base_delay=None,
+    ):
+        self.name = name
+        self.min_rate = min_rate or rate / 10
+        self.max_rate = max_rate or rate * 2
+        self.increase = RATE_LIMIT_INCREASE if increase is None else increase
+        self.decrease = RATE_LIMIT_DECREASE if decrease is None else decrease
+        self.retries = RATE_LIMIT_MAX_RETRIES if retries is None else retries
+        self.base_delay = (
+            RATE_LIMIT_BACKOFF_SECONDS if base_delay is None else base_delay
+        )
+        self.bucket = TokenBucket(rate, capacity=max(rate, 1))
+        self.counters = {
+            "requests": 0,
+            "succeeded": 0,
+            "throttled": 0,
+            "transient": 0,
+            "failed": 0,
+            "wait_seconds": 0.0,
+        }
+        self._started = None
+        self._lock = threading.Lock()
+
+    def _record(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _adjust(self, success):
+        with self._lock:
+            rate = self.bucket.rate
+            if success:
+                rate = min(self.max_rate, rate + self.increase)
+            else:
+                rate = max(self.min_rate, rate * self.decrease)
+        if rate != self.bucket.rate:
+            self.bucket.set_rate(rate)
+
+    def call(self, fn, retries=None):
+        """
+        토큰을 얻은 뒤 fn()을 호출 (스로틀링/일시적 오류는 속도를 낮추고 재시도)
+        :param retries: 이번 호출의 최대 재시도 횟수 (None이면 limiter 기본값)
+        """
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire()
+            with self._lock:
+                if self._started is None:
+                    self._started = time.monotonic()
+                self.counters["requests"] += 1
+                self.counters["wait_seconds"] += waited
+            try:
+                result = fn()
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                if not throttled and not is_transient_error(e):
+                    self._record("failed")
+                    raise
+                self._record("throttled" if throttled else "transient")
+                self._adjust(success=False)
+                if attempt >= retries:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay)
+                attempt += 1
+                count(
+                    "retries",
+                    provider=self.name,
+                    result="throttled" if throttled else "transient",
+                )
+                log(
+                    f"⏳ {self.name} 요청 제한/오류 감지, 초당 {self.bucket.rate:.2f}건으로 감속, "
+                    f"{delay:.1f}초 후 재시도 ({attempt}/{retries}): {e}"
+                )
+                time.sleep(delay)
+                continue
+
+            self._record("succeeded")
+            self._adjust(success=True)
+            return result
+
+    def metrics(self):
+        """요청 수, 초당 요청 수, 평균 대기 시간, 오류율, 현재 허용 속도"""
+        with self._lock:
+            metrics = dict(self.counters)
+            elapsed = time.monotonic() - self._started if self._started else 0.0
+        requests = metrics["requests"]
+        errors = metrics["throttled"] + metrics["transient"] + metrics["failed"]
+        metrics["requests_per_sec"] = round(requests / elapsed, 3) if elapsed else 0.0
+        metrics["avg_wait_seconds"] = (
+            round(metrics["wait_seconds"] / requests, 4) if requests else 0.0
+        )
+        metrics["error_rate"] = round(errors / requests, 4) if requests else 0.0
+        metrics["rate"] = round(self.bucket.rate, 3)
+        return metrics
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    """provider별 공용 rate limiter (초기 속도는 RATE_LIMITS, 없으면 default)"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate = RATE_LIMITS.get(provider, RATE_LIMITS["default"])
+            _limiters[provider] = AdaptiveRateLimiter(provider, rate)
+        return _limiters[provider]
+
+
+def limited_call(provider, fn, retries=None):
+    """provider 요청 제한을 거쳐 fn() 호출"""
+    return get_limiter(provider).call(fn, retries=retries)
+
+
+def limiter_metrics():
+    """{provider: metrics} (지금까지 사용된 provider만)"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.metrics() for name, limiter in limiters.items()}
+
+
+def format_limiter_metrics():
+    """provider별 요청 통계를 한 줄씩 요약한 문자열"""
+    return "\n".join(
+        f"{name}: 요청 {m['requests']}건 ({m['requests_per_sec']}건/초), "
+        f"평균 대기 {m['avg_wait_seconds']}초, 오류율 {m['error_rate']:.1%} "
+        f"(제한 {m['throttled']}, 일시 오류 {m['transient']}), 현재 초당 {m['rate']}건"
+        for name, m in limiter_metrics().items()
+    )
@@ -0,0 +1,261 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+from config.settings import (
+    RUN_JOURNAL_ENABLED,
+    RUN_JOURNAL_KEEP_DAYS,
+    RUN_JOURNAL_MAX_ATTEMPTS,
+    RUN_JOURNAL_PATH,
+)
+from monitoring.metrics import count
+
+# ✅ 실행 일지 (중단된 전체 종목 수집을 이어서 실행)
+# - 실행 단위: (작업 이름, 실행일) → 같은 날 다시 실행하면 같은 일지를 이어서 사용
+# - 항목(종목 코드, 전체 시장 작업은 거래일)별 상태 / 시도 횟수 / 마지막 오류를 로컬 SQLite에 기록
+#   running: 수집 시작 (중단되면 이 상태로 남아 다음 실행에서 다시 수집)
+#   done: 저장까지 완료 (같은 날 다시 실행하면 건너뜀)
+#   failed: 수집 / 저장 실패 또는 데이터 없음 (RUN_JOURNAL_MAX_ATTEMPTS번 실패하면 건너뜀)
+# - retry_failed 모드는 failed 항목만 다시 실행
+# - 상태는 바뀔 때마다 바로 커밋 (프로세스가 죽어도 완료한 항목은 남도록)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    job         TEXT NOT NULL,
+    run_date    TEXT NOT NULL,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    status      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_items (
+    run_id      TEXT NOT NULL,
+    item        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    last_error  TEXT,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (run_id, item)
+);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class RunJournal:
+    """작업 이름 + 실행일 단위 항목별 진행 상태 (스레드 안전, 로컬 SQLite)"""
+
+    def __init__(self, job, run_date=None, path=None, enabled=None, max_attempts=None):
+        enabled = RUN_JOURNAL_ENABLED if enabled is None else enabled
+        self.path = (path or RUN_JOURNAL_PATH) if enabled else ":memory:"
+        self.job = job
+        self.run_date = (run_date or date.today()).isoformat()
+        self.run_id = f"{job}:{self.run_date}"
+        self.max_attempts = max_attempts or RUN_JOURNAL_MAX_ATTEMPTS
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._begin()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _executemany(self, sql, rows):
+        if rows:
+            with self._lock:
+                self._conn.executemany(sql, rows)
+
+    def _begin(self):
+        """실행 기록 생성 (이미 있으면 이어서 실행) + 오래된 실행 기록 삭제"""
+        self._execute(
+            "INSERT INTO runs (run_id, job, run_date, started_at, status) "
+            "VALUES (?, ?, ?, ?, 'running') "
+            "ON CONFLICT(run_id) DO UPDATE SET status = 'running', finished_at = NULL",
+            (self.run_id, self.job, self.run_date, _now()),
+        )
+        cutoff = (date.today() - timedelta(days=RUN_JOURNAL_KEEP_DAYS)).isoformat()
+        self._execute(
+            "DELETE FROM run_items WHERE run_id IN "
+            "(SELECT run_id FROM runs WHERE run_date < ?)",
+            (cutoff,),
+        )
+        self._execute("DELETE FROM runs WHERE run_date < ?", (cutoff,))
+
+    def _items(self, where, params=()):
+        rows = self._execute(
+            f"SELECT item FROM run_items WHERE run_id = ? AND {where}",
+            (self.run_id, *params),
+        )
+        return {item for (item,) in rows}
+
+    def skip_items(self):
+        """다시 실행할 때 건너뛸 항목 (완료 또는 최대 시도 횟수만큼 실패)"""
+        return self._items(
+            "(status = 'done' OR (status = 'failed' AND attempts >= ?))",
+            (self.max_attempts,),
+        )
+
+    def failed_items(self):
+        """실패한 항목 (retry_failed 모드에서 다시 실행할 대상)"""
+        return self._items("status = 'failed'")
+
+    def start(self, items):
+        """수집 시작: running 상태로 바꾸고 시도 횟수 증가"""
+        now = _now()
+        self._executemany(
+            "INSERT INTO run_items (run_id, item, status, attempts, updated_at) "
+            "VALUES (?, ?, 'running', 1, ?) "
+            "ON CONFLICT(run_id, item) DO UPDATE SET status = 'running', "
+            "attempts = attempts + 1, updated_at = excluded.updated_at",
+            [(self.run_id, item, now) for item in items],
+        )
+
+    def done(self, items):
+        now = _now()
+        self._executemany(
+            "UPDATE run_items SET status = 'done', last_error = NULL, updated_at = ? "
+            "WHERE run_id = ? AND item = ?",
+            [(now, self.run_id, item) for item in items],
+        )
+
+    def fail(self, items, error):
+        now = _now()
+        message = str(error)[:500]
+        self._executemany(
+            "UPDATE run_items SET status = 'failed', last_error = ?, updated_at = ? "
+            "WHERE run_id = ? AND item = ?",
+            [(message, now, self.run_id, item) for item in items],
+        )
+
+    def summary(self):
+        """{상태: 항목 수}"""
+        rows = self._execute(
+            "SELECT status, COUNT(*) FROM run_items WHERE run_id = ? GROUP BY status",
+            (self.run_id,),
+        )
+        return dict(rows)
+
+    def errors(self, limit=5):
+        """실패 항목 [(항목, 시도 횟수, 마지막 오류), ...] (최근 실패 순)"""
+        return self._execute(
+            "SELECT item, attempts, last_error FROM run_items "
+            "WHERE run_id = ? AND status = 'failed' ORDER BY updated_at DESC LIMIT ?",
+            (self.run_id, limit),
+        )
+
+    def select(self, items, retry_failed=False):
+        """
+        이번 실행에서 처리할 항목만 골라내기
+        :param retry_failed: True면 실패한 항목만, False면 완료 / 시도 횟수 초과 항목을 제외
+        :return: 처리할 항목 집합
+        """
+        items = set(items)
+        if retry_failed:
+            selected = items & self.failed_items()
+        else:
+            selected = items - self.skip_items()
+        count(
+            "journal_items", len(items) - len(selected), job=self.job, result="skipped"
+        )
+        return selected
+
+    def wrap_pipeline(self, fetch_fn, save_fn, job_items, result_item, empty_ok=None):
+        """
+        run_pipeline의 fetch / save 함수에 일지 기록 추가
+        - fetch 시작 시 작업의 항목을 running으로, 예외가 나면 failed로 기록
+        - 결과가 없는 항목은 failed("데이터 없음"), empty_ok(item)이 True면 done
+        - 항목의 결과가 모두 저장되면 done, 하나라도 실패하면 failed
+          (save_fn이 None을 반환하거나 예외가 나면 저장 실패)
+        :param job_items: job → 항목 리스트
+        :param result_item: (job, fetch 결과 key) → 항목
+        :return: (fetch_fn, save_fn) — fetch 결과 key는 (항목, key)로 감쌈
+        """
+        pending = {}  # 항목 → 남은 저장 건수
+        errors = {}  # 항목 → 첫 저장 오류
+        lock = threading.Lock()
+
+        def fetch(job):
+            items = job_items(job)
+            self.start(items)
+            try:
+                results = fetch_fn(job) or []
+            except Exception as e:
+                self.fail(items, e)
+                raise
+
+            tagged = [
+                ((result_item(job, key), key), payload) for key, payload in results
+            ]
+            with lock:
+                for (item, _), _ in tagged:
+                    pending[item] = pending.get(item, 0) + 1
+            found = {item for (item, _), _ in tagged}
+            missing = [item for item in items if item not in found]
+            empty = [item for item in missing if empty_ok and empty_ok(item)]
+            self.done(empty)
+            self.fail([item for item in missing if item not in empty], "데이터 없음")
+            return tagged
+
+        def settle(item, error):
+            with lock:
+                pending[item] -= 1
+                if error is not None:
+                    errors.setdefault(item, error)
+                if pending[item]:
+                    return
+                error = errors.pop(item, None)
+            if error is None:
+                self.done([item])
+            else:
+                self.fail([item], error)
+
+        def save(tagged_key, payload):
+            item, key = tagged_key
+            try:
+                result = save_fn(key, payload)
+            except Exception as e:
+                settle(item, e)
+                raise
+            settle(item, None if result is not None else "저장 실패")
+            return result
+
+        return fetch, save
+
+    def finish(self):
+        """실행 종료: 상태 요약 출력 및 기록 :return: {상태: 항목 수}"""
+        summary = self.summary()
+        failed = summary.get("failed", 0) + summary.get("running", 0)
+        self._execute(
+            "UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+            (_now(), "failed" if failed else "done", self.run_id),
+        )
+        for status, amount in summary.items():
+            count("journal_items", amount, job=self.job, result=status)
+
+        print(
+            f"📒 실행 일지 {self.run_id}: 완료 {summary.get('done', 0)}, "
+            f"실패 {summary.get('failed', 0)}, 미완료 {summary.get('running', 0)}"
+        )
+        for item, attempts, error in self.errors():
+            print(f"   ❌ {item} ({attempts}회 시도): {error}")
+        if failed:
+            print(
+                "   ↪️ 다시 실행하면 남은 항목부터 이어서, retry_failed=True면 실패 항목만 실행"
+            )
+        return summary
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,27 +1,58 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from config.db_config import get_db_url
+from database.change_log import record_changes
+from database.db_connection import get_session, session_scope
 from database.models import Company, StockPrice  # 모델 불러오기
-
-import numpy as np
-import yfinance as yf
-from pykrx import stock
-from datetime import datetime, timedelta
-
-engine = create_engine(get_db_url())
-Session = sessionmaker(bind=engine)
-
-
-def convert_nan_to_none(value):
-    """NaN 값을 None으로 변환 (MySQL DECIMAL 타입 대응)"""
-    if isinstance(value, float) and np.isnan(value):
-        return None
-    return value
+from database.price_checksums import (
+    invalidate_checksums,
+    save_checksums,
+    split_unchanged_months,
+)
+from database.queries import get_latest_dates
+from database.price_store import (
+    PriceStoreWriter,
+    compact_store,
+    get_store_latest_dates,
+)
+from database.upsert import bulk_upsert
+from data_fetch.cache import cached_frame, format_cache_stats
+from data_fetch.fetch_window import get_fetch_start_date
+from data_fetch.pipeline import run_pipeline
+from data_fetch.price_providers import format_provider_metrics, get_price_router
+from data_fetch.rate_limit import format_limiter_metrics, limited_call
+from data_fetch.run_journal import RunJournal
+from monitoring.metrics import count, log, reset_metrics, timer, write_metrics
+from data_fetch.normalize import PRICE_COLUMNS, PYKRX_PRICE_COLUMNS, frame_to_records
+from config.settings import (
+    KR_FETCH_MODE,
+    PRICE_STORE_MODE,
+    RUN_JOURNAL_ENABLED,
+    US_BATCH_SIZE,
+)
+
+import sys
+from datetime import datetime
+from functools import partial
+
+# ✅ pandas / yfinance / pykrx는 import 비용이 크므로 실제로 사용하는 함수 안에서 불러옴
+
+
+def get_latest_price_dates():
+    """기업별 마지막 주가 저장일을 한 번의 GROUP BY 쿼리로 조회 (parquet 모드는 저장소 기준)"""
+    if PRICE_STORE_MODE == "parquet":
+        return get_store_latest_dates("stock_prices")
+
+    session = get_session()
+    try:
+        return get_latest_dates(session, StockPrice, "company_id")
+    except Exception as e:
+        print(f"❌ 최신 주가 날짜 조회 실패: {e}")
+        return {}
+    finally:
+        session.close()
 
 
 def get_companies():
     """기업 정보를 가져옴"""
-    session = Session()
+    session = get_session()
     try:
         return session.query(Company.id, Company.symbol, Company.country).all()
     except Exception as e:
@@ -31,78 +62,65 @@ def get_companies():
         session.close()
 
 
-def fetch_us_stock_data(symbol):
-    """yfinance를 사용하여 미국 주식 데이터를 가져옴"""
-    try:
-        end_date = datetime.today().strftime("%Y-%m-%d")
-        start_date = (datetime.today() - timedelta(days=5 * 365)).strftime("%Y-%m-%d")
-
-        stock = yf.Ticker(symbol)
-        data = stock.history(start=start_date, end=end_date)  # 5년치 데이터 가져오기
+def get_kr_trading_days(start_date, end_date=None):
+    """pykrx 기준 start_date ~ end_date 사이의 한국 거래일 목록"""
+    import pandas as pd
+    from pykrx import stock
 
-        if data.empty:
-            print(f"⚠️ {symbol} 주가 데이터 없음")
-            return None
-
-        stock_data = []
-        for date, row in data.iterrows():
-            stock_data.append(
-                {
-                    "date": date.date(),
-                    "open_price": convert_nan_to_none(row["Open"]),
-                    "high_price": convert_nan_to_none(row["High"]),
-                    "low_price": convert_nan_to_none(row["Low"]),
-                    "close_price": convert_nan_to_none(row["Close"]),
-                    "adjusted_close_price": convert_nan_to_none(row["Close"]),
-                    "volume": convert_nan_to_none(row["Volume"]),
-                }
-            )
+    end_date = end_date or datetime.today().date()
+    days = limited_call(
+        "pykrx",
+        lambda: stock.get_previous_business_days(
+            fromdate=start_date.strftime("%Y%m%d"), todate=end_date.strftime("%Y%m%d")
+        ),
+    )
+    return [pd.Timestamp(day).date() for day in days]
+
+
+def fetch_kr_market_data(trade_date, companies):
+    """
+    pykrx로 특정 거래일의 전체 시장(KOSPI + KOSDAQ) OHLCV를 한 번에 가져와 종목별로 분배
+    (요청 실패는 예외로 전달해서 호출하는 쪽이 종목별 provider로 전환)
+    :param trade_date: 거래일
+    :param companies: [(company_id, symbol, start_date), ...]
+    :return: company_id가 포함된 주가 레코드 리스트 (데이터가 없으면 None)
+    """
+    from pykrx import stock
+
+    day = trade_date.strftime("%Y%m%d")
+    data = get_price_router().measure(
+        "pykrx",
+        lambda: cached_frame(
+            "pykrx",
+            "ohlcv",
+            {"date": day, "market": "ALL"},
+            lambda: stock.get_market_ohlcv(day, market="ALL"),
+        ),
+        symbols=len(companies),
+    )
 
-        return stock_data
-    except Exception as e:
-        print(f"❌ {symbol} 데이터 수집 실패: {e}")
+    if data.empty:
+        log(f"⚠️ {trade_date} 전체 시장 데이터 없음", level=2)
         return None
 
-
-def fetch_kr_stock_data(symbol):
-    """pykrx를 사용하여 한국 주식 데이터를 가져옴 (날짜 변환 처리)"""
-    try:
-        today = datetime.today().strftime("%Y%m%d")
-        start_date = (datetime.today() - timedelta(days=5 * 365)).strftime("%Y%m%d")
-
-        data = stock.get_market_ohlcv(start_date, today, symbol)
-
-        if data.empty:
-            print(f"⚠️ {symbol} 주가 데이터 없음")
-            return None
-
-        stock_data = []
-        for date, row in data.iterrows():
-            # ✅ 날짜 형식이 YYYY-MM-DD HH:MM:SS인 경우 자동 변환
-            if isinstance(date, str):
-                try:
-                    date_obj = datetime.strptime(date, "%Y%m%d").date()
-                except ValueError:
-                    date_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").date()
-            else:
-                date_obj = date.date()  # Timestamp 객체라면 변환
-
-            stock_data.append(
-                {
-                    "date": date_obj,
-                    "open_price": convert_nan_to_none(row["시가"]),
-                    "high_price": convert_nan_to_none(row["고가"]),
-                    "low_price": convert_nan_to_none(row["저가"]),
-                    "close_price": convert_nan_to_none(row["종가"]),
-                    "adjusted_close_price": convert_nan_to_none(row["종가"]),
-                    "volume": convert_nan_to_none(row["거래량"]),
-                }
-            )
-
-        return stock_data
-    except Exception as e:
-        print(f"❌ {symbol} 데이터 수집 실패: {e}")
-        return None
+    with timer("normalize"):
+        # ✅ 수집 범위에 해당하는 종목만 골라 symbol → company_id로 매핑
+        symbol_map = {
+            symbol: company_id
+            for company_id, symbol, start_date in companies
+            if start_date <= trade_date
+        }
+        frame = data[data.index.isin(list(symbol_map))].rename(
+            columns=PYKRX_PRICE_COLUMNS
+        )
+        frame = frame.assign(
+            date=trade_date,
+            adjusted_close_price=frame["close_price"],
+            company_id=frame.index.map(symbol_map),
+        )
+        records = frame_to_records(frame[["company_id"] + PRICE_COLUMNS])
+    count("rows", len(records), stage="fetch", provider="pykrx")
+    return records
 
 
 def company_exists(session, company_id):
@@ -110,96 +128,307 @@ def company_exists(session, company_id):
     return session.query(Company.id).filter_by(id=company_id).first() is not None
 
 
-def is_stock_data_already_stored(session, company_id, date):
-    """이미 해당 날짜의 주가 데이터가 저장되어 있는지 확인"""
-    return (
-        session.query(StockPrice.id).filter_by(company_id=company_id, date=date).first()
-        is not None
-    )
-
-
 def save_stock_data(company_id, stock_data):
-    """주가 데이터를 저장하며, 기존 데이터와 비교하여 다르면 업데이트"""
-    session = Session()
+    """
+    주가 데이터를 bulk upsert로 저장하며, 기존 데이터와 다른 행만 업데이트
+    (월 단위 체크섬이 저장된 값과 같은 달은 비교 / 쓰기 생략)
+    """
+    session = get_session()
     try:
         # company_id 검증
         if not company_exists(session, company_id):
             print(f"❌ 유효하지 않은 company_id: {company_id}")
-            return
-
-        today = datetime.today().date()  # 오늘 날짜
+            return None
 
-        for data in stock_data:
-            existing_entry = (
-                session.query(StockPrice)
-                .filter_by(company_id=company_id, date=data["date"])
-                .first()
+        # ✅ 월 블록 해시가 같은 달은 건너뛰고, 나머지만 (company_id, date) 기준으로 배치 upsert
+        records = [{"company_id": company_id, **data} for data in stock_data]
+        with timer("checksum", table="stock_prices"):
+            records, skipped, checksums = split_unchanged_months(
+                session, company_id, records
             )
-
-            if existing_entry:
-                # ✅ 과거 데이터의 종가(close_price) 또는 거래량(volume)이 다르면 업데이트 수행
-                if (
-                    existing_entry.close_price != data["close_price"]
-                    or existing_entry.volume != data["volume"]
-                ):
-                    existing_entry.open_price = data["open_price"]
-                    existing_entry.high_price = data["high_price"]
-                    existing_entry.low_price = data["low_price"]
-                    existing_entry.close_price = data["close_price"]
-                    existing_entry.adjusted_close_price = data["adjusted_close_price"]
-                    existing_entry.volume = data["volume"]
-                    print(
-                        f"🔄 {company_id} {data['date']} 주가 데이터 업데이트 (변경 감지)"
-                    )
-
-                else:
-                    print(
-                        f"⚠️ {company_id} {data['date']} 기존 데이터와 동일, 업데이트 건너뜀"
-                    )
-
-            else:
-                # ✅ 새로운 데이터라면 INSERT 수행
-                new_price = StockPrice(
-                    company_id=company_id,
-                    date=data["date"],
-                    open_price=data["open_price"],
-                    high_price=data["high_price"],
-                    low_price=data["low_price"],
-                    close_price=data["close_price"],
-                    adjusted_close_price=data["adjusted_close_price"],
-                    volume=data["volume"],
-                )
-                session.add(new_price)
-
-        session.commit()
-        print(f"✅ {company_id} 주가 데이터 저장 완료")
+        count("rows", skipped, table="stock_prices", result="checksum_skipped")
+        changed = []
+        result = bulk_upsert(
+            session,
+            StockPrice,
+            records,
+            key_columns=("company_id", "date"),
+            changed_keys=changed,
+        )
+        result["unchanged"] += skipped
+        record_changes(session, "stock_prices", changed)
+        save_checksums(session, checksums)
+
+        with timer("write", table="stock_prices"):
+            session.commit()
+        log(
+            f"✅ {company_id} 주가 데이터 저장 완료 "
+            f"(신규 {result['inserted']}, 업데이트 {result['updated']}, 동일 {result['unchanged']})",
+            level=2,
+        )
+        return result
     except Exception as e:
         session.rollback()
         print(f"❌ 데이터 저장 실패: {e}")
+        return None
     finally:
         session.close()
 
 
-def update_stock_data():
-    """기업 리스트를 불러와 주가 데이터를 수집하고 저장"""
-    companies = get_companies()
+def save_market_stock_data(trade_date, stock_data):
+    """거래일 단위 전체 시장 주가 데이터(여러 company_id)를 한 번의 bulk upsert로 저장"""
+    session = get_session()
+    try:
+        changed = []
+        result = bulk_upsert(
+            session,
+            StockPrice,
+            stock_data,
+            key_columns=("company_id", "date"),
+            changed_keys=changed,
+        )
+        record_changes(session, "stock_prices", changed)
+        # ✅ 바뀐 달은 다음 종목별 저장에서 체크섬 대신 기존 값과 다시 비교
+        invalidate_checksums(session, changed)
+
+        with timer("write", table="stock_prices"):
+            session.commit()
+        log(
+            f"✅ {trade_date} 전체 시장 주가 데이터 저장 완료 "
+            f"(신규 {result['inserted']}, 업데이트 {result['updated']}, 동일 {result['unchanged']})",
+            level=2,
+        )
+        return result
+    except Exception as e:
+        session.rollback()
+        print(f"❌ {trade_date} 데이터 저장 실패: {e}")
+        return None
+    finally:
+        session.close()
 
-    for company in companies:
-        company_id, symbol, country = company
 
-        if country == "US":
-            stock_data = fetch_us_stock_data(symbol)
-        elif country == "KR":
-            stock_data = fetch_kr_stock_data(symbol)
+def save_fetch_result(key, stock_data, store_writer=None):
+    """
+    파이프라인 저장 단계: company_id 키는 종목별 저장, 거래일 키는 전체 시장 저장
+    :param store_writer: PriceStoreWriter (PRICE_STORE_MODE가 both / parquet일 때 Parquet 저장소에도 기록)
+    :return: bulk_upsert 결과 (parquet 모드는 기록한 행 수), 저장 실패 시 None
+    """
+    if store_writer is not None:
+        records = stock_data
+        if isinstance(key, int):
+            records = [{"company_id": key, **data} for data in stock_data]
+        store_writer.add(records)
+        if PRICE_STORE_MODE == "parquet":
+            # ✅ 저장소는 기존 값과 비교하지 않으므로 기록한 전체 기간을 변경으로 기록
+            with session_scope() as session:
+                record_changes(
+                    session,
+                    "stock_prices",
+                    [(data["company_id"], data["date"]) for data in records],
+                )
+            return len(records)
+
+    if isinstance(key, int):
+        return save_stock_data(key, stock_data)
+    return save_market_stock_data(key, stock_data)
+
+
+def fetch_company_stock_data(job):
+    """
+    파이프라인 fetch 단계: (구분, [(company_id, symbol, start_date), ...], 거래일)
+    → [(company_id 또는 거래일, 주가 데이터), ...]
+    (종목별 provider 선택 / 실패 시 전환은 가격 provider 라우터가 담당)
+    """
+    country, companies, trade_date = job
+    router = get_price_router()
+
+    if country == "KR_DATE":
+        # ✅ 거래일 하나에 대해 전체 시장을 한 번에 조회
+        try:
+            stock_data = fetch_kr_market_data(trade_date, companies)
+        except Exception as e:
+            count("failovers", provider="pykrx")
+            log(f"❌ {trade_date} 전체 시장 수집 실패, 종목별 provider로 전환: {e}")
         else:
+            return [(trade_date, stock_data)] if stock_data else []
+
+        results = []
+        for company_id, symbol, start_date in companies:
+            if start_date > trade_date:
+                continue
+            stock_data = router.fetch(
+                symbol, "KR", trade_date, trade_date, exclude=("pykrx",)
+            )
+            if stock_data:
+                results.append((company_id, stock_data))
+        return results
+
+    if country == "US":
+        # ✅ 미국 종목은 묶음 단위로 한 번에 다운로드 (누락 종목은 종목별로 다른 provider 사용)
+        batch = router.fetch_batch(
+            [(symbol, start_date) for _, symbol, start_date in companies], "US"
+        )
+        results = []
+        for company_id, symbol, _ in companies:
+            if symbol in batch:
+                results.append((company_id, batch[symbol]))
+            else:
+                count("symbols", stage="fetch", result="missing")
+                log(f"⚠️ {symbol} 주가 데이터 없음, 저장 건너뜀", level=2)
+        return results
+
+    if country == "KR":
+        results = []
+        for company_id, symbol, start_date in companies:
+            stock_data = router.fetch(symbol, "KR", start_date)
+            if stock_data:
+                results.append((company_id, stock_data))
+            else:
+                count("symbols", stage="fetch", result="missing")
+                log(f"⚠️ {symbol} 주가 데이터 없음, 저장 건너뜀", level=2)
+        return results
+
+    print(f"⚠️ 지원되지 않는 국가: {country}")
+    return []
+
+
+def build_fetch_jobs(companies, latest_dates, us_batch_size=None, kr_fetch_mode=None):
+    """
+    수집 작업 생성
+    - 미국: 시작일 순으로 정렬 후 US_BATCH_SIZE개씩 묶음 (비슷한 기간끼리 묶이도록)
+    - 한국: 저장된 이력이 있는 종목은 누락 거래일별 전체 시장 작업(by_date),
+            신규 종목은 종목별 전체 기간 작업(by_ticker)
+    """
+    us_batch_size = us_batch_size or US_BATCH_SIZE
+    kr_fetch_mode = kr_fetch_mode or KR_FETCH_MODE
+
+    # ✅ 기존 종목은 마지막 저장일 이후만, 신규 종목은 전체 기간 수집
+    targets = {"US": [], "KR": []}
+    for company_id, symbol, country in companies:
+        if country not in targets:
             print(f"⚠️ 지원되지 않는 국가: {country}")
             continue
+        start_date = get_fetch_start_date(latest_dates.get(company_id))
+        targets[country].append((company_id, symbol, start_date))
+
+    us_companies = sorted(targets["US"], key=lambda item: item[2])
+    jobs = [
+        ("US", us_companies[i : i + us_batch_size], None)
+        for i in range(0, len(us_companies), us_batch_size)
+    ]
+
+    kr_existing = [item for item in targets["KR"] if item[0] in latest_dates]
+    kr_new = [item for item in targets["KR"] if item[0] not in latest_dates]
+
+    # ✅ 전체 시장 조회는 pykrx만 지원 (라우팅 대상이 아니거나 쿨다운 중이면 종목별 조회)
+    trading_days = []
+    if (
+        kr_existing
+        and kr_fetch_mode != "by_ticker"
+        and get_price_router().available("pykrx")
+    ):
+        trading_days = get_kr_trading_days(min(item[2] for item in kr_existing))
+        if kr_fetch_mode == "auto" and len(trading_days) >= len(kr_existing):
+            trading_days = []  # ✅ 거래일 수가 더 많으면 종목별 조회가 유리
+
+    if trading_days:
+        jobs += [("KR_DATE", kr_existing, day) for day in trading_days]
+    else:
+        kr_new = targets["KR"]
+    jobs += [("KR", [item], None) for item in kr_new]
+    return jobs
+
+
+def journal_items(job):
+    """작업의 실행 일지 항목 (종목 코드, 전체 시장 작업은 거래일)"""
+    country, companies, trade_date = job
+    if country == "KR_DATE":
+        return [f"KR_DATE:{trade_date}"]
+    return [symbol for _, symbol, _ in companies]
+
+
+def select_journal_jobs(jobs, journal, retry_failed=False):
+    """실행 일지 기준으로 이번 실행에서 수집할 작업만 남김 (완료한 종목 / 거래일 제외)"""
+    selected = journal.select(
+        [item for job in jobs for item in journal_items(job)], retry_failed
+    )
+    remaining = []
+    for country, companies, trade_date in jobs:
+        if country == "KR_DATE":
+            if journal_items((country, companies, trade_date))[0] in selected:
+                remaining.append((country, companies, trade_date))
+            continue
+        companies = [item for item in companies if item[1] in selected]
+        if companies:
+            remaining.append((country, companies, trade_date))
+    return remaining
+
+
+def update_stock_data(fetch_workers=None, write_workers=None, retry_failed=False):
+    """
+    기업 리스트를 불러와 fetch 워커 풀로 주가 데이터를 수집하고 writer 워커로 저장
+    (같은 날 다시 실행하면 실행 일지 기준으로 완료한 종목은 건너뛰고 이어서 수집)
+    :param retry_failed: True면 오늘 실행에서 실패한 종목 / 거래일만 다시 수집
+    """
+    reset_metrics()
+    companies = get_companies()
+    latest_dates = get_latest_price_dates()
 
-        if stock_data:
-            save_stock_data(company_id, stock_data)
-        else:
-            print(f"⚠️ {symbol} 주가 데이터 없음, 저장 건너뜀")
+    # ✅ parquet 모드는 저장소에 기록하기 전(버퍼)에 완료로 기록될 수 있어 일지를 사용하지 않음
+    journal = RunJournal(
+        "update_stock_data",
+        enabled=RUN_JOURNAL_ENABLED and PRICE_STORE_MODE != "parquet",
+    )
+    jobs = select_journal_jobs(
+        build_fetch_jobs(companies, latest_dates), journal, retry_failed
+    )
+    # ✅ Parquet 저장소 기록 (country/year 파티션을 위해 company_id → 국가 매핑 전달)
+    store_writer = None
+    if PRICE_STORE_MODE in ("both", "parquet"):
+        store_writer = PriceStoreWriter(
+            "stock_prices",
+            {company_id: country for company_id, _, country in companies},
+        )
+
+    symbols = {company_id: symbol for company_id, symbol, _ in companies}
+    fetch_fn, save_fn = journal.wrap_pipeline(
+        fetch_company_stock_data,
+        partial(save_fetch_result, store_writer=store_writer),
+        job_items=journal_items,
+        # ✅ 전체 시장 작업이 종목별 provider로 전환되어도 거래일 항목으로 기록
+        result_item=lambda job, key: (
+            journal_items(job)[0] if job[0] == "KR_DATE" else symbols[key]
+        ),
+        empty_ok=lambda item: item.startswith("KR_DATE:"),  # 휴장일
+    )
+
+    stats = run_pipeline(
+        jobs,
+        fetch_fn,
+        save_fn,
+        fetch_workers=fetch_workers,
+        write_workers=write_workers,
+    )
+    if store_writer is not None:
+        store_writer.flush()
+        compacted = compact_store("stock_prices")
+        print(
+            f"🗂️ Parquet 저장소 기록 {store_writer.written}행 (파티션 {compacted}개 정리)"
+        )
+    print(
+        f"🎉 주가 데이터 업데이트 완료: 작업 {stats['jobs']}개, 저장 {stats['saved']}건, "
+        f"수집 실패 {stats['fetch_failed']}건, 저장 실패 {stats['save_failed']}건"
+    )
+    print(f"📦 {format_cache_stats()}")
+    print(format_limiter_metrics())
+    print(format_provider_metrics())
+    journal.finish()
+    journal.close()
+    for name, value in stats.items():
+        count("jobs", value, result=name)
+    write_metrics("update_stock_data")
+    return stats
 
 
 if __name__ == "__main__":
-    update_stock_data()
+    update_stock_data(retry_failed="--retry-failed" in sys.argv[1:])
@@ -1,11 +1,11 @@
 import pandas as pd
-from pykrx import stock
+from data_fetch.rate_limit import limited_call
 
 
 def get_sp500_tickers():
     """S&P 500 티커 리스트 가져오기"""
     url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    tables = pd.read_html(url)
+    tables = limited_call("wikipedia", lambda: pd.read_html(url))
     df = tables[0]
     df.to_csv("data/sp500_tickers.csv", index=False)
     print(f"✅ S&P 500 티커 리스트 저장 완료! ({len(df)}개)")
@@ -14,7 +14,7 @@ def get_sp500_tickers():
 def get_nasdaq_tickers():
     """NASDAQ 전체 티커 리스트 가져오기"""
     url = "ftp://ftp.nasdaqtrader.com/SymbolDirectory/nasdaqlisted.txt"
-    df = pd.read_csv(url, sep="|")
+    df = limited_call("nasdaqtrader", lambda: pd.read_csv(url, sep="|"))
     df.to_csv("data/nasdaq_tickers.csv", index=False)
     print(f"✅ NASDAQ 티커 리스트 저장 완료! ({len(df)}개)")
 
@@ -22,18 +22,24 @@ def get_nasdaq_tickers():
 def get_nyse_tickers():
     """NYSE 전체 티커 리스트 가져오기"""
     url = "ftp://ftp.nasdaqtrader.com/SymbolDirectory/otherlisted.txt"
-    df = pd.read_csv(url, sep="|")
+    df = limited_call("nasdaqtrader", lambda: pd.read_csv(url, sep="|"))
     df.to_csv("data/nyse_tickers.csv", index=False)
     print(f"✅ NYSE 티커 리스트 저장 완료! ({len(df)}개)")
 
 
 def get_kospi_tickers():
     """KOSPI 종목 리스트 가져오기"""
-    tickers = stock.get_market_ticker_list(market="KOSPI")
+    from pykrx import stock  # ✅ import 비용이 크므로 실행 시점에 불러옴
+
+    tickers = limited_call(
+        "pykrx", lambda: stock.get_market_ticker_list(market="KOSPI")
+    )
     df = pd.DataFrame({"Symbol": tickers})
 
     # ✅ 기업명 추가 (KRX에서 제공)
-    df["Name"] = df["Symbol"].apply(lambda x: stock.get_market_ticker_name(x))
+    df["Name"] = df["Symbol"].apply(
+        lambda x: limited_call("pykrx", lambda: stock.get_market_ticker_name(x))
+    )
 
     # ✅ CSV 저장
     df.to_csv("data/kospi_tickers.csv", index=False)
@@ -42,11 +48,17 @@ def get_kospi_tickers():
 
 def get_kosdaq_tickers():
     """KOSDAQ 종목 리스트 가져오기"""
-    tickers = stock.get_market_ticker_list(market="KOSDAQ")
+    from pykrx import stock  # ✅ import 비용이 크므로 실행 시점에 불러옴
+
+    tickers = limited_call(
+        "pykrx", lambda: stock.get_market_ticker_list(market="KOSDAQ")
+    )
     df = pd.DataFrame({"Symbol": tickers})
 
     # ✅ 기업명 추가 (KRX에서 제공)
-    df["Name"] = df["Symbol"].apply(lambda x: stock.get_market_ticker_name(x))
+    df["Name"] = df["Symbol"].apply(
+        lambda x: limited_call("pykrx", lambda: stock.get_market_ticker_name(x))
+    )
 
     # ✅ CSV 저장
     df.to_csv("data/kosdaq_tickers.csv", index=False)
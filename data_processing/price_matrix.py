@@ -0,0 +1,302 @@
+import io
+import json
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from config.settings import INCREMENTAL_OVERLAP_DAYS, PRICE_MATRIX_DIR
+from database.change_log import advance_cursor, purge_changes, read_changes
+from database.db_connection import session_scope
+from database.queries import load_price_frame
+
+# ✅ 거래일 × company_id 밀집 행렬 (memory-mapped .npy)
+# - {PRICE_MATRIX_DIR}/{필드}.npy: float64 (데이터가 없는 칸은 NaN), C-order
+# - {PRICE_MATRIX_DIR}/index.json: 날짜 축 / company_id 축
+# - 새 거래일은 파일 끝에 행을 추가하고 .npy 헤더의 shape만 갱신 (전체 재작성 없음)
+#   → 다른 프로세스가 열어 둔 memmap은 그대로 유효하고, 복사 없이 페이지 캐시를 공유
+# - 신규 종목(열 추가)이나 중간 날짜 추가는 전체 재생성
+# - 겹침 기간보다 오래된 주가 변경은 변경 이력(data_changes)으로 찾아서 제자리 갱신
+
+# ✅ 변경 이력 consumer 이름
+CHANGE_CONSUMER = "price_matrix"
+
+# ✅ 행렬 필드 → stock_prices 컬럼
+MATRIX_FIELDS = {"adjusted_close": "adjusted_close_price", "volume": "volume"}
+
+_INDEX_FILE = "index.json"
+
+
+def _field_path(directory, field):
+    return os.path.join(directory, f"{field}.npy")
+
+
+def load_price_rows(start=None):
+    """
+    (company_id, date, adjusted_close_price, volume) 행 조회
+    - PRICE_STORE_MODE가 db면 MySQL, 그 외에는 Parquet 저장소에서 읽음
+    :param start: 이 날짜 이후만 조회 (None이면 전체)
+    """
+    return load_price_frame(list(MATRIX_FIELDS.values()), start=start)
+
+
+def _read_index(directory):
+    path = os.path.join(directory, _INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    return {
+        "dates": np.array(index["dates"], dtype="datetime64[D]"),
+        "company_ids": np.array(index["company_ids"], dtype=np.int64),
+    }
+
+
+def _write_index(directory, dates, company_ids):
+    """index.json을 임시 파일에 쓴 뒤 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)"""
+    path = os.path.join(directory, _INDEX_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "dates": [str(day) for day in dates],
+                "company_ids": [int(company_id) for company_id in company_ids],
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            f,
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+def _positions(rows, dates, company_ids):
+    """행 목록의 (날짜 위치, 종목 위치) 배열 (rows의 날짜/종목은 모두 축에 있어야 함)"""
+    date_pos = np.searchsorted(dates, rows["date"].to_numpy())
+    company_pos = np.searchsorted(company_ids, rows["company_id"].to_numpy())
+    return date_pos, company_pos
+
+
+def _write_full(directory, rows):
+    """전체 행으로 행렬을 새로 만들어 교체"""
+    dates = np.unique(rows["date"].to_numpy())
+    company_ids = np.unique(rows["company_id"].to_numpy().astype(np.int64))
+    date_pos, company_pos = _positions(rows, dates, company_ids)
+
+    for field, column in MATRIX_FIELDS.items():
+        path = _field_path(directory, field)
+        matrix = np.lib.format.open_memmap(
+            f"{path}.tmp",
+            mode="w+",
+            dtype=np.float64,
+            shape=(len(dates), len(company_ids)),
+        )
+        matrix[:] = np.nan
+        matrix[date_pos, company_pos] = rows[column].to_numpy()
+        matrix.flush()
+        del matrix
+        os.replace(f"{path}.tmp", path)
+
+    _write_index(directory, dates, company_ids)
+    return len(dates), len(company_ids)
+
+
+def _append_rows(path, new_rows, expected_rows):
+    """
+    C-order .npy 파일 끝에 행을 추가하고 헤더의 shape만 갱신
+    :param expected_rows: index.json 기준 현재 행 수 (파일과 다르면 갱신하지 않음)
+    :return: 제자리 갱신이 불가능하면 False (헤더 길이 변경, 이전 갱신 중단 등)
+    """
+    npy = np.lib.format
+    with open(path, "r+b") as f:
+        version = npy.read_magic(f)
+        if version == (1, 0):
+            read_header, write_header = (
+                npy.read_array_header_1_0,
+                npy.write_array_header_1_0,
+            )
+        elif version == (2, 0):
+            read_header, write_header = (
+                npy.read_array_header_2_0,
+                npy.write_array_header_2_0,
+            )
+        else:
+            return False
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+
+        # ✅ numpy는 0번 축이 커질 것을 대비해 헤더에 여유 공간을 두므로 보통 길이가 같음
+        header = io.BytesIO()
+        write_header(
+            header,
+            {
+                "descr": npy.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": (shape[0] + new_rows.shape[0], shape[1]),
+            },
+        )
+        if fortran_order or shape[0] != expected_rows or header.tell() != offset:
+            return False
+
+        # ✅ 데이터를 먼저 쓰고 헤더를 마지막에 갱신 (중간에 여는 쪽은 이전 shape를 봄)
+        f.seek(offset + shape[0] * shape[1] * dtype.itemsize)
+        f.write(np.ascontiguousarray(new_rows, dtype=dtype).tobytes())
+        f.flush()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+
+def _advance(last_id):
+    with session_scope() as session:
+        advance_cursor(session, CHANGE_CONSUMER, last_id)
+        purge_changes(session)
+
+
+def build_price_matrix(directory=None, full=False):
+    """
+    stock_prices를 거래일 × company_id 행렬로 만들거나 증분 갱신
+    - 기존 행렬이 있으면 마지막 날짜 - INCREMENTAL_OVERLAP_DAYS 이후 행
+      (그보다 이른 주가 변경 이력이 있으면 그 날짜 이후 행)만 읽어서
+      새 거래일은 끝에 추가, 겹치는 날짜는 제자리 갱신
+    :param full: True면 항상 전체 재생성
+    :return: {"mode": "full"/"incremental", "dates", "companies", "rows", "seconds"}
+    """
+    directory = directory or PRICE_MATRIX_DIR
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    with session_scope() as session:
+        changes, last_id = read_changes(session, CHANGE_CONSUMER, ["stock_prices"])
+
+    index = None if full else _read_index(directory)
+    if index is not None and not all(
+        os.path.exists(_field_path(directory, field)) for field in MATRIX_FIELDS
+    ):
+        index = None
+
+    if index is None or len(index["dates"]) == 0:
+        rows = load_price_rows()
+        n_dates, n_companies = _write_full(directory, rows)
+        _advance(last_id)
+        return {
+            "mode": "full",
+            "dates": n_dates,
+            "companies": n_companies,
+            "rows": len(rows),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    dates, company_ids = index["dates"], index["company_ids"]
+    last_date = dates[-1].astype(object)
+    start = last_date - timedelta(days=INCREMENTAL_OVERLAP_DAYS)
+    if changes is not None:
+        changed = [change_start for change_start, _ in changes["stock_prices"].values()]
+        start = min(changed + [start])
+    rows = load_price_rows(start=start)
+
+    row_dates = np.unique(rows["date"].to_numpy())
+    new_dates = np.setdiff1d(row_dates, dates)
+    new_companies = np.setdiff1d(rows["company_id"].to_numpy(), company_ids)
+
+    # ✅ 신규 종목(열 추가) 또는 기존 마지막 날짜 이전 날짜 추가 → 전체 재생성
+    if len(new_companies) or (len(new_dates) and new_dates[0] <= dates[-1]):
+        return build_price_matrix(directory, full=True)
+
+    # ✅ 새 거래일 행 추가 (헤더 제자리 갱신이 불가능하면 전체 재생성)
+    if len(new_dates):
+        blank = np.full((len(new_dates), len(company_ids)), np.nan)
+        for field in MATRIX_FIELDS:
+            if not _append_rows(_field_path(directory, field), blank, len(dates)):
+                return build_price_matrix(directory, full=True)
+        dates = np.concatenate([dates, new_dates])
+
+    # ✅ 겹침 기간 + 새 거래일 값 기록
+    date_pos, company_pos = _positions(rows, dates, company_ids)
+    for field, column in MATRIX_FIELDS.items():
+        matrix = np.load(_field_path(directory, field), mmap_mode="r+")
+        matrix[date_pos, company_pos] = rows[column].to_numpy()
+        matrix.flush()
+        del matrix
+
+    _write_index(directory, dates, company_ids)
+    _advance(last_id)
+    return {
+        "mode": "incremental",
+        "dates": len(dates),
+        "companies": len(company_ids),
+        "rows": len(rows),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class PriceMatrix:
+    """memory-mapped 가격 행렬 읽기 (여러 프로세스가 복사 없이 공유)"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or PRICE_MATRIX_DIR
+        index = _read_index(self.directory)
+        if index is None:
+            raise FileNotFoundError(
+                f"가격 행렬이 없습니다: {self.directory} (build_price_matrix()를 먼저 실행하세요)"
+            )
+        self.dates = index["dates"]
+        self.company_ids = index["company_ids"]
+        self._fields = {}
+
+    def field(self, name):
+        """필드 행렬 (읽기 전용 memmap, shape: 날짜 수 × 종목 수)"""
+        if name not in self._fields:
+            matrix = np.load(_field_path(self.directory, name), mmap_mode="r")
+            # ✅ 갱신 중에 열린 경우를 위해 인덱스 길이에 맞춰 자름
+            self._fields[name] = matrix[: len(self.dates), : len(self.company_ids)]
+        return self._fields[name]
+
+    def columns_for(self, company_ids):
+        """company_id 목록 → 열 위치 배열 (행렬에 없는 종목은 제외)"""
+        company_ids = np.asarray(company_ids, dtype=np.int64)
+        positions = np.searchsorted(self.company_ids, company_ids)
+        positions = np.clip(positions, 0, len(self.company_ids) - 1)
+        return positions[self.company_ids[positions] == company_ids]
+
+    def rows_between(self, start=None, end=None):
+        """날짜 구간 [start, end]에 해당하는 행 slice"""
+        lo = (
+            0
+            if start is None
+            else np.searchsorted(self.dates, np.datetime64(start, "D"))
+        )
+        hi = (
+            len(self.dates)
+            if end is None
+            else np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        )
+        return slice(lo, hi)
+
+    def frame(self, name, start=None, end=None, company_ids=None):
+        """필드 행렬 일부를 DataFrame으로 변환 (index: 날짜, columns: company_id)"""
+        import pandas as pd
+
+        rows = self.rows_between(start, end)
+        matrix = self.field(name)[rows]
+        ids = self.company_ids
+        if company_ids is not None:
+            columns = self.columns_for(company_ids)
+            matrix, ids = matrix[:, columns], ids[columns]
+        return pd.DataFrame(
+            matrix, index=pd.DatetimeIndex(self.dates[rows]), columns=ids
+        )
+
+
+def open_price_matrix(directory=None):
+    """가격 행렬 열기 (파일을 읽지 않고 memmap만 생성하므로 즉시 반환)"""
+    return PriceMatrix(directory)
+
+
+if __name__ == "__main__":
+    stats = build_price_matrix()
+    print(
+        f"✅ 가격 행렬 {stats['mode']} 갱신: {stats['dates']}일 × {stats['companies']}종목 "
+        f"({stats['rows']}행 반영, {stats['seconds']}초)"
+    )
+    started = time.perf_counter()
+    matrix = open_price_matrix()
+    matrix.field("adjusted_close")
+    print(f"📂 행렬 열기: {(time.perf_counter() - started) * 1000:.1f}ms")
@@ -1 +1,93 @@
+import numpy as np
+from sqlalchemy import select
 
+from database.db_connection import get_engine
+from database.models import FinancialStatement
+
+# ✅ 재무제표 일괄 조회 / 정규화 (재무 비율, 밸류에이션 계산에서 공통으로 사용)
+# - financial_statements 전체를 한 번의 쿼리로 읽어서 float64 컬럼의 DataFrame으로 변환
+# - 결측은 NaN으로 유지하고, 나눗셈은 safe_ratio()로 분모가 양수일 때만 계산
+
+# ✅ 금액 컬럼 (company_id, report_date 제외)
+AMOUNT_COLUMNS = [
+    column.name
+    for column in FinancialStatement.__table__.columns
+    if column.name not in ("id", "company_id", "report_date")
+]
+
+
+def safe_ratio(numerator, denominator, scale=1.0):
+    """
+    분모가 양수일 때만 numerator / denominator * scale (0 / 음수 / 결측 → NaN)
+    배열 전체를 한 번에 처리 (행 단위 분기 없음)
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator * scale, np.nan)
+
+
+def round_decimal(values, limit=1e8):
+    """DECIMAL(10, 2) 컬럼용: 소수점 둘째 자리 반올림, 절댓값이 limit 이상이면 NaN"""
+    values = np.round(np.asarray(values, dtype=np.float64), 2)
+    values[np.abs(values) >= limit] = np.nan
+    return values
+
+
+def prepare_financial_statements(frame, columns=None):
+    """
+    재무제표 DataFrame 정규화
+    - company_id: int64, report_date: datetime64[ns], 금액 컬럼: float64
+    - fiscal_year(보고서 기준일 연도) 추가, (company_id, report_date) 순 정렬
+    """
+    import pandas as pd
+
+    columns = AMOUNT_COLUMNS if columns is None else list(columns)
+    frame = frame[["company_id", "report_date"] + columns].copy()
+    frame["company_id"] = frame["company_id"].astype("int64")
+    frame["report_date"] = pd.to_datetime(frame["report_date"]).astype("datetime64[ns]")
+    for name in columns:
+        frame[name] = pd.to_numeric(frame[name], errors="coerce").astype("float64")
+    frame["fiscal_year"] = frame["report_date"].dt.year.astype("int64")
+    return frame.sort_values(["company_id", "report_date"]).reset_index(drop=True)
+
+
+def load_financial_statements(columns=None, company_ids=None):
+    """
+    financial_statements 전체(또는 일부 기업)를 한 번에 조회
+    :param columns: 읽을 금액 컬럼 (기본값: 전체)
+    :param company_ids: 조회할 기업 ID 목록 (None이면 전체)
+    :return: prepare_financial_statements() 결과
+    """
+    import pandas as pd
+
+    columns = AMOUNT_COLUMNS if columns is None else list(columns)
+    query = select(
+        FinancialStatement.company_id,
+        FinancialStatement.report_date,
+        *[getattr(FinancialStatement, name) for name in columns],
+    )
+    if company_ids is not None:
+        query = query.where(
+            FinancialStatement.company_id.in_([int(i) for i in company_ids])
+        )
+    with get_engine().connect() as connection:
+        frame = pd.read_sql(query, connection, coerce_float=True)
+    return prepare_financial_statements(frame, columns)
+
+
+def previous_year(frame, column):
+    """
+    종목별 직전 회계연도 값 (groupby shift, 연도가 연속되지 않으면 NaN)
+    frame은 (company_id, report_date) 순으로 정렬되어 있어야 함
+    """
+    grouped = frame.groupby("company_id", sort=False)
+    previous = grouped[column].shift(1)
+    consecutive = grouped["fiscal_year"].shift(1) == frame["fiscal_year"] - 1
+    return previous.where(consecutive)
+
+
+def growth_rate(frame, column):
+    """전년 대비 증가율(%) (직전 연도 값이 양수일 때만 계산)"""
+    previous = previous_year(frame, column)
+    return safe_ratio(frame[column] - previous, previous, scale=100)
@@ -1 +1,151 @@
+import time
 
+from database.change_log import advance_cursor, purge_changes, read_changes
+from database.db_connection import session_scope
+from database.models import FinancialRatio
+from database.upsert import bulk_upsert
+from data_fetch.normalize import frame_to_records
+from data_processing.process_financials import (
+    growth_rate,
+    load_financial_statements,
+    round_decimal,
+    safe_ratio,
+)
+
+# ✅ 재무 비율 일괄 계산
+# - financial_statements 전체를 한 번에 읽어 모든 비율을 컬럼 단위 벡터 연산으로 계산
+# - 비율(%)은 100을 곱해 저장, 배율 / 회전율은 그대로 저장
+# - 분모가 0 이하 / 결측이면 NaN → DB에는 NULL (행 단위 분기 없음)
+# - 성장성 지표는 종목별 groupby shift로 직전 회계연도와 비교 (연도가 비면 NULL)
+# - inventory_turnover는 재고자산 데이터가 없어 계산하지 않음
+# - 평소에는 financial_statements 변경 이력에 있는 기업만 재계산
+
+# ✅ 변경 이력 consumer 이름
+CHANGE_CONSUMER = "financial_ratios"
+
+# ✅ (컬럼명, 분자, 분모, 배수) — 분자 / 분모 × 배수
+RATIO_FORMULAS = [
+    # 안정성 지표
+    ("current_ratio", "current_assets", "current_liabilities", 100),
+    ("cash_ratio", "cash_equivalents", "current_liabilities", 100),
+    ("debt_ratio", "total_liabilities", "total_equity", 100),
+    ("working_capital_ratio", "working_capital", "total_assets", 100),
+    ("equity_ratio", "total_equity", "total_assets", 100),
+    ("debt_dependency", "total_debt", "total_assets", 100),
+    ("interest_coverage", "operating_income", "interest_expense", 1),
+    # 수익성 지표
+    ("gross_margin", "gross_profit", "revenue", 100),
+    ("ros", "net_income", "revenue", 100),
+    ("roa", "operating_income", "total_assets", 100),
+    ("roe", "net_income", "total_equity", 100),
+    # 활동성 지표
+    ("asset_turnover", "revenue", "total_assets", 1),
+    ("equity_turnover", "revenue", "total_equity", 1),
+]
+
+# ✅ (컬럼명, 전년 대비 증가율을 구할 재무제표 컬럼)
+GROWTH_FORMULAS = [
+    ("revenue_growth", "revenue"),
+    ("asset_growth", "total_assets"),
+    ("equity_growth", "total_equity"),
+]
+
+# ✅ 이 엔진이 계산해서 저장하는 financial_ratios 컬럼
+RATIO_COLUMNS = tuple(
+    [name for name, *_ in RATIO_FORMULAS]
+    + [name for name, _ in GROWTH_FORMULAS]
+    + ["sustainable_growth"]
+)
+
+
+def compute_ratios(statements):
+    """
+    재무제표 전체로 재무 비율을 일괄 계산
+    :param statements: prepare_financial_statements() 결과 (전체 금액 컬럼 포함)
+    :return: (company_id, fiscal_year, RATIO_COLUMNS...) DataFrame
+             (회계연도에 보고서가 여러 건이면 마지막 보고서 기준)
+    """
+    import pandas as pd
+
+    frame = statements.drop_duplicates(["company_id", "fiscal_year"], keep="last")
+    frame = frame.assign(
+        working_capital=frame["current_assets"] - frame["current_liabilities"]
+    )
+
+    ratios = {
+        "company_id": frame["company_id"].to_numpy(),
+        "fiscal_year": frame["fiscal_year"].to_numpy(),
+    }
+    for name, numerator, denominator, scale in RATIO_FORMULAS:
+        ratios[name] = safe_ratio(frame[numerator], frame[denominator], scale)
+
+    # ✅ 성장성 지표: 종목별 직전 회계연도 대비 증가율
+    for name, column in GROWTH_FORMULAS:
+        ratios[name] = growth_rate(frame, column)
+
+    # ✅ 지속가능성장률 = ROE × 유보율 (1 - 배당성향)
+    ratios["sustainable_growth"] = ratios["roe"] * (
+        1 - frame["dividend_payout_ratio"].to_numpy() / 100
+    )
+
+    for name in RATIO_COLUMNS:
+        ratios[name] = round_decimal(ratios[name])
+    result = pd.DataFrame(ratios)
+    return result.dropna(how="all", subset=list(RATIO_COLUMNS)).reset_index(drop=True)
+
+
+def save_ratios(session, frame):
+    """재무 비율을 (company_id, fiscal_year) 기준 bulk upsert (커밋은 호출하는 쪽에서 수행)"""
+    return bulk_upsert(
+        session,
+        FinancialRatio,
+        frame_to_records(frame),
+        key_columns=("company_id", "fiscal_year"),
+        update_columns=RATIO_COLUMNS,
+    )
+
+
+def update_financial_ratios(full=False):
+    """
+    financial_statements 변경분으로 financial_ratios를 다시 계산해서 저장
+    - 변경 이력(data_changes)에 기록된 기업만 전체 회계연도를 재계산 (성장률은 전년 값이 필요)
+    - 처음 실행하거나 full=True면 전체 기업 재계산
+    :return: {"companies", "statements", "ratios", "inserted", "updated", "seconds"}
+    """
+    started = time.perf_counter()
+    with session_scope() as session:
+        changes, last_id = read_changes(
+            session, CHANGE_CONSUMER, ["financial_statements"]
+        )
+
+    company_ids = None
+    if not full and changes is not None:
+        company_ids = sorted(changes["financial_statements"])
+
+    stats = {"companies": 0, "statements": 0, "ratios": 0, "inserted": 0, "updated": 0}
+    with session_scope() as session:
+        if company_ids != []:
+            statements = load_financial_statements(company_ids=company_ids)
+            ratios = compute_ratios(statements)
+            result = save_ratios(session, ratios)
+            stats.update(
+                companies=statements["company_id"].nunique(),
+                statements=len(statements),
+                ratios=len(ratios),
+                inserted=result["inserted"],
+                updated=result["updated"],
+            )
+        advance_cursor(session, CHANGE_CONSUMER, last_id)
+        purge_changes(session)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+if __name__ == "__main__":
+    stats = update_financial_ratios()
+    print(
+        f"✅ 재무 비율 계산 완료: {stats['companies']:,}개 기업, "
+        f"재무제표 {stats['statements']:,}건 → 비율 {stats['ratios']:,}건 "
+        f"(신규 {stats['inserted']:,}, 갱신 {stats['updated']:,}, {stats['seconds']}초)"
+    )
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from config.settings import CHANGE_SETTLE_SECONDS
+from database.models import ChangeCursor, DataChange
+from database.upsert import bulk_upsert
+
+# ✅ 원본 데이터 변경 이력 (dirty tracking)
+# - 저장 경로(주가 / 재무제표 / 벤치마크)는 신규/변경된 (키, 날짜)를
+#   키별 (시작일, 종료일) 구간으로 묶어서 data_changes에 기록
+# - 파생 테이블 빌더(consumer)는 change_cursors의 마지막 처리 id 이후 변경분만 읽어서
+#   해당 키 / 기간만 재계산한 뒤 커서를 이동
+# - 커서가 없는 consumer는 처음 실행이므로 전체 재계산 후 커서를 현재 위치로 설정
+# - 모든 consumer가 반영한 이력은 purge_changes()로 삭제
+#   (scripts/migrate_partitions.py처럼 일회성 consumer는 끝나면 remove_cursor()로 커서 삭제)
+# - MySQL AUTO_INCREMENT id는 커밋 순서와 다를 수 있음 (먼저 id를 받은 수집 트랜잭션이
+#   더 늦게 커밋될 수 있음) → 커서를 MAX(id)로 옮기면 늦게 커밋된 작은 id를 영영 건너뜀
+#   - 수집과 파생 테이블 빌더를 순서대로 실행하면(기본 CHANGE_SETTLE_SECONDS=0) 문제 없음
+#   - 동시에 실행한다면 CHANGE_SETTLE_SECONDS를 가장 긴 수집 트랜잭션보다 길게 설정
+#     → 최근 CHANGE_SETTLE_SECONDS초 안에 기록된 이력의 가장 작은 id 앞까지만 커서를 이동
+
+
+def summarize_keys(keys):
+    """[(키, 날짜), ...] → {키: (최소 날짜, 최대 날짜)}"""
+    ranges = {}
+    for key_id, day in keys:
+        if key_id in ranges:
+            start, end = ranges[key_id]
+            ranges[key_id] = (min(start, day), max(end, day))
+        else:
+            ranges[key_id] = (day, day)
+    return ranges
+
+
+def record_changes(session, table_name, keys):
+    """
+    변경된 (키, 날짜) 목록을 키별 기간으로 묶어서 data_changes에 기록
+    (커밋은 원본 데이터와 같은 트랜잭션에서 호출하는 쪽이 수행)
+    :return: 기록한 키 수
+    """
+    ranges = summarize_keys(keys)
+    if ranges:
+        session.execute(
+            insert(DataChange),
+            [
+                {
+                    "table_name": table_name,
+                    "key_id": int(key_id),
+                    "start_date": start,
+                    "end_date": end,
+                }
+                for key_id, (start, end) in ranges.items()
+            ],
+        )
+    return len(ranges)
+
+
+def get_cursor(session, consumer):
+    """consumer가 마지막으로 반영한 data_changes.id (처음 실행이면 None)"""
+    return session.scalar(
+        select(ChangeCursor.last_change_id).where(ChangeCursor.consumer == consumer)
+    )
+
+
+def get_last_change_id(session):
+    """현재 data_changes의 마지막 id (이력이 없으면 0)"""
+    return session.scalar(select(func.max(DataChange.id))) or 0
+
+
+def get_safe_change_id(session, settle_seconds=None):
+    """
+    consumer 커서를 옮겨도 안전한 마지막 id
+    (최근 settle_seconds초 안에 기록된 이력이 있으면 그중 가장 작은 id 바로 앞까지)
+    """
+    settle_seconds = CHANGE_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+    last_id = get_last_change_id(session)
+    if not settle_seconds:
+        return last_id
+
+    cutoff = session.scalar(select(func.current_timestamp())) - timedelta(
+        seconds=settle_seconds
+    )
+    recent = session.scalar(
+        select(func.min(DataChange.id)).where(DataChange.created_at > cutoff)
+    )
+    return last_id if recent is None else recent - 1
+
+
+def read_changes(session, consumer, tables):
+    """
+    consumer 커서 이후의 변경분을 원본 테이블별로 조회
+    :param tables: 읽을 원본 테이블 목록 (예: ["stock_prices", "financial_statements"])
+    :return: (변경분, 마지막 id)
+             변경분: {원본 테이블: {키: (시작일, 종료일)}}, 커서가 없으면 None
+    """
+    last_id = get_safe_change_id(session)
+    cursor = get_cursor(session, consumer)
+    if cursor is None:
+        return None, last_id
+    last_id = max(last_id, cursor)  # ✅ 커서는 뒤로 이동하지 않음
+
+    changes = {table: {} for table in tables}
+    rows = session.execute(
+        select(
+            DataChange.table_name,
+            DataChange.key_id,
+            func.min(DataChange.start_date),
+            func.max(DataChange.end_date),
+        )
+        .where(
+            DataChange.id > cursor,
+            DataChange.id <= last_id,
+            DataChange.table_name.in_(list(tables)),
+        )
+        .group_by(DataChange.table_name, DataChange.key_id)
+    )
+    for table_name, key_id, start, end in rows:
+        changes[table_name][key_id] = (start, end)
+    return changes, last_id
+
+
+def advance_cursor(session, consumer, last_id):
+    """consumer 커서를 last_id로 이동 (재계산 결과와 같은 트랜잭션에서 커밋)"""
+    bulk_upsert(
+        session,
+        ChangeCursor,
+        [{"consumer": consumer, "last_change_id": last_id}],
+        key_columns=("consumer",),
+    )
+
+
+def remove_cursor(session, consumer):
+    """consumer 커서 삭제 (일회성 consumer가 끝난 뒤 이력 삭제를 막지 않도록) :return: 삭제한 행 수"""
+    return session.execute(
+        delete(ChangeCursor).where(ChangeCursor.consumer == consumer)
+    ).rowcount
+
+
+def purge_changes(session):
+    """모든 consumer가 반영한 변경 이력 삭제 :return: 삭제한 행 수"""
+    oldest = session.scalar(select(func.min(ChangeCursor.last_change_id)))
+    if not oldest:
+        return 0
+    return session.execute(delete(DataChange).where(DataChange.id <= oldest)).rowcount
@@ -1 +1,94 @@
+import os
+import threading
+from contextlib import contextmanager
 
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from config.db_config import get_db_url
+from config.settings import (
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+)
+
+_lock = threading.Lock()
+_engine = None
+_engine_pid = None
+_session_factory = None
+
+
+def _engine_options(db_url):
+    """DB 종류에 맞는 엔진 옵션 (SQLite는 커넥션 풀 크기 설정을 사용하지 않음)"""
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if make_url(db_url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def get_engine():
+    """
+    프로세스 전역 SQLAlchemy 엔진 반환
+    - 최초 호출 시 한 번만 생성하고 이후에는 같은 커넥션 풀을 재사용 (스레드 안전)
+    - fork된 자식 프로세스에서는 부모의 커넥션을 버리고 새 엔진을 생성
+    """
+    global _engine, _engine_pid, _session_factory
+
+    pid = os.getpid()
+    if _engine is not None and _engine_pid == pid:
+        return _engine
+
+    with _lock:
+        if _engine is None or _engine_pid != pid:
+            if _engine is not None:
+                # ✅ 부모 프로세스 소켓을 닫지 않고 풀에서만 제거
+                _engine.dispose(close=False)
+            db_url = get_db_url()
+            _engine = create_engine(db_url, **_engine_options(db_url))
+            _engine_pid = pid
+            _session_factory = sessionmaker(bind=_engine)
+    return _engine
+
+
+def get_session():
+    """공유 엔진에 바인딩된 새 세션 반환 (스레드마다 별도 세션을 사용할 것)"""
+    get_engine()
+    return _session_factory()
+
+
+@contextmanager
+def session_scope():
+    """
+    세션 컨텍스트 매니저: 정상 종료 시 커밋, 예외 시 롤백 후 커넥션을 풀로 반환
+    사용 예)
+        with session_scope() as session:
+            session.add(obj)
+    """
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def dispose_engine():
+    """엔진과 커넥션 풀 정리 (테스트/벤치마크에서 DB 설정을 바꿀 때 사용)"""
+    global _engine, _engine_pid, _session_factory
+
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _engine_pid = None
+        _session_factory = None
@@ -8,8 +8,13 @@ from sqlalchemy import (
     Text,
     TIMESTAMP,
     UniqueConstraint,
+    Table,
+    MetaData,
+    Index,
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.sql import func
 
 Base = declarative_base()
@@ -61,8 +66,15 @@ class Company(Base):
     benchmark_id = Column(
         Integer, nullable=False
     )  # 벤치마크 지수 ID (논리적 관계만 유지)
+    shares_outstanding = Column(BigInteger)  # 상장주식수 (시가총액 계산용)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
 
+    # 국가 / 섹터별 종목 조회용 인덱스
+    __table_args__ = (
+        Index("ix_companies_country", "country"),
+        Index("ix_companies_sector", "sector"),
+    )
+
 
 # 4️⃣ 주가 데이터 테이블
 class StockPrice(Base):
@@ -78,8 +90,35 @@ class StockPrice(Base):
     adjusted_close_price = Column(DECIMAL(10, 2))  # 수정 종가
     volume = Column(BigInteger)  # 거래량
 
-    # UNIQUE KEY 추가 (company_id + date)
-    __table_args__ = (UniqueConstraint("company_id", "date", name="uq_company_date"),)
+    # UNIQUE KEY 추가 (company_id + date), 단일 날짜 전 종목 조회용 date 인덱스
+    # (MySQL 연도별 RANGE 파티션은 scripts/migrate_partitions.py로 적용)
+    __table_args__ = (
+        UniqueConstraint("company_id", "date", name="uq_company_date"),
+        Index("ix_stock_prices_date", "date"),
+    )
+
+
+# ✅ SQLite(로컬 테스트용)는 복합 PK의 AUTO_INCREMENT를 지원하지 않으므로
+#    stock_prices를 id 단일 PK + UNIQUE (company_id, date) 구조로 생성
+@compiles(CreateTable, "sqlite")
+def _create_table_sqlite(create, compiler, **kw):
+    table = create.element
+    if table.name != StockPrice.__tablename__:
+        return compiler.visit_create_table(create, **kw)
+
+    columns = []
+    for column in table.columns:
+        copied = column._copy()
+        copied.primary_key = column.name == "id"
+        copied.nullable = column.nullable if column.name != "id" else False
+        columns.append(copied)
+    sqlite_table = Table(
+        table.name,
+        MetaData(),
+        *columns,
+        UniqueConstraint("company_id", "date", name="uq_company_date"),
+    )
+    return compiler.visit_create_table(CreateTable(sqlite_table), **kw)
 
 
 # 5️⃣ 재무 데이터 테이블
@@ -108,6 +147,7 @@ class FinancialStatement(Base):
     retained_earnings = Column(BigInteger)  # 이익잉여금
     cash_equivalents = Column(BigInteger)  # 현금 및 현금성자산
     operating_cash_flow = Column(BigInteger)  # 영업활동 현금흐름
+    capital_expenditure = Column(BigInteger)  # 설비투자(CAPEX, 유형자산 취득액)
     dividend_payout_ratio = Column(DECIMAL(10, 2))  # 배당성향
     ebitda = Column(BigInteger)  # EBITDA
 
@@ -151,10 +191,10 @@ class FinancialRatio(Base):
     equity_growth = Column(DECIMAL(10, 2))  # 자기자본 증가율
     sustainable_growth = Column(DECIMAL(10, 2))  # 지속가능성장률
 
-    # UNIQUE KEY 추가 (company_id + report_date)
+    # UNIQUE KEY 추가 (company_id + fiscal_year)
     __table_args__ = (
         UniqueConstraint(
-            "company_id", "report_date", name="uq_company_financial_ratios"
+            "company_id", "fiscal_year", name="uq_company_financial_ratios"
         ),
     )
 
@@ -187,3 +227,39 @@ class ValuationMetric(Base):
     __table_args__ = (
         UniqueConstraint("company_id", "date", name="uq_company_valuation_date"),
     )
+
+
+# 8️⃣ 원본 데이터 변경 이력 테이블 (파생 테이블 증분 재계산용)
+class DataChange(Base):
+    __tablename__ = "data_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(50), nullable=False)  # 변경된 원본 테이블
+    key_id = Column(Integer, nullable=False)  # company_id (벤치마크는 benchmark_id)
+    start_date = Column(Date, nullable=False)  # 변경된 기간 시작일
+    end_date = Column(Date, nullable=False)  # 변경된 기간 종료일
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (Index("ix_data_changes_table_id", "table_name", "id"),)
+
+
+# 9️⃣ 파생 테이블별 변경 이력 처리 위치
+class ChangeCursor(Base):
+    __tablename__ = "change_cursors"
+
+    consumer = Column(
+        String(50), primary_key=True
+    )  # 파생 테이블 (예: financial_ratios)
+    last_change_id = Column(
+        Integer, nullable=False
+    )  # 마지막으로 반영한 data_changes.id
+
+
+# 🔟 종목별 월 단위 주가 체크섬 (재수집한 이력이 같은 달은 비교 / 쓰기 생략)
+class PriceChecksum(Base):
+    __tablename__ = "price_checksums"
+
+    company_id = Column(Integer, primary_key=True)  # 기업 ID
+    month = Column(Date, primary_key=True)  # 해당 월 1일
+    checksum = Column(String(32), nullable=False)  # 월 블록 내용 해시 (blake2b 128bit)
+    row_count = Column(Integer, nullable=False)  # 블록 행 수
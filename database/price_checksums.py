@@ -0,0 +1,113 @@
+import hashlib
+
+from sqlalchemy import delete, select, tuple_
+
+from database.models import PriceChecksum, StockPrice
+from database.upsert import comparable, to_python, upsert_statement
+
+# ✅ 종목별 월 단위 주가 체크섬 (price_checksums)
+# - save_stock_data는 재수집한 이력을 (종목, 월) 블록으로 나눠 메모리에서 해시하고
+#   저장된 해시와 같은 달은 기존 값 비교(SELECT) / 쓰기를 모두 건너뜀
+# - 해시는 DB 컬럼 정밀도로 정규화한 값으로 계산 (float 오차로 달라지지 않도록)
+# - 저장된 해시는 "그 블록의 행이 그 값으로 DB에 있다"는 뜻이므로
+#   다른 경로(거래일 단위 전체 시장 저장)로 바뀐 달은 invalidate_checksums()로 삭제
+# - 해시는 수집 기간이 그 달 전체를 덮는 블록(수집 결과의 첫 달 / 마지막 달이 아닌 달)만 비교 / 저장
+#   (증분 수집의 겹침 기간, 거래일 하나만 저장하는 경우 등 부분 월은 항상 기존 값과 비교하고
+#    해시를 남기지 않음 → 일부 행으로 만든 해시가 월 전체 해시를 덮어쓰지 않도록)
+
+
+def month_of(day):
+    """날짜가 속한 월의 1일"""
+    return day.replace(day=1)
+
+
+def block_checksum(rows):
+    """
+    한 블록(같은 종목 / 같은 월) 주가 행의 내용 해시
+    :param rows: 컬럼명 → 값 딕셔너리 리스트 (company_id 제외 컬럼을 해시)
+    """
+    columns = StockPrice.__table__.c
+    digest = hashlib.blake2b(digest_size=16)
+    for row in sorted(rows, key=lambda item: item["date"]):
+        values = [
+            f"{name}={comparable(columns[name], to_python(row[name]))!r}"
+            for name in sorted(row)
+            if name != "company_id"
+        ]
+        digest.update(("|".join(values) + "\n").encode())
+    return digest.hexdigest()
+
+
+def split_unchanged_months(session, company_id, records):
+    """
+    저장된 해시와 같은 달을 제외한 레코드와, 저장할 새 해시 목록
+    (첫 달 / 마지막 달은 수집 기간이 그 달 일부만 덮을 수 있으므로 해시 없이 항상 비교 대상)
+    :param records: 한 종목의 주가 레코드 (date 포함)
+    :return: (비교 / 저장이 필요한 레코드, 건너뛴 행 수, price_checksums 행 리스트)
+    """
+    blocks = {}
+    for record in records:
+        blocks.setdefault(month_of(record["date"]), []).append(record)
+    edges = {min(blocks), max(blocks)} if blocks else set()
+    complete = [month for month in blocks if month not in edges]
+
+    stored = dict(
+        session.execute(
+            select(PriceChecksum.month, PriceChecksum.checksum).where(
+                PriceChecksum.company_id == company_id,
+                PriceChecksum.month.in_(complete),
+            )
+        ).all()
+        if complete
+        else []
+    )
+
+    pending, skipped, checksums = [], 0, []
+    for month, rows in blocks.items():
+        if month in edges:
+            pending += rows
+            continue
+        checksum = block_checksum(rows)
+        if stored.get(month) == checksum:
+            skipped += len(rows)
+            continue
+        pending += rows
+        checksums.append(
+            {
+                "company_id": company_id,
+                "month": month,
+                "checksum": checksum,
+                "row_count": len(rows),
+            }
+        )
+    return pending, skipped, checksums
+
+
+def save_checksums(session, checksums):
+    """
+    블록 해시 저장 (주가 데이터와 같은 트랜잭션에서 커밋)
+    (split_unchanged_months가 이미 기존 해시와 비교했으므로 bulk_upsert의 사전 SELECT 없이 바로 upsert)
+    """
+    if checksums:
+        stmt = upsert_statement(
+            session,
+            PriceChecksum.__table__,
+            ("company_id", "month"),
+            ("checksum", "row_count"),
+        )
+        session.execute(stmt, checksums)
+
+
+def invalidate_checksums(session, keys):
+    """
+    다른 경로로 바뀐 (company_id, date)가 속한 달의 해시 삭제
+    :return: 삭제 대상 (종목, 월) 수
+    """
+    blocks = sorted({(company_id, month_of(day)) for company_id, day in keys})
+    if blocks:
+        session.execute(
+            delete(PriceChecksum).where(
+                tuple_(PriceChecksum.company_id, PriceChecksum.month).in_(blocks)
+            )
+        )
+    return len(blocks)
@@ -0,0 +1,270 @@
+import glob
+import os
+import threading
+import time
+import uuid
+
+from config.settings import PRICE_STORE_DIR, PRICE_STORE_FLUSH_ROWS
+from data_fetch.normalize import PRICE_COLUMNS
+
+# ✅ stock_prices / benchmark_prices를 미러링하는 로컬 Parquet 저장소
+# - 경로: {PRICE_STORE_DIR}/{테이블}/country={국가}/year={연도}/part-*.parquet
+# - 파티션 안의 행은 (키, date) 순으로 정렬 → row group 통계로 종목/기간 필터 pushdown
+# - 쓰기는 part 파일 추가(append), 같은 (키, date)는 나중에 쓴 파일이 우선
+#   → compact_store()가 파티션별로 하나의 파일로 합치고 중복 제거
+# - pandas / pyarrow는 import 비용이 크므로 실제로 사용하는 함수 안에서 불러옴
+
+# ✅ 테이블별 키 컬럼
+STORE_KEYS = {"stock_prices": "company_id", "benchmark_prices": "benchmark_id"}
+
+_ROW_GROUP_SIZE = 128 * 1024
+
+
+def _table_dir(table, store_dir=None):
+    if table not in STORE_KEYS:
+        raise ValueError(f"지원하지 않는 테이블: {table}")
+    return os.path.join(store_dir or PRICE_STORE_DIR, table)
+
+
+def _part_name(suffix="part"):
+    """시간 순으로 정렬되는 part 파일 이름 (정렬 순서 = 쓰기 순서)"""
+    return f"part-{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}-{suffix}.parquet"
+
+
+def _schema(key):
+    import pyarrow as pa
+
+    return pa.schema(
+        [(key, pa.int64()), ("date", pa.date32())]
+        + [(name, pa.float64()) for name in PRICE_COLUMNS[1:-1]]
+        + [("volume", pa.int64())]
+    )
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(
+        pa.schema([("country", pa.string()), ("year", pa.int32())]), flavor="hive"
+    )
+
+
+def to_store_frame(records, key):
+    """레코드(dict) 리스트 또는 DataFrame을 저장소 스키마의 DataFrame으로 변환"""
+    import pandas as pd
+
+    frame = pd.DataFrame(records, columns=[key] + PRICE_COLUMNS)
+    frame[key] = frame[key].astype("int64")
+    frame["date"] = pd.to_datetime(frame["date"]).dt.date
+    for name in PRICE_COLUMNS[1:-1]:
+        frame[name] = pd.to_numeric(frame[name], errors="coerce").astype("float64")
+    frame["volume"] = pd.to_numeric(frame["volume"], errors="coerce").astype("Int64")
+    return frame
+
+
+def write_partitions(frame, table, countries, store_dir=None):
+    """
+    (country, year) 파티션별로 part 파일을 하나씩 추가
+    :param frame: to_store_frame() 결과
+    :param countries: {키: 국가 코드}
+    :return: 기록한 행 수
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if frame.empty:
+        return 0
+
+    key = STORE_KEYS[table]
+    schema = _schema(key)
+    frame = frame.assign(
+        country=frame[key].map(countries),
+        year=[day.year for day in frame["date"]],
+    )
+    missing = frame["country"].isna()
+    if missing.any():
+        print(f"⚠️ 국가 정보가 없는 {key} {frame.loc[missing, key].nunique()}개 제외")
+        frame = frame[~missing]
+
+    written = 0
+    for (country, year), part in frame.groupby(["country", "year"], sort=False):
+        directory = os.path.join(
+            _table_dir(table, store_dir), f"country={country}", f"year={year}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        part = part.sort_values([key, "date"])[schema.names]
+        pq.write_table(
+            pa.Table.from_pandas(part, schema=schema, preserve_index=False),
+            os.path.join(directory, _part_name()),
+            row_group_size=_ROW_GROUP_SIZE,
+        )
+        written += len(part)
+    return written
+
+
+class PriceStoreWriter:
+    """
+    여러 writer 스레드가 공유하는 버퍼형 저장소 쓰기 객체
+    (작은 part 파일이 많아지지 않도록 flush_rows 행이 쌓일 때마다 파티션별로 기록)
+    """
+
+    def __init__(self, table, countries, flush_rows=None, store_dir=None):
+        self.table = table
+        self.key = STORE_KEYS[table]
+        self.countries = countries
+        self.flush_rows = flush_rows or PRICE_STORE_FLUSH_ROWS
+        self.store_dir = store_dir
+        self.written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, records):
+        """레코드를 버퍼에 추가하고, flush_rows를 넘으면 파일로 기록"""
+        with self._lock:
+            self._buffer.extend(records)
+            if len(self._buffer) < self.flush_rows:
+                return
+            records, self._buffer = self._buffer, []
+        self._write(records)
+
+    def flush(self):
+        """버퍼에 남은 레코드를 모두 기록"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            self._write(records)
+
+    def _write(self, records):
+        written = write_partitions(
+            to_store_frame(records, self.key),
+            self.table,
+            self.countries,
+            self.store_dir,
+        )
+        with self._lock:
+            self.written += written
+
+
+def _partition_files(table, store_dir=None):
+    """{파티션 디렉터리: [part 파일 경로 (쓰기 순)]}"""
+    partitions = {}
+    pattern = os.path.join(
+        _table_dir(table, store_dir), "country=*", "year=*", "*.parquet"
+    )
+    for path in sorted(glob.glob(pattern)):
+        partitions.setdefault(os.path.dirname(path), []).append(path)
+    return partitions
+
+
+def compact_store(table="stock_prices", store_dir=None):
+    """
+    파티션별 part 파일을 하나로 합치고 (키, date) 중복은 마지막으로 쓴 값만 유지
+    (쓰기 작업이 없을 때 실행)
+    :return: 합친 파티션 수
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    key = STORE_KEYS[table]
+    schema = _schema(key)
+    compacted = 0
+    for directory, files in _partition_files(table, store_dir).items():
+        if len(files) < 2:
+            continue
+        frame = pa.concat_tables(
+            [pq.read_table(path, schema=schema) for path in files]
+        ).to_pandas()
+        frame = frame.drop_duplicates([key, "date"], keep="last").sort_values(
+            [key, "date"]
+        )
+        target = os.path.join(directory, _part_name("compacted"))
+        tmp_path = f"{target}.tmp"
+        pq.write_table(
+            pa.Table.from_pandas(frame, schema=schema, preserve_index=False),
+            tmp_path,
+            row_group_size=_ROW_GROUP_SIZE,
+        )
+        os.replace(tmp_path, target)
+        for path in files:
+            os.remove(path)
+        compacted += 1
+    return compacted
+
+
+def read_prices(
+    table="stock_prices",
+    columns=None,
+    ids=None,
+    countries=None,
+    start=None,
+    end=None,
+    sort=True,
+    store_dir=None,
+):
+    """
+    저장소에서 주가 조회 (파티션/통계 기반 predicate pushdown + 필요한 컬럼만 읽기)
+    :param columns: 읽을 가격 컬럼 (기본값: 전체), 키 / date 컬럼은 항상 포함
+    :param ids: company_id (또는 benchmark_id) 목록
+    :param countries: 국가 코드 목록 (예: ["KR"])
+    :param start: 시작일 (포함)
+    :param end: 종료일 (포함)
+    :param sort: False면 (키, date) 정렬을 생략 (파티션 순서 그대로, 전체 스캔 시 더 빠름)
+    :return: (키, date) 순으로 정렬된 DataFrame (country 컬럼 포함)
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    key = STORE_KEYS[table]
+    partitions = _partition_files(table, store_dir)
+    columns = PRICE_COLUMNS[1:] if columns is None else list(columns)
+    names = [key, "date", "country"] + columns
+    if not partitions:
+        return pd.DataFrame(columns=names)
+
+    files = [path for paths in partitions.values() for path in paths]
+    dataset = ds.dataset(
+        files,
+        schema=pa.unify_schemas([_schema(key), _partitioning().schema]),
+        format="parquet",
+        partitioning=_partitioning(),
+        partition_base_dir=_table_dir(table, store_dir),
+    )
+
+    conditions = []
+    if ids is not None:
+        conditions.append(ds.field(key).isin([int(value) for value in ids]))
+    if countries is not None:
+        conditions.append(ds.field("country").isin(list(countries)))
+    if start is not None:
+        start = pd.Timestamp(start).date()
+        conditions.append(ds.field("year") >= start.year)
+        conditions.append(ds.field("date") >= start)
+    if end is not None:
+        end = pd.Timestamp(end).date()
+        conditions.append(ds.field("year") <= end.year)
+        conditions.append(ds.field("date") <= end)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    frame = dataset.to_table(columns=names, filter=expression).to_pandas()
+
+    # ✅ 압축 전 파티션에는 같은 (키, date)가 여러 part에 있을 수 있음 → 마지막 값 유지
+    if any(len(paths) > 1 for paths in partitions.values()):
+        frame = frame.drop_duplicates([key, "date"], keep="last")
+    if sort:
+        frame = frame.sort_values([key, "date"])
+    return frame.reset_index(drop=True)
+
+
+def get_store_latest_dates(table="stock_prices", store_dir=None):
+    """저장소 기준 키별 최신 날짜 {키: date} (DB의 get_latest_dates와 같은 형태)"""
+    key = STORE_KEYS[table]
+    frame = read_prices(table, columns=[], sort=False, store_dir=store_dir)
+    if frame.empty:
+        return {}
+    latest = frame.groupby(key)["date"].max()
+    return {int(k): v for k, v in latest.items()}
@@ -0,0 +1,55 @@
+from sqlalchemy import func, select
+
+from config.settings import PRICE_STORE_MODE
+
+
+def get_latest_dates(session, model, key_column, date_column="date"):
+    """
+    키(company_id, benchmark_id 등)별 최신 날짜를 한 번의 GROUP BY 쿼리로 조회
+    :return: {키: 최신 날짜}
+    """
+    key = getattr(model, key_column)
+    date = getattr(model, date_column)
+    rows = session.execute(select(key, func.max(date)).group_by(key))
+    return {row[0]: row[1] for row in rows}
+
+
+def load_price_frame(columns, start=None, table="stock_prices", ids=None):
+    """
+    주가 테이블 전체(또는 start 이후)를 (키, date, 가격 컬럼...) DataFrame으로 조회
+    - PRICE_STORE_MODE가 db면 MySQL, 그 외에는 Parquet 저장소에서 읽음
+    - date는 datetime64[D], 가격 컬럼은 float64로 변환
+    :param columns: 읽을 가격 컬럼 (예: ["adjusted_close_price"])
+    :param table: stock_prices 또는 benchmark_prices
+    :param ids: 조회할 company_id (또는 benchmark_id) 목록 (None이면 전체)
+    """
+    import pandas as pd
+
+    from database.price_store import STORE_KEYS, read_prices
+
+    key = STORE_KEYS[table]
+    columns = list(columns)
+    if PRICE_STORE_MODE != "db":
+        frame = read_prices(table, columns=columns, ids=ids, start=start, sort=False)
+    else:
+        from database.db_connection import get_engine
+        from database.models import BenchmarkPrice, StockPrice
+
+        model = {"stock_prices": StockPrice, "benchmark_prices": BenchmarkPrice}[table]
+        query = select(
+            getattr(model, key),
+            model.date,
+            *[getattr(model, name) for name in columns],
+        )
+        if start is not None:
+            query = query.where(model.date >= start)
+        if ids is not None:
+            query = query.where(getattr(model, key).in_([int(i) for i in ids]))
+        with get_engine().connect() as connection:
+            frame = pd.read_sql(query, connection, coerce_float=True)
+
+    frame = frame[[key, "date"] + columns]
+    frame["date"] = pd.to_datetime(frame["date"]).values.astype("datetime64[D]")
+    for name in columns:
+        frame[name] = pd.to_numeric(frame[name], errors="coerce").astype("float64")
+    return frame
@@ -0,0 +1,155 @@
+import math
+from decimal import Decimal
+from importlib import import_module
+
+from sqlalchemy import Numeric, select, tuple_
+
+from config.settings import UPSERT_BATCH_SIZE
+from monitoring.metrics import count, log_sample, timer
+
+# ✅ upsert를 지원하는 DB 방언 (ON DUPLICATE KEY UPDATE / ON CONFLICT)
+_UPSERT_DIALECTS = ("mysql", "postgresql", "sqlite")
+
+
+def to_python(value):
+    """
+    numpy 스칼라와 NaN을 DB 드라이버가 받을 수 있는 파이썬 값으로 변환
+    :param value: 저장할 값 (numpy 스칼라, float NaN, 일반 파이썬 값)
+    :return: 파이썬 기본 타입 값 (NaN은 None)
+    """
+    if hasattr(value, "dtype") and hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def comparable(column, value):
+    """
+    기존 값과 비교하기 위해 컬럼 정밀도에 맞춰 값 정규화 (DECIMAL → 소수점 반올림)
+    :param column: SQLAlchemy Column (Numeric이면 scale 자리로 반올림, scale이 없으면 2)
+    :param value: to_python()으로 변환한 값
+    :return: 같은 DB 값이면 같은 결과가 나오는 비교용 값
+    """
+    if value is None:
+        return None
+    if isinstance(column.type, Numeric) and isinstance(value, (float, Decimal)):
+        scale = column.type.scale if column.type.scale is not None else 2
+        return round(float(value), scale)
+    return value
+
+
+def upsert_statement(session, table, key_columns, update_columns):
+    """
+    방언에 맞는 upsert 구문 생성 (MySQL: ON DUPLICATE KEY UPDATE, SQLite: ON CONFLICT)
+    :param session: 바인딩된 DB 방언을 확인할 세션
+    :param table: 대상 Table (model.__table__)
+    :param key_columns: UNIQUE 키 컬럼명 (ON CONFLICT 대상)
+    :param update_columns: 충돌 시 갱신할 컬럼명 (비어 있으면 기존 행 유지)
+    :return: session.execute(stmt, records)로 실행할 INSERT 구문
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in _UPSERT_DIALECTS:
+        raise NotImplementedError(f"지원하지 않는 DB 방언: {dialect}")
+
+    stmt = import_module(f"sqlalchemy.dialects.{dialect}").insert(table)
+    if not update_columns:
+        if dialect == "mysql":
+            return stmt.prefix_with("IGNORE")
+        return stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(
+            {name: stmt.inserted[name] for name in update_columns}
+        )
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={name: stmt.excluded[name] for name in update_columns},
+    )
+
+
+def bulk_upsert(
+    session,
+    model,
+    records,
+    key_columns,
+    update_columns=None,
+    batch_size=None,
+    changed_keys=None,
+):
+    """
+    여러 행을 배치 단위로 upsert 하고 신규/업데이트/동일 건수를 반환
+    :param session: SQLAlchemy 세션 (커밋은 호출하는 쪽에서 수행)
+    :param model: ORM 모델 클래스 (예: StockPrice)
+    :param records: 컬럼명 → 값 딕셔너리 리스트
+    :param key_columns: UNIQUE 키를 구성하는 컬럼명 (예: ("company_id", "date"))
+    :param update_columns: 중복 시 갱신할 컬럼 (기본값: 키를 제외한 레코드의 모든 컬럼)
+    :param batch_size: 한 번의 구문에 담을 행 수 (기본값: UPSERT_BATCH_SIZE)
+    :param changed_keys: 리스트를 넘기면 신규/변경된 행의 키 튜플을 추가 (변경 이력 기록용)
+    :return: {"inserted": int, "updated": int, "unchanged": int}
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not records:
+        return counts
+
+    table = model.__table__
+    key_columns = tuple(key_columns)
+    if update_columns is None:
+        update_columns = [name for name in records[0] if name not in key_columns]
+    update_columns = tuple(update_columns)
+    batch_size = batch_size or UPSERT_BATCH_SIZE
+
+    key_cols = [table.c[name] for name in key_columns]
+    update_cols = [table.c[name] for name in update_columns]
+    stmt = upsert_statement(session, table, key_columns, update_columns)
+
+    for start in range(0, len(records), batch_size):
+        batch = [
+            {name: to_python(value) for name, value in record.items()}
+            for record in records[start : start + batch_size]
+        ]
+
+        with timer("diff", table=table.name):
+            # ✅ 배치에 포함된 키의 기존 값을 한 번의 SELECT로 조회
+            keys = [tuple(row[name] for name in key_columns) for row in batch]
+            existing = {
+                tuple(row[: len(key_cols)]): tuple(row[len(key_cols) :])
+                for row in session.execute(
+                    select(*key_cols, *update_cols).where(tuple_(*key_cols).in_(keys))
+                )
+            }
+
+            # ✅ 신규/변경 행만 골라서 쓰기 (동일한 행은 건너뜀)
+            pending = []
+            for key, row in zip(keys, batch):
+                if key not in existing:
+                    counts["inserted"] += 1
+                    pending.append(row)
+                    log_sample(table.name, lambda: f"➕ {table.name} {key} 신규")
+                    continue
+
+                current = existing[key]
+                changed = any(
+                    comparable(col, row.get(col.name)) != comparable(col, old)
+                    for col, old in zip(update_cols, current)
+                )
+                if changed:
+                    counts["updated"] += 1
+                    pending.append(row)
+                    log_sample(table.name, lambda: f"✏️ {table.name} {key} 변경")
+                else:
+                    counts["unchanged"] += 1
+                    log_sample(
+                        table.name, lambda: f"⏭️ {table.name} {key} 동일, 건너뜀"
+                    )
+
+        if pending:
+            with timer("write", table=table.name):
+                session.execute(stmt, pending)
+            if changed_keys is not None:
+                changed_keys.extend(
+                    tuple(row[name] for name in key_columns) for row in pending
+                )
+
+    for result, amount in counts.items():
+        count("rows", amount, table=table.name, result=result)
+    return counts
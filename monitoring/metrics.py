@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import LOG_SAMPLE_EVERY, LOG_VERBOSITY, METRICS_DIR
+
+# ✅ 실행 단위 계측 (행마다 print하는 대신 단계별 카운터 / 타이머로 집계)
+# - 단계(stage): fetch (provider 요청, normalize 포함) / normalize / checksum (월 블록 해시 비교)
+#   / diff (기존 값 비교) / write (INSERT·UPDATE·커밋)
+# - 라벨: provider, table 등 (같은 단계 + 라벨 조합끼리 합산)
+# - 실행이 끝나면 write_metrics()로 JSON / Prometheus 텍스트 파일로 저장
+# - 로그 출력은 LOG_VERBOSITY로 조절
+#   0: 실행 요약만 / 1: 경고 · 쿨다운 등 실행 단위 로그 / 2: 종목 · 거래일 단위 로그
+#   3: 행 단위 로그를 LOG_SAMPLE_EVERY행마다 하나씩 샘플링해서 출력
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class RunMetrics:
+    """한 번의 실행 동안 쌓이는 카운터와 단계별 타이머 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}  # (이름, 라벨) → 값
+            self.timers = {}  # (단계, 라벨) → [호출 수, 누적 초, 최대 초]
+            self.samples = {}  # 샘플링 로그 단계별 행 수
+            self.started = time.time()
+
+    def count(self, name, amount=1, **labels):
+        if not amount:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, _label_key(labels))
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """with 블록 실행 시간을 stage 타이머에 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def sample(self, stage):
+        """stage의 행 수를 세고 LOG_SAMPLE_EVERY행마다 True"""
+        with self._lock:
+            seen = self.samples.get(stage, 0)
+            self.samples[stage] = seen + 1
+        return seen % LOG_SAMPLE_EVERY == 0
+
+    def snapshot(self):
+        """JSON으로 저장할 수 있는 현재 값"""
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {key: list(value) for key, value in self.timers.items()}
+            started = self.started
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "elapsed_seconds": round(time.time() - started, 3),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "timers": [
+                {
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": count,
+                    "seconds": round(seconds, 6),
+                    "max_seconds": round(longest, 6),
+                }
+                for (stage, labels), (count, seconds, longest) in sorted(timers.items())
+            ],
+        }
+
+
+def to_prometheus(snapshot, prefix="stock_data"):
+    """snapshot() 결과 → Prometheus 텍스트 형식 (node_exporter textfile collector 용)"""
+
+    def labels_text(labels):
+        if not labels:
+            return ""
+        pairs = ",".join(
+            f'{name}="{str(value).replace(chr(34), "")}"'
+            for name, value in sorted(labels.items())
+        )
+        return "{" + pairs + "}"
+
+    lines = []
+    counters = {}
+    for counter in snapshot["counters"]:
+        counters.setdefault(counter["name"], []).append(counter)
+    for name, items in counters.items():
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines += [f"{metric}{labels_text(c['labels'])} {c['value']}" for c in items]
+
+    for suffix, field, kind in (
+        ("stage_calls_total", "count", "counter"),
+        ("stage_seconds_total", "seconds", "counter"),
+        ("stage_seconds_max", "max_seconds", "gauge"),
+    ):
+        metric = f"{prefix}_{suffix}"
+        lines.append(f"# TYPE {metric} {kind}")
+        for timer in snapshot["timers"]:
+            labels = {"stage": timer["stage"], **timer["labels"]}
+            lines.append(f"{metric}{labels_text(labels)} {timer[field]}")
+
+    lines.append(f"# TYPE {prefix}_run_seconds gauge")
+    lines.append(f"{prefix}_run_seconds {snapshot['elapsed_seconds']}")
+    return "\n".join(lines) + "\n"
+
+
+def format_metrics(snapshot=None):
+    """단계별 누적 시간 / 호출 수와 카운터를 한 줄씩 요약한 문자열"""
+    snapshot = snapshot or get_metrics().snapshot()
+    lines = [f"⏱️ 실행 시간 {snapshot['elapsed_seconds']:.1f}초"]
+    for timer in snapshot["timers"]:
+        labels = ", ".join(f"{k}={v}" for k, v in timer["labels"].items())
+        lines.append(
+            f"   {timer['stage']:<10} {labels:<32} {timer['seconds']:>9.2f}초 "
+            f"({timer['count']:,}회, 최대 {timer['max_seconds']:.2f}초)"
+        )
+    for counter in snapshot["counters"]:
+        labels = ", ".join(f"{k}={v}" for k, v in counter["labels"].items())
+        lines.append(f"   {counter['name']:<10} {labels:<32} {counter['value']:>12,}")
+    return "\n".join(lines)
+
+
+_metrics = RunMetrics()
+
+
+def get_metrics():
+    """프로세스 공용 계측 인스턴스"""
+    return _metrics
+
+
+def count(name, amount=1, **labels):
+    _metrics.count(name, amount, **labels)
+
+
+def observe(stage, seconds, **labels):
+    _metrics.observe(stage, seconds, **labels)
+
+
+def timer(stage, **labels):
+    return _metrics.timer(stage, **labels)
+
+
+def reset_metrics():
+    """실행 시작 시 이전 실행의 값을 비움"""
+    _metrics.reset()
+
+
+def log(message, level=1):
+    """LOG_VERBOSITY가 level 이상일 때만 출력"""
+    if LOG_VERBOSITY >= level:
+        print(message)
+
+
+def log_sample(stage, message):
+    """행 단위 로그: LOG_VERBOSITY 3 이상에서 stage별 LOG_SAMPLE_EVERY행마다 하나만 출력"""
+    if LOG_VERBOSITY >= 3 and _metrics.sample(stage):
+        print(message() if callable(message) else message)
+
+
+def write_metrics(run_name, directory=None):
+    """
+    실행 요약을 {METRICS_DIR}/{run_name}.json, .prom 으로 저장하고 요약 출력
+    (METRICS_DIR이 비어 있으면 저장하지 않음)
+    :return: 저장한 파일 경로 리스트
+    """
+    directory = METRICS_DIR if directory is None else directory
+    snapshot = _metrics.snapshot()
+    snapshot["run"] = run_name
+    log(format_metrics(snapshot), level=0)
+    if not directory:
+        return []
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for extension, content in (
+        ("json", json.dumps(snapshot, ensure_ascii=False, indent=2)),
+        ("prom", to_prometheus(snapshot)),
+    ):
+        path = os.path.join(directory, f"{run_name}.{extension}")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, path)  # ✅ 수집기가 쓰는 중인 파일을 읽지 않도록 교체
+        paths.append(path)
+    log(f"📈 실행 지표 저장: {', '.join(paths)}")
+    return paths
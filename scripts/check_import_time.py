@@ -0,0 +1,89 @@
+"""
+모듈 import 시간 예산 검사 (스케줄러/워커가 패키지를 가볍게 import 할 수 있는지 확인)
+
+- python -X importtime 으로 새 프로세스에서 각 모듈을 import 하여 누적 시간을 측정
+- 예산(기본 1초)을 넘거나, import 만으로 무거운 provider 라이브러리가 로드되면 실패(exit 1)
+
+실행: python -m scripts.check_import_time [--budget 1.0] [모듈 ...]
+"""
+
+import argparse
+import subprocess
+import sys
+
+# ✅ 검사 대상 모듈 (import 시 네트워크/DB 작업이 없어야 함)
+MODULES = [
+    "data_fetch.stock_data",
+    "data_fetch.financial_data",
+    "data_fetch.companies_info",
+    "data_fetch.benchmark_data",
+    "data_fetch.benchmark_prices",
+    "data_fetch.dart_index",
+    "data_fetch.ticker_data",
+]
+
+# ✅ 실제 요청 시점에만 로드되어야 하는 provider 라이브러리
+HEAVY_MODULES = ["yfinance", "pykrx", "dart_fss"]
+
+# ✅ 모듈별 import 시간 예산(초)
+DEFAULT_BUDGET = 1.0
+
+
+def measure_import(module, heavy=None):
+    """
+    새 프로세스에서 module을 import 하여 (누적 시간(초), 로드된 heavy 모듈 목록) 반환
+    :param heavy: import 시 로드되면 안 되는 모듈 목록 (기본: HEAVY_MODULES)
+    """
+    heavy = HEAVY_MODULES if heavy is None else list(heavy)
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # ✅ "import time: self | cumulative | name" 형식 중 최상위 항목의 누적 시간 합계
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total_us / 1_000_000, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument(
+        "--budget", type=float, default=DEFAULT_BUDGET, help="모듈별 예산(초)"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            elapsed, loaded = measure_import(module)
+        except RuntimeError as e:
+            print(f"❌ {module}: import 실패 ({e})")
+            failed = True
+            continue
+
+        ok = elapsed <= args.budget and not loaded
+        failed |= not ok
+        note = f" (import 시 로드됨: {', '.join(loaded)})" if loaded else ""
+        print(f"{'✅' if ok else '❌'} {module}: {elapsed:.3f}초{note}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+MySQL stock_prices / benchmark_prices 전체 이력을 Parquet 저장소로 내보내기
+
+실행: python -m scripts.export_price_store [--table stock_prices] [--chunk-size 500000]
+"""
+
+import argparse
+
+import pandas as pd
+from sqlalchemy import select
+
+from database.db_connection import get_engine, session_scope
+from database.models import BenchmarkIndex, BenchmarkPrice, Company, StockPrice
+from database.price_store import (
+    STORE_KEYS,
+    PriceStoreWriter,
+    compact_store,
+    to_store_frame,
+)
+from data_fetch.normalize import PRICE_COLUMNS
+
+# ✅ 테이블별 (가격 모델, 키를 가진 모델)
+_MODELS = {
+    "stock_prices": (StockPrice, Company),
+    "benchmark_prices": (BenchmarkPrice, BenchmarkIndex),
+}
+
+
+def export_table(table, chunk_size):
+    """테이블 전체를 chunk_size 행씩 읽어 저장소에 기록한 뒤 파티션 정리"""
+    price_model, key_model = _MODELS[table]
+    key = STORE_KEYS[table]
+
+    with session_scope() as session:
+        countries = dict(session.execute(select(key_model.id, key_model.country)))
+
+    writer = PriceStoreWriter(table, countries, flush_rows=chunk_size)
+    columns = [getattr(price_model, name) for name in [key] + PRICE_COLUMNS]
+    query = select(*columns).order_by(getattr(price_model, key), price_model.date)
+
+    # ✅ 서버 측 커서로 스트리밍 (전체 이력을 한 번에 메모리에 올리지 않음)
+    with get_engine().connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        for chunk in pd.read_sql(query, connection, chunksize=chunk_size):
+            writer.add(to_store_frame(chunk, key).to_dict("records"))
+            print(f"   {table}: {writer.written:,}행 기록")
+    writer.flush()
+
+    compacted = compact_store(table)
+    print(f"✅ {table} 내보내기 완료: {writer.written:,}행 (파티션 {compacted}개 정리)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--table", choices=list(_MODELS), action="append", help="기본값: 전체 테이블"
+    )
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    args = parser.parse_args()
+
+    for table in args.table or list(_MODELS):
+        export_table(table, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
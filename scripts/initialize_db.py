@@ -1,24 +1,126 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from database.models import Base
-import os
-from dotenv import load_dotenv
-
-# 환경 변수 로드
-load_dotenv()
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.schema import AddConstraint, CreateColumn
 
-# MySQL 연결 URL 생성 (PyMySQL 사용)
-DATABASE_URL = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-
-# SQLAlchemy 엔진 생성
-engine = create_engine(DATABASE_URL, echo=True)
+from database.models import Base
+from database.db_connection import get_engine
 
 
 # 데이터베이스 테이블 생성 함수
 def create_tables():
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine())
     print("✅ 모든 테이블이 성공적으로 생성되었습니다!")
 
 
+# ✅ 기존 테이블에 모델에 새로 추가된 컬럼 반영 (create_all은 기존 테이블을 변경하지 않음)
+def add_missing_columns():
+    """모델에는 있지만 DB 테이블에 없는 컬럼을 ALTER TABLE ... ADD COLUMN으로 추가"""
+    engine = get_engine()
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                definition = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {definition}")
+                )
+                added.append(f"{table.name}.{column.name}")
+    for name in added:
+        print(f"➕ 컬럼 추가: {name}")
+    return added
+
+
+# ✅ 기존 테이블에 모델에 새로 추가된 인덱스 반영
+def add_missing_indexes(exclude=()):
+    """
+    모델에 정의된 인덱스 중 DB에 없는 인덱스를 CREATE INDEX로 추가
+    (MySQL InnoDB는 온라인 DDL로 생성되어 테이블 쓰기를 막지 않음)
+    :param exclude: 건너뛸 테이블명 (예: 파티션 이전 시 새로 만들 stock_prices)
+    """
+    engine = get_engine()
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name in exclude or not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            print(f"⏳ 인덱스 생성 중: {table.name}.{index.name}")
+            index.create(engine)
+            added.append(f"{table.name}.{index.name}")
+    for name in added:
+        print(f"➕ 인덱스 추가: {name}")
+    return added
+
+
+# ✅ 기존 테이블의 UNIQUE 키를 모델과 맞춤 (create_all / add_missing_indexes는 UNIQUE 키를 바꾸지 않음)
+def plan_unique_constraints(inspector):
+    """
+    모델과 DB의 UNIQUE 키를 컬럼 구성으로 비교
+    :return: [(테이블명, 삭제할 기존 키 이름 리스트, 추가할 모델 UniqueConstraint 리스트), ...]
+             (모델 키가 모두 있는 테이블은 제외)
+    """
+    plans = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        expected = {
+            frozenset(column.name for column in constraint.columns): constraint
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        }
+        existing = {
+            frozenset(unique["column_names"]): unique["name"]
+            for unique in inspector.get_unique_constraints(table.name)
+        }
+        missing = [
+            constraint for key, constraint in expected.items() if key not in existing
+        ]
+        if missing:
+            stale = [name for key, name in existing.items() if key not in expected]
+            plans.append((table.name, stale, missing))
+    return plans
+
+
+def sync_unique_constraints():
+    """
+    모델에 없는 컬럼 구성의 기존 UNIQUE 키를 삭제하고 모델의 UNIQUE 키를 추가
+    (예: financial_ratios의 (company_id, report_date) → (company_id, fiscal_year),
+     upsert는 모델 키 기준으로 중복을 판단하므로 키가 다르면 같은 연도 행이 쌓임)
+    - SQLite는 ALTER TABLE로 제약 조건을 바꿀 수 없으므로 차이만 출력
+    :return: plan_unique_constraints() 결과
+    """
+    engine = get_engine()
+    plans = plan_unique_constraints(inspect(engine))
+    for table, stale, missing in plans:
+        columns = [
+            ", ".join(c.name for c in constraint.columns) for constraint in missing
+        ]
+        print(f"⚠️ {table} UNIQUE 키 불일치: 기존 {stale} → 모델 {columns}")
+    if engine.dialect.name == "sqlite":
+        return plans
+
+    drop = "DROP INDEX" if engine.dialect.name == "mysql" else "DROP CONSTRAINT"
+    with engine.begin() as connection:
+        for table, stale, missing in plans:
+            for name in stale:
+                connection.execute(text(f"ALTER TABLE {table} {drop} {name}"))
+                print(f"🗑️ UNIQUE 키 삭제: {table}.{name}")
+            for constraint in missing:
+                connection.execute(AddConstraint(constraint))
+                print(f"➕ UNIQUE 키 추가: {table}.{constraint.name}")
+    return plans
+
+
 if __name__ == "__main__":
     create_tables()
+    add_missing_columns()
+    add_missing_indexes()
+    sync_unique_constraints()
@@ -0,0 +1,287 @@
+"""
+stock_prices를 연도별 RANGE 파티션 테이블로 이전하고 조회용 인덱스 생성 (MySQL 8.0.13+)
+
+실행: python -m scripts.migrate_partitions [--chunk-size 50000] [--first-year 2015] [--bench] [--drop-old]
+      python -m scripts.migrate_partitions --extend   # 이미 파티션된 테이블에 다음 연도 파티션 추가
+"""
+
+import argparse
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from sqlalchemy import select
+
+from config.settings import BACKFILL_YEARS
+from database.change_log import advance_cursor, get_last_change_id, remove_cursor
+from database.db_connection import get_engine, session_scope
+from database.models import DataChange, StockPrice
+from scripts.initialize_db import add_missing_indexes
+
+# ✅ 이전 절차 (긴 테이블 잠금 없이 진행)
+# 1) stock_prices_new를 같은 구조 + 인덱스 + 연도별 파티션으로 생성 (빈 테이블이라 즉시 완료)
+# 2) id 구간별로 chunk씩 복사하고 매번 커밋 (행 잠금은 chunk 단위로만 유지)
+# 3) 복사 중 추가된 행(id 증가)과 변경된 행(data_changes 이력)을 따라잡기
+# 4) 두 테이블을 잠깐 WRITE 잠금 → 마지막 변경분 반영 → RENAME TABLE로 원자적 교체
+#    기존 테이블은 stock_prices_old로 남겨 두고 --drop-old일 때만 삭제
+# - 이전하는 동안 change_cursors에 consumer로 등록해서 따라잡기에 필요한 data_changes 이력이
+#   다른 빌더의 purge_changes()로 삭제되지 않도록 함 (끝나면 실패해도 커서 삭제)
+
+TABLE = StockPrice.__tablename__
+NEW_TABLE = f"{TABLE}_new"
+OLD_TABLE = f"{TABLE}_old"
+COLUMNS = [column.name for column in StockPrice.__table__.columns]
+
+# ✅ 변경 이력 consumer 이름 (이전 중에만 존재)
+CHANGE_CONSUMER = "migrate_partitions"
+
+# ✅ first_year 이전 데이터를 모두 담는 파티션 / 이후 연도를 담는 파티션
+_OLDEST_PARTITION = "pold"
+_MAX_PARTITION = "pmax"
+
+
+def partition_definitions(first_year, last_year):
+    """PARTITION BY RANGE (YEAR(date)) 절 (first_year 이전, 연도별, MAXVALUE 파티션)"""
+    partitions = [f"PARTITION {_OLDEST_PARTITION} VALUES LESS THAN ({first_year})"]
+    partitions += [
+        f"PARTITION p{year} VALUES LESS THAN ({year + 1})"
+        for year in range(first_year, last_year + 1)
+    ]
+    partitions.append(f"PARTITION {_MAX_PARTITION} VALUES LESS THAN MAXVALUE")
+    return (
+        "PARTITION BY RANGE (YEAR(date)) (\n    " + ",\n    ".join(partitions) + "\n)"
+    )
+
+
+def get_partitions(connection, table=TABLE):
+    """테이블의 파티션 이름 목록 (파티션되지 않은 테이블이면 빈 리스트)"""
+    rows = connection.exec_driver_sql(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+        "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION",
+        (table,),
+    )
+    return [name for (name,) in rows]
+
+
+def create_partitioned_table(connection, first_year, last_year):
+    """기존 테이블과 같은 구조의 빈 파티션 테이블 생성 + 모델에 정의된 인덱스 추가"""
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {NEW_TABLE}")
+    connection.exec_driver_sql(f"CREATE TABLE {NEW_TABLE} LIKE {TABLE}")
+    existing = {
+        name
+        for (name,) in connection.exec_driver_sql(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (NEW_TABLE,),
+        )
+    }
+    for index in StockPrice.__table__.indexes:
+        if index.name not in existing:
+            columns = ", ".join(column.name for column in index.columns)
+            connection.exec_driver_sql(
+                f"CREATE INDEX {index.name} ON {NEW_TABLE} ({columns})"
+            )
+    connection.exec_driver_sql(
+        f"ALTER TABLE {NEW_TABLE} {partition_definitions(first_year, last_year)}"
+    )
+    connection.commit()
+
+
+def _max_id(connection, table):
+    return connection.exec_driver_sql(f"SELECT MAX(id) FROM {table}").scalar() or 0
+
+
+def copy_rows(connection, after_id, until_id, chunk_size):
+    """id가 (after_id, until_id] 구간인 행을 chunk_size씩 복사 (chunk마다 커밋) :return: 복사한 행 수"""
+    column_list = ", ".join(COLUMNS)
+    copied = 0
+    started = time.perf_counter()
+    for lo in range(after_id, until_id, chunk_size):
+        hi = min(lo + chunk_size, until_id)
+        result = connection.exec_driver_sql(
+            f"INSERT INTO {NEW_TABLE} ({column_list}) "
+            f"SELECT {column_list} FROM {TABLE} WHERE id > %s AND id <= %s",
+            (lo, hi),
+        )
+        connection.commit()
+        copied += result.rowcount
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"   id {hi:,}/{until_id:,} 복사 ({copied:,}행, {copied / elapsed:,.0f}행/초)"
+        )
+    return copied
+
+
+def apply_changes(connection, after_change_id):
+    """
+    복사 이후 변경된 (company_id, 기간)을 data_changes 이력으로 찾아 다시 반영
+    :return: 반영한 마지막 data_changes.id
+    """
+    changes = connection.execute(
+        select(
+            DataChange.id, DataChange.key_id, DataChange.start_date, DataChange.end_date
+        )
+        .where(DataChange.id > after_change_id, DataChange.table_name == TABLE)
+        .order_by(DataChange.id)
+    ).all()
+    column_list = ", ".join(COLUMNS)
+    updates = ", ".join(
+        f"{name} = VALUES({name})" for name in COLUMNS if name not in ("id",)
+    )
+    for _, company_id, start, end in changes:
+        connection.exec_driver_sql(
+            f"INSERT INTO {NEW_TABLE} ({column_list}) "
+            f"SELECT {column_list} FROM {TABLE} "
+            f"WHERE company_id = %s AND date BETWEEN %s AND %s "
+            f"ON DUPLICATE KEY UPDATE {updates}",
+            (company_id, start, end),
+        )
+    connection.commit()
+    return changes[-1][0] if changes else after_change_id
+
+
+@contextmanager
+def track_changes():
+    """
+    이전하는 동안 change_cursors에 consumer로 등록 (purge_changes가 이후 이력을 지우지 않도록)
+    :return: 등록 시점의 마지막 data_changes.id (이후 변경분을 apply_changes로 따라잡음)
+    """
+    with session_scope() as session:
+        change_id = get_last_change_id(session)
+        advance_cursor(session, CHANGE_CONSUMER, change_id)
+    try:
+        yield change_id
+    finally:
+        with session_scope() as session:
+            remove_cursor(session, CHANGE_CONSUMER)
+
+
+def catch_up(connection, copied_id, change_id, chunk_size):
+    """복사 중 추가된 행 + 변경된 행 반영 :return: (복사한 마지막 id, 반영한 마지막 change id)"""
+    until_id = _max_id(connection, TABLE)
+    if until_id > copied_id:
+        copy_rows(connection, copied_id, until_id, chunk_size)
+    change_id = apply_changes(connection, change_id)
+    with session_scope() as session:
+        advance_cursor(session, CHANGE_CONSUMER, change_id)
+    return until_id, change_id
+
+
+def migrate(chunk_size, first_year, last_year, drop_old=False):
+    """stock_prices를 파티션 테이블로 이전 (이미 파티션되어 있으면 파티션만 연장)"""
+    engine = get_engine()
+    if engine.dialect.name != "mysql":
+        print(f"⚠️ 파티션은 MySQL에서만 지원합니다 (현재: {engine.dialect.name})")
+        add_missing_indexes()
+        return False
+
+    add_missing_indexes(exclude=(TABLE,))
+    with engine.connect() as connection:
+        if get_partitions(connection):
+            print(f"✅ {TABLE}는 이미 파티션되어 있습니다.")
+            extend_partitions(connection, last_year)
+            add_missing_indexes()
+            return False
+
+    with engine.connect() as connection, track_changes() as change_id:
+        # ✅ 1) 빈 파티션 테이블 생성 → 2) 현재 시점까지 chunk 복사
+        copied_id = _max_id(connection, TABLE)
+        create_partitioned_table(connection, first_year, last_year)
+        print(f"📦 {TABLE} → {NEW_TABLE} 복사 시작 (id ≤ {copied_id:,})")
+        copy_rows(connection, 0, copied_id, chunk_size)
+
+        # ✅ 3) 잠금 없이 따라잡기 (남은 변경분이 작아질 때까지 한 번 더)
+        copied_id, change_id = catch_up(connection, copied_id, change_id, chunk_size)
+
+        # ✅ 4) 짧은 WRITE 잠금 안에서 마지막 변경분 반영 후 교체
+        connection.exec_driver_sql(
+            f"LOCK TABLES {TABLE} WRITE, {NEW_TABLE} WRITE, "
+            f"{DataChange.__tablename__} READ"
+        )
+        try:
+            catch_up(connection, copied_id, change_id, chunk_size)
+            connection.exec_driver_sql(
+                f"RENAME TABLE {TABLE} TO {OLD_TABLE}, {NEW_TABLE} TO {TABLE}"
+            )
+        finally:
+            connection.exec_driver_sql("UNLOCK TABLES")
+        print(f"🔀 {TABLE} 교체 완료 (기존 테이블: {OLD_TABLE})")
+
+        if drop_old:
+            connection.exec_driver_sql(f"DROP TABLE {OLD_TABLE}")
+            print(f"🗑️ {OLD_TABLE} 삭제")
+    add_missing_indexes()
+    return True
+
+
+def extend_partitions(connection, last_year):
+    """pmax 파티션을 나눠 last_year까지 연도별 파티션 추가 (pmax가 비어 있으면 즉시 완료)"""
+    partitions = get_partitions(connection)
+    years = [int(name[1:]) for name in partitions if name[1:].isdigit()]
+    if _MAX_PARTITION not in partitions or not years or max(years) >= last_year:
+        return 0
+
+    new_years = range(max(years) + 1, last_year + 1)
+    definitions = [
+        f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in new_years
+    ]
+    definitions.append(f"PARTITION {_MAX_PARTITION} VALUES LESS THAN MAXVALUE")
+    connection.exec_driver_sql(
+        f"ALTER TABLE {TABLE} REORGANIZE PARTITION {_MAX_PARTITION} INTO "
+        f"({', '.join(definitions)})"
+    )
+    connection.commit()
+    print(f"➕ 파티션 추가: {', '.join(f'p{year}' for year in new_years)}")
+    return len(new_years)
+
+
+def main():
+    this_year = date.today().year
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument(
+        "--first-year",
+        type=int,
+        default=this_year - BACKFILL_YEARS,
+        help="연도별 파티션 시작 연도 (이전 데이터는 pold 파티션)",
+    )
+    parser.add_argument(
+        "--last-year",
+        type=int,
+        default=this_year + 1,
+        help="미리 만들어 둘 마지막 연도 파티션",
+    )
+    parser.add_argument(
+        "--extend", action="store_true", help="파티션 연장만 실행 (데이터 이전 없음)"
+    )
+    parser.add_argument(
+        "--bench", action="store_true", help="이전 전/후 조회 지연 시간 측정"
+    )
+    parser.add_argument(
+        "--drop-old", action="store_true", help="교체 후 기존 테이블 삭제"
+    )
+    args = parser.parse_args()
+
+    if args.extend:
+        with get_engine().connect() as connection:
+            extend_partitions(connection, args.last_year)
+        return
+
+    before = None
+    if args.bench:
+        from benchmarks.query_bench import format_results, run_query_bench
+
+        before = run_query_bench()
+        print("⏱️ 이전 전 조회 지연 시간")
+        print(format_results(before))
+
+    migrate(args.chunk_size, args.first_year, args.last_year, args.drop_old)
+
+    if args.bench:
+        print("⏱️ 이전 후 조회 지연 시간")
+        print(format_results(run_query_bench(), before))
+
+
+if __name__ == "__main__":
+    main()
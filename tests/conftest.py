@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import pytest
+
+# ✅ 저장소 모듈을 import하기 전에 환경 변수 설정 (config.settings는 import 시점에 값을 읽음)
+# - DB는 임시 SQLite 파일, 캐시 / Parquet 저장소 / 실행 지표 파일 / 실행 일지 / 응답 기록은 끔
+_TMP_DIR = tempfile.mkdtemp(prefix="stock_data_tests_")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["CACHE_ENABLED"] = "0"
+os.environ["PRICE_STORE_MODE"] = "db"
+os.environ["PRICE_REPLAY_MODE"] = "off"
+os.environ["METRICS_DIR"] = ""
+os.environ["RUN_JOURNAL_ENABLED"] = "0"
+os.environ["CHANGE_SETTLE_SECONDS"] = "0"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from database.db_connection import get_engine
+    from database.models import Base
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    """테스트마다 새 세션 (종료 후 모든 테이블 비우기)"""
+    from database.db_connection import get_session
+    from database.models import Base
+
+    session = get_session()
+    yield session
+    session.rollback()
+    session.close()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def add_companies(session):
+    """벤치마크 1개에 연결된 기업을 count개 등록하고 company_id 리스트 반환"""
+    from database.models import BenchmarkIndex, Company
+
+    def add(count=1, country="KR"):
+        benchmark = session.query(BenchmarkIndex).first()
+        if benchmark is None:
+            benchmark = BenchmarkIndex(
+                index_name="KOSPI", index_symbol="^KS11", country="KR"
+            )
+            session.add(benchmark)
+            session.flush()
+        start = session.query(Company).count()
+        companies = [
+            Company(
+                symbol=f"{start + i:06d}",
+                name=f"기업 {start + i}",
+                country=country,
+                benchmark_id=benchmark.id,
+            )
+            for i in range(1, count + 1)
+        ]
+        session.add_all(companies)
+        session.commit()
+        return [company.id for company in companies]
+
+    return add
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from valuation.beta import _returns, rolling_beta
+
+
+def _reference_beta(stock, market, window, min_periods):
+    """pandas rolling().cov() / rolling().var() (종목 / 벤치마크 수익률이 모두 있는 날만)"""
+    stock = pd.Series(stock)
+    market = pd.Series(market).where(stock.notna())
+    stock = stock.where(market.notna())
+    covariance = stock.rolling(window, min_periods=min_periods).cov(market)
+    variance = market.rolling(window, min_periods=min_periods).var()
+    return (covariance / variance).to_numpy()
+
+
+def test_rolling_beta_matches_pandas_reference():
+    rng = np.random.default_rng(0)
+    market = rng.normal(0, 0.01, 300)
+    stocks = np.column_stack(
+        [
+            1.5 * market + rng.normal(0, 0.005, 300),
+            -0.5 * market + rng.normal(0, 0.02, 300),
+            rng.normal(0, 0.01, 300),
+        ]
+    )
+    market[[10, 50, 51]] = np.nan
+    stocks[100:140, 1] = np.nan  # 거래 정지 구간
+    stocks[:30, 2] = np.nan  # 늦게 상장한 종목
+
+    beta = rolling_beta(stocks, market, window=60, min_periods=20)
+
+    for column in range(stocks.shape[1]):
+        expected = _reference_beta(stocks[:, column], market, 60, 20)
+        np.testing.assert_allclose(beta[:, column], expected, rtol=1e-7, atol=1e-10)
+
+
+def test_rolling_beta_is_nan_without_market_variance():
+    market = np.zeros(30)
+    stocks = np.random.default_rng(1).normal(0, 0.01, (30, 1))
+    assert np.isnan(rolling_beta(stocks, market, window=10, min_periods=5)).all()
+
+
+def test_returns_leave_first_and_missing_prices_nan():
+    prices = np.array([100.0, 110.0, np.nan, 121.0])
+    returns = _returns(prices)
+    assert np.isnan(returns[[0, 2, 3]]).all()
+    assert np.isclose(returns[1], 0.1)
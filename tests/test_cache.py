@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetch.cache import ProviderCache, includes_today
+
+YESTERDAY = (date.today() - timedelta(days=1)).strftime("%Y-%m-%d")
+PAST_KEY = {"symbol": "AAPL", "start": "2024-01-02", "end": "2024-01-31"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProviderCache(cache_dir=str(tmp_path), enabled=True)
+
+
+def _fetcher(frame):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return frame
+
+    return fetch, calls
+
+
+def test_frame_is_served_from_cache(cache):
+    fetch, calls = _fetcher(pd.DataFrame({"Close": [1.0, 2.0]}))
+    cache.get_or_fetch("yfinance", "ohlcv", PAST_KEY, fetch)
+    frame = cache.get_or_fetch("yfinance", "ohlcv", PAST_KEY, fetch)
+
+    assert len(calls) == 1
+    assert frame["Close"].tolist() == [1.0, 2.0]
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [pd.DataFrame(), pd.DataFrame({"Close": [np.nan, np.nan], "Volume": [None, None]})],
+)
+def test_empty_or_all_nan_frame_is_not_cached(cache, frame):
+    fetch, calls = _fetcher(frame)
+    cache.get_or_fetch("yfinance", "ohlcv", PAST_KEY, fetch)
+    cache.get_or_fetch("yfinance", "ohlcv", PAST_KEY, fetch)
+
+    assert len(calls) == 2
+    assert cache.stats()["writes"] == 0
+
+
+def test_range_ending_today_is_not_cached(cache):
+    key = {
+        "symbol": "AAPL",
+        "start": "2024-01-02",
+        "end": date.today().strftime("%Y%m%d"),
+    }
+    fetch, calls = _fetcher(pd.DataFrame({"Close": [1.0]}))
+    cache.get_or_fetch("pykrx", "ohlcv", key, fetch)
+    cache.get_or_fetch("pykrx", "ohlcv", key, fetch)
+
+    assert len(calls) == 2
+    assert cache.stats()["writes"] == 0
+
+
+def test_includes_today():
+    today = date(2024, 3, 4)
+    assert includes_today({"end": "2024-03-05"}, today)  # yfinance end는 다음 날
+    assert includes_today({"end": "20240304"}, today)
+    assert includes_today({"date": today}, today)
+    assert includes_today({"end": None}, today)
+    assert not includes_today({"start": "2024-03-04", "end": "2024-03-01"}, today)
+    assert not includes_today({"symbol": "AAPL", "statement": "financials"}, today)
+    assert not includes_today({"end": YESTERDAY})
@@ -0,0 +1,125 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func, select, update
+
+from database.change_log import (
+    advance_cursor,
+    get_cursor,
+    get_safe_change_id,
+    purge_changes,
+    read_changes,
+    record_changes,
+    summarize_keys,
+)
+from database.models import DataChange, StockPrice
+from database.upsert import bulk_upsert
+
+D1, D2, D3 = date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)
+TABLES = ["stock_prices", "financial_statements"]
+
+
+def _change_count(session):
+    return session.scalar(select(func.count()).select_from(DataChange))
+
+
+def test_summarize_keys_groups_dates_per_key():
+    keys = [(1, D2), (2, D1), (1, D3), (1, D1)]
+    assert summarize_keys(keys) == {1: (D1, D3), 2: (D1, D1)}
+
+
+def test_bulk_upsert_reports_changed_keys(session, add_companies):
+    (company_id,) = add_companies(1)
+    records = [
+        {"company_id": company_id, "date": day, "close_price": 10.0} for day in (D1, D2)
+    ]
+    changed = []
+    bulk_upsert(
+        session, StockPrice, records, ("company_id", "date"), changed_keys=changed
+    )
+    assert changed == [(company_id, D1), (company_id, D2)]
+
+    records[1]["close_price"] = 11.0
+    changed = []
+    bulk_upsert(
+        session, StockPrice, records, ("company_id", "date"), changed_keys=changed
+    )
+    assert changed == [(company_id, D2)]
+
+
+def test_first_read_has_no_cursor(session):
+    record_changes(session, "stock_prices", [(1, D1)])
+    session.commit()
+
+    changes, last_id = read_changes(session, "valuation_metrics", TABLES)
+    assert changes is None
+    assert last_id == session.scalar(select(func.max(DataChange.id)))
+
+
+def test_read_changes_after_cursor(session):
+    record_changes(session, "stock_prices", [(1, D1)])
+    session.commit()
+    _, last_id = read_changes(session, "valuation_metrics", TABLES)
+    advance_cursor(session, "valuation_metrics", last_id)
+    session.commit()
+
+    record_changes(session, "stock_prices", [(1, D3), (2, D2)])
+    record_changes(session, "stock_prices", [(1, D2)])
+    record_changes(session, "financial_statements", [(3, D1)])
+    record_changes(session, "benchmark_prices", [(9, D1)])
+    session.commit()
+
+    changes, new_last_id = read_changes(session, "valuation_metrics", TABLES)
+    assert new_last_id > last_id
+    # ✅ 커서 이전 변경(1, D1)은 제외, 같은 키의 여러 이력은 (최소 시작일, 최대 종료일)로 합침
+    assert changes == {
+        "stock_prices": {1: (D2, D3), 2: (D2, D2)},
+        "financial_statements": {3: (D1, D1)},
+    }
+
+    advance_cursor(session, "valuation_metrics", new_last_id)
+    session.commit()
+    assert get_cursor(session, "valuation_metrics") == new_last_id
+    assert read_changes(session, "valuation_metrics", TABLES) == (
+        {"stock_prices": {}, "financial_statements": {}},
+        new_last_id,
+    )
+
+
+def test_purge_keeps_changes_until_every_consumer_has_read_them(session):
+    record_changes(session, "stock_prices", [(1, D1)])
+    session.commit()
+    assert purge_changes(session) == 0  # consumer가 없으면 삭제하지 않음
+
+    first_id = session.scalar(select(func.max(DataChange.id)))
+    advance_cursor(session, "valuation_metrics", first_id)
+    advance_cursor(session, "beta", 0)
+    record_changes(session, "stock_prices", [(2, D2)])
+    session.commit()
+    assert purge_changes(session) == 0  # beta가 아직 아무것도 반영하지 않음
+
+    last_id = session.scalar(select(func.max(DataChange.id)))
+    advance_cursor(session, "beta", last_id)
+    session.commit()
+    assert purge_changes(session) == 1  # 두 consumer가 모두 반영한 first_id까지만 삭제
+    session.commit()
+    assert session.scalar(select(func.min(DataChange.id))) == last_id
+
+
+def test_safe_change_id_stops_before_unsettled_changes(session):
+    record_changes(session, "stock_prices", [(1, D1)])
+    record_changes(session, "stock_prices", [(2, D1)])
+    session.commit()
+    first_id, last_id = session.execute(
+        select(func.min(DataChange.id), func.max(DataChange.id))
+    ).one()
+
+    assert get_safe_change_id(session, settle_seconds=0) == last_id
+    # ✅ 모두 최근 이력이면 가장 작은 id 앞까지만 커서 이동
+    assert get_safe_change_id(session, settle_seconds=600) == first_id - 1
+
+    old = session.scalar(select(func.current_timestamp())) - timedelta(hours=1)
+    session.execute(
+        update(DataChange).where(DataChange.id == first_id).values(created_at=old)
+    )
+    session.commit()
+    assert get_safe_change_id(session, settle_seconds=600) == first_id
@@ -0,0 +1,97 @@
+from sqlalchemy import select
+
+from data_fetch.companies_info import (
+    get_existing_symbols,
+    register_companies,
+    save_companies,
+)
+from database.models import BenchmarkIndex, Company
+
+
+def _benchmark_id(session):
+    benchmark = BenchmarkIndex(index_name="KOSPI", index_symbol="^KS11", country="KR")
+    session.add(benchmark)
+    session.commit()
+    return benchmark.id
+
+
+def _company(symbol, benchmark_id, name=None):
+    return {
+        "symbol": symbol,
+        "name": name or f"기업 {symbol}",
+        "sector": "IT",
+        "country": "KR",
+        "benchmark_id": benchmark_id,
+        "shares_outstanding": 1000,
+    }
+
+
+def _symbols(session):
+    return set(session.scalars(select(Company.symbol)))
+
+
+def test_save_companies_upserts_by_symbol(session):
+    benchmark_id = _benchmark_id(session)
+    companies = [_company("000001", benchmark_id), _company("000002", benchmark_id)]
+
+    assert save_companies(session, companies) == {
+        "inserted": 2,
+        "updated": 0,
+        "unchanged": 0,
+    }
+    companies[0]["sector"] = "반도체"
+    assert save_companies(session, companies) == {
+        "inserted": 0,
+        "updated": 1,
+        "unchanged": 1,
+    }
+    assert get_existing_symbols(session) == {"000001", "000002"}
+
+
+def test_save_companies_skips_companies_without_benchmark(session):
+    benchmark_id = _benchmark_id(session)
+    result = save_companies(
+        session, [_company("000001", benchmark_id), _company("000002", None)]
+    )
+    assert result["inserted"] == 1
+    assert _symbols(session) == {"000001"}
+
+
+def test_register_companies_continues_after_failed_batch(session):
+    benchmark_id = _benchmark_id(session)
+    companies = {
+        "000001": _company("000001", benchmark_id),
+        "000002": {**_company("000002", benchmark_id), "name": None},  # NOT NULL 위반
+        "000003": _company("000003", benchmark_id),
+        "000004": _company("000004", benchmark_id),
+    }
+
+    saved = register_companies(
+        session, list(companies), companies.get, commit_size=2, workers=1
+    )
+
+    # ✅ 실패한 배치는 롤백되고, 다음 배치는 같은 세션으로 저장
+    assert saved == 2
+    assert _symbols(session) == {"000003", "000004"}
+
+
+def test_update_shares_outstanding_records_changes(session, monkeypatch):
+    from data_fetch import companies_info
+    from database.models import DataChange
+
+    benchmark_id = _benchmark_id(session)
+    save_companies(
+        session, [_company("000001", benchmark_id), _company("000002", benchmark_id)]
+    )
+    monkeypatch.setattr(
+        companies_info,
+        "get_kr_shares_outstanding",
+        lambda: {"000001": 1000, "000002": 2500},
+    )
+
+    assert companies_info.update_shares_outstanding() == 1
+
+    session.expire_all()
+    changed_id = session.scalar(select(Company.id).where(Company.symbol == "000002"))
+    changes = session.execute(select(DataChange.table_name, DataChange.key_id)).all()
+    assert changes == [("companies", changed_id)]
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+
+from database import db_connection
+from database.db_connection import get_engine, get_session, session_scope
+from database.models import BenchmarkIndex
+
+
+def _benchmark_count():
+    with session_scope() as session:
+        return session.scalar(select(func.count()).select_from(BenchmarkIndex))
+
+
+def test_engine_is_shared_per_process(engine):
+    assert get_engine() is engine
+    session = get_session()
+    try:
+        assert session.get_bind() is engine
+    finally:
+        session.close()
+
+
+def test_forked_process_gets_new_engine(engine, monkeypatch):
+    parent_pid = db_connection.os.getpid()
+    monkeypatch.setattr(db_connection.os, "getpid", lambda: parent_pid + 1)
+    child_engine = get_engine()
+    assert child_engine is not engine
+    assert get_engine() is child_engine
+
+
+def test_sqlite_engine_skips_pool_size_options():
+    options = db_connection._engine_options("sqlite:///:memory:")
+    assert "pool_size" not in options
+    options = db_connection._engine_options("mysql+pymysql://user@localhost/db")
+    assert {"pool_size", "max_overflow", "pool_recycle"} <= set(options)
+
+
+def test_session_scope_commits_on_success(session):
+    with session_scope() as scoped:
+        scoped.add(BenchmarkIndex(index_name="S&P 500", index_symbol="^GSPC"))
+    assert _benchmark_count() == 1
+
+
+def test_session_scope_rolls_back_on_error(session):
+    with pytest.raises(RuntimeError):
+        with session_scope() as scoped:
+            scoped.add(BenchmarkIndex(index_name="S&P 500", index_symbol="^GSPC"))
+            scoped.flush()
+            raise RuntimeError("저장 실패")
+    assert _benchmark_count() == 0
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def cursor(self, cursor=None):
+        return cursor
+
+    def close(self):
+        self.closed = True
+
+
+def test_db_connection_defaults_to_dict_cursor(monkeypatch):
+    import pymysql
+
+    from config import db_config
+
+    raw = _FakeConnection()
+    engine = type("Engine", (), {"raw_connection": lambda self: raw})()
+    monkeypatch.setattr(db_connection, "get_engine", lambda: engine)
+
+    connection = db_config.get_db_connection()
+    assert connection.cursor() is pymysql.cursors.DictCursor
+    assert connection.cursor(pymysql.cursors.Cursor) is pymysql.cursors.Cursor
+    connection.close()
+    assert raw.closed
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from data_fetch import cache as cache_module
+from data_fetch.cache import ProviderCache
+from data_fetch.financial_data import extract_kr_statements, statements_frame
+
+_META = "[D210000] 재무상태표"
+
+
+def _table(rows, periods):
+    """dart_fss 재무제표 표와 같은 (2단 컬럼) DataFrame"""
+    columns = pd.MultiIndex.from_tuples(
+        [(_META, "concept_id"), (_META, "label_ko")]
+        + [(period, ("연결재무제표",)) for period in periods]
+    )
+    return pd.DataFrame(
+        [[concept, label, *values] for concept, label, values in rows],
+        columns=columns,
+    )
+
+
+class _Statements:
+    def __init__(self):
+        self.tables = {
+            "bs": _table(
+                [("ifrs_Assets", "자산총계", [300.0, 200.0])], ["20231231", "20221231"]
+            ),
+            "is": _table(
+                [
+                    ("ifrs_Revenue", " 매출액 ", [1000.0, 900.0]),
+                    ("ifrs_ProfitLoss", "당기순이익", [100.0, None]),
+                ],
+                ["20230101-20231231", "20220101-20221231"],
+            ),
+            "cis": None,
+            "cf": _table([], ["20230101-20231231"]),
+        }
+
+    def __getitem__(self, statement_type):
+        return self.tables[statement_type]
+
+
+class _Corp:
+    corp_code = "00126380"
+
+    def __init__(self):
+        self.requests = 0
+
+    def extract_fs(self, report_tp, year):
+        self.requests += 1
+        return _Statements()
+
+
+def test_statements_frame_is_indexed_by_report_date():
+    frame = statements_frame(_Statements())
+
+    assert frame.index.tolist() == ["2022-12-31", "2023-12-31"]
+    assert frame.loc["2023-12-31", "자산총계"] == 300.0
+    assert frame.loc["2023-12-31", "매출액"] == 1000.0
+    assert frame.loc["2023-12-31", "당기순이익"] == 100.0
+    assert pd.isna(frame.loc["2022-12-31", "당기순이익"])
+
+
+@pytest.fixture
+def enabled_cache(tmp_path, monkeypatch):
+    cache = ProviderCache(cache_dir=str(tmp_path), enabled=True)
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    return cache
+
+
+def test_second_extract_is_served_from_disk_cache(enabled_cache):
+    corp = _Corp()
+    first = extract_kr_statements(corp)
+    second = extract_kr_statements(corp)
+
+    # ✅ 캐시 키를 만들기 위한 추가 요청 없이, 두 번째 호출은 요청 없음
+    assert corp.requests == 1
+    assert enabled_cache.stats()["writes"] == 1
+    pd.testing.assert_frame_equal(first, second)
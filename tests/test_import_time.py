@@ -0,0 +1,15 @@
+import pytest
+
+from scripts.check_import_time import DEFAULT_BUDGET, MODULES, measure_import
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_within_budget(module):
+    elapsed, loaded = measure_import(module)
+    assert loaded == []
+    assert elapsed <= DEFAULT_BUDGET
+
+
+def test_companies_info_imports_pandas_lazily():
+    _, loaded = measure_import("data_fetch.companies_info", heavy=["pandas"])
+    assert loaded == []
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import inspect
+
+from database.models import Base, FinancialRatio
+from scripts.initialize_db import plan_unique_constraints, sync_unique_constraints
+
+
+@pytest.fixture
+def old_ratio_table(engine):
+    """UNIQUE 키가 (company_id, report_date)였던 예전 financial_ratios"""
+    table = FinancialRatio.__table__
+    with engine.begin() as connection:
+        table.drop(connection)
+        connection.exec_driver_sql(
+            "CREATE TABLE financial_ratios ("
+            "id INTEGER PRIMARY KEY, company_id INTEGER NOT NULL, "
+            "report_date DATE, fiscal_year INTEGER NOT NULL, "
+            "CONSTRAINT uq_company_report UNIQUE (company_id, report_date))"
+        )
+    yield
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE financial_ratios")
+    Base.metadata.create_all(engine, tables=[table])
+
+
+def test_model_unique_keys_match_new_database(engine):
+    assert plan_unique_constraints(inspect(engine)) == []
+
+
+def test_old_unique_key_is_detected(engine, old_ratio_table):
+    plans = sync_unique_constraints()
+
+    assert len(plans) == 1
+    table, stale, missing = plans[0]
+    assert table == "financial_ratios"
+    assert stale == ["uq_company_report"]
+    assert [constraint.name for constraint in missing] == [
+        "uq_company_financial_ratios"
+    ]
@@ -0,0 +1,134 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from data_fetch import stock_data
+from database.models import StockPrice
+
+TRADING_DAYS = [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)]
+
+
+class _Router:
+    """pykrx 사용 가능 여부만 흉내내는 가격 provider 라우터"""
+
+    def __init__(self, pykrx=True):
+        self.pykrx = pykrx
+
+    def available(self, name):
+        return self.pykrx
+
+    def measure(self, name, fn, symbols=1):
+        return fn()
+
+
+@pytest.fixture
+def fake_router(monkeypatch):
+    def install(pykrx=True):
+        router = _Router(pykrx)
+        monkeypatch.setattr(stock_data, "get_price_router", lambda: router)
+        monkeypatch.setattr(
+            stock_data, "get_kr_trading_days", lambda start, end=None: TRADING_DAYS
+        )
+        return router
+
+    return install
+
+
+def _companies(count):
+    return [(i, f"{i:06d}", "KR") for i in range(1, count + 1)]
+
+
+def test_by_date_jobs_for_existing_kr_companies(fake_router):
+    fake_router()
+    companies = _companies(3)
+    latest = {1: date(2024, 3, 1), 2: date(2024, 3, 1)}
+
+    jobs = stock_data.build_fetch_jobs(companies, latest, kr_fetch_mode="by_date")
+
+    by_date = [job for job in jobs if job[0] == "KR_DATE"]
+    assert [trade_date for _, _, trade_date in by_date] == TRADING_DAYS
+    assert all({item[0] for item in job[1]} == {1, 2} for job in by_date)
+    # ✅ 저장된 이력이 없는 종목은 종목별 전체 기간 작업
+    assert [job[1][0][0] for job in jobs if job[0] == "KR"] == [3]
+
+
+def test_by_ticker_mode_and_pykrx_cooldown_fall_back_to_ticker_jobs(fake_router):
+    companies = _companies(2)
+    latest = {1: date(2024, 3, 1), 2: date(2024, 3, 1)}
+
+    fake_router()
+    jobs = stock_data.build_fetch_jobs(companies, latest, kr_fetch_mode="by_ticker")
+    assert [job[0] for job in jobs] == ["KR", "KR"]
+
+    fake_router(pykrx=False)
+    jobs = stock_data.build_fetch_jobs(companies, latest, kr_fetch_mode="by_date")
+    assert [job[0] for job in jobs] == ["KR", "KR"]
+
+
+def test_auto_mode_picks_cheaper_plan(fake_router):
+    fake_router()
+    latest = {i: date(2024, 3, 1) for i in range(1, 5)}
+
+    # 종목 2개 < 거래일 3개 → 종목별, 종목 4개 > 거래일 3개 → 거래일별
+    jobs = stock_data.build_fetch_jobs(_companies(2), latest, kr_fetch_mode="auto")
+    assert {job[0] for job in jobs} == {"KR"}
+    jobs = stock_data.build_fetch_jobs(_companies(4), latest, kr_fetch_mode="auto")
+    assert {job[0] for job in jobs} == {"KR_DATE"}
+
+
+def test_market_snapshot_is_split_by_company(fake_router, monkeypatch):
+    from pykrx import stock
+
+    fake_router()
+    snapshot = pd.DataFrame(
+        {
+            "시가": [100.0, 200.0, 300.0],
+            "고가": [110.0, 210.0, 310.0],
+            "저가": [90.0, 190.0, 290.0],
+            "종가": [105.0, 205.0, 305.0],
+            "거래량": [1000, 2000, 3000],
+        },
+        index=pd.Index(["000001", "000002", "999999"], name="티커"),
+    )
+    monkeypatch.setattr(stock, "get_market_ohlcv", lambda day, market: snapshot)
+
+    trade_date = TRADING_DAYS[0]
+    companies = [
+        (1, "000001", trade_date),
+        (2, "000002", date(2024, 3, 5)),  # 수집 시작일 이전 → 제외
+    ]
+    records = stock_data.fetch_kr_market_data(trade_date, companies)
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["company_id"] == 1
+    assert record["date"] == trade_date
+    assert record["close_price"] == 105.0
+    assert record["adjusted_close_price"] == 105.0
+    assert record["volume"] == 1000
+
+
+def test_save_market_stock_data_upserts_all_companies(session, add_companies):
+    company_ids = add_companies(2)
+    trade_date = TRADING_DAYS[0]
+    records = [
+        {
+            "company_id": company_id,
+            "date": trade_date,
+            "open_price": 10.0,
+            "high_price": 11.0,
+            "low_price": 9.0,
+            "close_price": 10.5,
+            "adjusted_close_price": 10.5,
+            "volume": 100,
+        }
+        for company_id in company_ids
+    ]
+
+    result = stock_data.save_market_stock_data(trade_date, records)
+    assert result == {"inserted": 2, "updated": 0, "unchanged": 0}
+    result = stock_data.save_market_stock_data(trade_date, records)
+    assert result == {"inserted": 0, "updated": 0, "unchanged": 2}
+    assert session.scalar(select(func.count()).select_from(StockPrice)) == 2
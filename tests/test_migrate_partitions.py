@@ -0,0 +1,118 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, inspect, select
+
+from database.change_log import (
+    advance_cursor,
+    get_cursor,
+    get_last_change_id,
+    purge_changes,
+    record_changes,
+)
+from database.models import DataChange
+from scripts import migrate_partitions
+from scripts.migrate_partitions import (
+    CHANGE_CONSUMER,
+    catch_up,
+    extend_partitions,
+    migrate,
+    partition_definitions,
+    track_changes,
+)
+
+
+class _Connection:
+    """실행한 SQL만 기록하는 커넥션"""
+
+    def __init__(self):
+        self.statements = []
+
+    def exec_driver_sql(self, sql, params=None):
+        self.statements.append(sql)
+
+    def commit(self):
+        pass
+
+
+def test_partition_definitions_clause():
+    assert partition_definitions(2022, 2024) == (
+        "PARTITION BY RANGE (YEAR(date)) (\n"
+        "    PARTITION pold VALUES LESS THAN (2022),\n"
+        "    PARTITION p2022 VALUES LESS THAN (2023),\n"
+        "    PARTITION p2023 VALUES LESS THAN (2024),\n"
+        "    PARTITION p2024 VALUES LESS THAN (2025),\n"
+        "    PARTITION pmax VALUES LESS THAN MAXVALUE\n"
+        ")"
+    )
+
+
+def test_extend_partitions_splits_max_partition(monkeypatch):
+    partitions = ["pold", "p2023", "p2024", "pmax"]
+    monkeypatch.setattr(migrate_partitions, "get_partitions", lambda c: partitions)
+    connection = _Connection()
+
+    assert extend_partitions(connection, 2026) == 2
+    assert connection.statements == [
+        "ALTER TABLE stock_prices REORGANIZE PARTITION pmax INTO ("
+        "PARTITION p2025 VALUES LESS THAN (2026), "
+        "PARTITION p2026 VALUES LESS THAN (2027), "
+        "PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    ]
+
+    # ✅ 이미 last_year까지 있으면 아무것도 하지 않음
+    connection = _Connection()
+    assert extend_partitions(connection, 2024) == 0
+    assert connection.statements == []
+
+
+def test_migrate_on_sqlite_only_adds_indexes(engine):
+    assert migrate(1000, 2022, 2024) is False
+    indexes = {index["name"] for index in inspect(engine).get_indexes("stock_prices")}
+    assert "ix_stock_prices_date" in indexes
+
+
+def _record(session, count):
+    for day in range(1, count + 1):
+        record_changes(session, "stock_prices", [(1, date(2024, 1, day))])
+    session.commit()
+    return session.scalar(select(func.max(DataChange.id)))
+
+
+def _purge_after_other_consumer(session):
+    """다른 빌더가 모든 이력을 반영하고 purge_changes 실행"""
+    advance_cursor(session, "price_matrix", get_last_change_id(session))
+    session.commit()
+    purge_changes(session)
+    session.commit()
+    return session.scalars(select(DataChange.id).order_by(DataChange.id)).all()
+
+
+def test_migration_cursor_keeps_changes_until_caught_up(session, monkeypatch):
+    started_id = _record(session, 2)
+    with track_changes() as change_id:
+        assert change_id == started_id
+        last_id = _record(session, 3)
+
+        # ✅ 이전 시작 이후 이력은 따라잡기 전까지 삭제되지 않음
+        assert _purge_after_other_consumer(session) == [
+            started_id + 1,
+            started_id + 2,
+            started_id + 3,
+        ]
+
+        monkeypatch.setattr(migrate_partitions, "_max_id", lambda c, t: 0)
+        monkeypatch.setattr(migrate_partitions, "apply_changes", lambda c, i: last_id)
+        assert catch_up(None, 0, change_id, 1000) == (0, last_id)
+        assert get_cursor(session, CHANGE_CONSUMER) == last_id
+        assert _purge_after_other_consumer(session) == []
+
+    # ✅ 이전이 끝나면 커서를 지워서 이후 이력 삭제를 막지 않음
+    assert get_cursor(session, CHANGE_CONSUMER) is None
+
+
+def test_migration_cursor_removed_on_failure(session):
+    with pytest.raises(RuntimeError):
+        with track_changes():
+            raise RuntimeError("복사 실패")
+    assert get_cursor(session, CHANGE_CONSUMER) is None
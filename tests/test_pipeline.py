@@ -0,0 +1,42 @@
+from data_fetch.pipeline import run_pipeline
+
+
+def _fetch(job):
+    if job == "broken":
+        raise RuntimeError("요청 실패")
+    return [(job, f"{job}-data")] if job != "empty" else []
+
+
+def test_run_pipeline_counts_saves():
+    saved = {}
+
+    def save(key, payload):
+        saved[key] = payload
+        return {"inserted": 1}
+
+    stats = run_pipeline(
+        ["A", "B", "empty", "broken"], _fetch, save, fetch_workers=2, write_workers=2
+    )
+
+    assert saved == {"A": "A-data", "B": "B-data"}
+    assert stats == {
+        "jobs": 4,
+        "fetched": 2,
+        "saved": 2,
+        "fetch_failed": 1,
+        "save_failed": 0,
+    }
+
+
+def test_save_returning_none_is_a_failure():
+    def save(key, payload):
+        if key == "A":
+            return None  # ✅ 예외를 직접 처리한 저장 함수 (save_stock_data 등)
+        if key == "B":
+            raise RuntimeError("DB 오류")
+        return {"inserted": 1}
+
+    stats = run_pipeline(["A", "B", "C"], _fetch, save, fetch_workers=1)
+
+    assert stats["saved"] == 1
+    assert stats["save_failed"] == 2
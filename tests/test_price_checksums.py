@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select, update
+
+from data_fetch.stock_data import save_market_stock_data, save_stock_data
+from database.models import PriceChecksum, StockPrice
+from database.price_checksums import block_checksum, split_unchanged_months
+
+# ✅ 1월 중순 ~ 4월 중순: 2월 / 3월만 수집 기간이 그 달 전체를 덮음
+START, END = date(2024, 1, 15), date(2024, 4, 15)
+FEB, MAR = date(2024, 2, 1), date(2024, 3, 1)
+
+
+def _history(start=START, end=END, close=10.0):
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return [
+        {
+            "date": day,
+            "open_price": close,
+            "high_price": close,
+            "low_price": close,
+            "close_price": close,
+            "adjusted_close_price": close,
+            "volume": 100,
+        }
+        for day in days
+        if day.weekday() < 5
+    ]
+
+
+def _checksums(session):
+    session.expire_all()
+    return dict(
+        session.execute(select(PriceChecksum.month, PriceChecksum.checksum)).all()
+    )
+
+
+def _tamper(session, company_id, day, close):
+    """체크섬을 지우지 않고 DB 값만 직접 변경"""
+    session.execute(
+        update(StockPrice)
+        .where(StockPrice.company_id == company_id, StockPrice.date == day)
+        .values(close_price=close)
+    )
+    session.commit()
+
+
+def _close(session, company_id, day):
+    session.expire_all()
+    return float(
+        session.scalar(
+            select(StockPrice.close_price).where(
+                StockPrice.company_id == company_id, StockPrice.date == day
+            )
+        )
+    )
+
+
+def test_block_checksum_ignores_order_and_float_noise():
+    rows = [{"company_id": 1, **row} for row in _history(FEB, date(2024, 2, 29))]
+    noisy = [dict(row, close_price=row["close_price"] + 1e-9) for row in rows]
+    assert block_checksum(rows) == block_checksum(list(reversed(noisy)))
+    changed = [dict(rows[0], close_price=11.0)] + rows[1:]
+    assert block_checksum(rows) != block_checksum(changed)
+
+
+def test_only_fully_covered_months_get_checksums(session, add_companies):
+    (company_id,) = add_companies(1)
+    records = [{"company_id": company_id, **row} for row in _history()]
+
+    pending, skipped, checksums = split_unchanged_months(session, company_id, records)
+
+    assert (len(pending), skipped) == (len(records), 0)
+    assert [row["month"] for row in checksums] == [FEB, MAR]
+
+
+def test_unchanged_month_is_skipped(session, add_companies):
+    (company_id,) = add_companies(1)
+    history = _history()
+    assert save_stock_data(company_id, history)["inserted"] == len(history)
+    assert set(_checksums(session)) == {FEB, MAR}
+
+    # ✅ 체크섬이 같은 달(2월)은 비교 / 쓰기를 모두 건너뛰므로 DB 값이 그대로 남음
+    #    첫 달 / 마지막 달(1월, 4월)은 항상 기존 값과 비교해서 다시 씀
+    _tamper(session, company_id, date(2024, 2, 5), 99.0)
+    _tamper(session, company_id, date(2024, 1, 16), 99.0)
+
+    result = save_stock_data(company_id, history)
+    assert result["inserted"] == 0
+    assert result["updated"] == 1
+    assert result["unchanged"] == len(history) - 1
+    assert _close(session, company_id, date(2024, 2, 5)) == 99.0
+    assert _close(session, company_id, date(2024, 1, 16)) == 10.0
+
+
+def test_changed_month_is_rewritten(session, add_companies):
+    (company_id,) = add_companies(1)
+    save_stock_data(company_id, _history())
+    before = _checksums(session)
+
+    history = _history()
+    for row in history:
+        if row["date"] == date(2024, 3, 5):
+            row["close_price"] = 12.0
+    result = save_stock_data(company_id, history)
+
+    assert result["updated"] == 1
+    assert _close(session, company_id, date(2024, 3, 5)) == 12.0
+    after = _checksums(session)
+    assert after[FEB] == before[FEB]
+    assert after[MAR] != before[MAR]
+
+
+def test_partial_month_does_not_replace_checksum(session, add_companies):
+    (company_id,) = add_companies(1)
+    save_stock_data(company_id, _history())
+    before = _checksums(session)
+
+    # ✅ 증분 수집처럼 2월 일부만 다시 저장해도 2월 체크섬은 그대로
+    save_stock_data(company_id, _history(date(2024, 2, 20), date(2024, 2, 27)))
+    assert _checksums(session) == before
+
+
+def test_market_snapshot_invalidates_changed_month(session, add_companies):
+    (company_id,) = add_companies(1)
+    save_stock_data(company_id, _history())
+
+    (record,) = _history(date(2024, 2, 5), date(2024, 2, 5), close=20.0)
+    save_market_stock_data(record["date"], [{"company_id": company_id, **record}])
+
+    # ✅ 2월은 다른 경로로 바뀌었으므로 다음 종목별 저장에서 기존 값과 다시 비교
+    assert set(_checksums(session)) == {MAR}
+    result = save_stock_data(company_id, _history())
+    assert result["updated"] == 1
+    assert _close(session, company_id, date(2024, 2, 5)) == 10.0
+    assert set(_checksums(session)) == {FEB, MAR}
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import update
+
+from database.change_log import record_changes
+from database.models import StockPrice
+from data_processing.price_matrix import (
+    MATRIX_FIELDS,
+    _append_rows,
+    _field_path,
+    build_price_matrix,
+    open_price_matrix,
+)
+
+START = date(2024, 1, 1)
+
+
+def _add_prices(session, company_ids, days, offset=0):
+    session.add_all(
+        StockPrice(
+            company_id=company_id,
+            date=START + timedelta(days=day),
+            adjusted_close_price=100 * company_id + day,
+            volume=1000 * company_id + day,
+        )
+        for company_id in company_ids
+        for day in days
+        # ✅ 마지막 종목은 첫 거래일 주가가 없음 (빈 칸은 NaN)
+        if not (company_id == company_ids[-1] and day == offset)
+    )
+    session.commit()
+
+
+def _assert_same_matrix(left, right):
+    left, right = open_price_matrix(left), open_price_matrix(right)
+    np.testing.assert_array_equal(left.dates, right.dates)
+    np.testing.assert_array_equal(left.company_ids, right.company_ids)
+    for field in MATRIX_FIELDS:
+        np.testing.assert_array_equal(left.field(field), right.field(field))
+
+
+def test_incremental_append_matches_full_rebuild(session, add_companies, tmp_path):
+    company_ids = add_companies(3)
+    _add_prices(session, company_ids, range(30))
+    assert build_price_matrix(tmp_path / "inc")["mode"] == "full"
+
+    # ✅ 새 거래일 추가 + 겹침 기간 수정 + 겹침 기간 이전 수정(변경 이력)
+    _add_prices(session, company_ids, range(30, 33), offset=30)
+    old_day = START + timedelta(days=2)
+    session.execute(
+        update(StockPrice)
+        .where(StockPrice.company_id == company_ids[0])
+        .where(StockPrice.date.in_([old_day, START + timedelta(days=28)]))
+        .values(adjusted_close_price=1)
+    )
+    record_changes(session, "stock_prices", [(company_ids[0], old_day)])
+    session.commit()
+
+    stats = build_price_matrix(tmp_path / "inc")
+    assert stats["mode"] == "incremental"
+    assert stats["dates"] == 33
+
+    assert build_price_matrix(tmp_path / "full", full=True)["mode"] == "full"
+    _assert_same_matrix(tmp_path / "inc", tmp_path / "full")
+    assert open_price_matrix(tmp_path / "inc").frame("adjusted_close").loc[
+        str(old_day), company_ids[0]
+    ] == pytest.approx(1)
+
+
+def test_new_company_triggers_full_rebuild(session, add_companies, tmp_path):
+    company_ids = add_companies(2)
+    _add_prices(session, company_ids, range(10))
+    build_price_matrix(tmp_path)
+
+    new_id = add_companies(1)
+    _add_prices(session, new_id, [10])
+
+    stats = build_price_matrix(tmp_path)
+    assert stats["mode"] == "full"
+    assert stats["companies"] == 3
+    matrix = open_price_matrix(tmp_path)
+    assert matrix.company_ids.tolist() == sorted(company_ids + new_id)
+    assert np.isnan(matrix.field("volume")[:10, 2]).all()
+
+
+def test_append_refuses_stale_row_count(session, add_companies, tmp_path):
+    _add_prices(session, add_companies(2), range(5))
+    build_price_matrix(tmp_path)
+    path = _field_path(tmp_path, "volume")
+
+    blank = np.full((1, 2), np.nan)
+    assert not _append_rows(path, blank, expected_rows=4)
+    assert _append_rows(path, blank, expected_rows=5)
+    assert np.load(path, mmap_mode="r").shape == (6, 2)
+
+
+def test_price_matrix_reads_back_values(session, add_companies, tmp_path):
+    company_ids = add_companies(3)
+    _add_prices(session, company_ids, range(5))
+    build_price_matrix(tmp_path)
+
+    matrix = open_price_matrix(tmp_path)
+    assert matrix.field("adjusted_close").shape == (5, 3)
+    assert matrix.field("volume")[4, 1] == 1000 * company_ids[1] + 4
+    assert np.isnan(matrix.field("adjusted_close")[0, 2])
+
+    frame = matrix.frame(
+        "adjusted_close",
+        start=START + timedelta(days=1),
+        end=START + timedelta(days=3),
+        company_ids=[company_ids[2], 999, company_ids[0]],
+    )
+    assert frame.index.strftime("%Y-%m-%d").tolist() == [
+        "2024-01-02",
+        "2024-01-03",
+        "2024-01-04",
+    ]
+    # ✅ 행렬에 없는 종목은 제외, 열 순서는 요청 순서
+    assert frame.columns.tolist() == [company_ids[2], company_ids[0]]
+    assert frame[company_ids[2]].tolist() == [
+        100 * company_ids[2] + day for day in (1, 2, 3)
+    ]
+
+
+def test_open_missing_matrix_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        open_price_matrix(tmp_path)
@@ -0,0 +1,115 @@
+import glob
+import os
+from datetime import date
+
+from database.price_store import (
+    PriceStoreWriter,
+    compact_store,
+    get_store_latest_dates,
+    read_prices,
+)
+
+COUNTRIES = {1: "US", 2: "KR"}
+
+
+def _record(company_id, day, close):
+    return {
+        "company_id": company_id,
+        "date": day,
+        "open_price": close,
+        "high_price": close,
+        "low_price": close,
+        "close_price": close,
+        "adjusted_close_price": close,
+        "volume": 100,
+    }
+
+
+def _parts(store_dir):
+    return glob.glob(os.path.join(store_dir, "stock_prices", "*", "*", "*.parquet"))
+
+
+def _write(store_dir, records, flush_rows=1000):
+    writer = PriceStoreWriter("stock_prices", COUNTRIES, flush_rows, str(store_dir))
+    writer.add(records)
+    writer.flush()
+    return writer
+
+
+def test_writer_partitions_by_country_and_year(tmp_path):
+    writer = _write(
+        tmp_path,
+        [
+            _record(1, date(2023, 12, 29), 10.0),
+            _record(1, date(2024, 1, 2), 11.0),
+            _record(2, date(2024, 1, 2), 20.0),
+        ],
+    )
+    assert writer.written == 3
+    partitions = {
+        os.path.relpath(os.path.dirname(path), tmp_path) for path in _parts(tmp_path)
+    }
+    assert partitions == {
+        os.path.join("stock_prices", "country=US", "year=2023"),
+        os.path.join("stock_prices", "country=US", "year=2024"),
+        os.path.join("stock_prices", "country=KR", "year=2024"),
+    }
+
+
+def test_writer_flushes_when_buffer_is_full(tmp_path):
+    writer = PriceStoreWriter("stock_prices", COUNTRIES, 2, str(tmp_path))
+    writer.add([_record(1, date(2024, 1, 2), 10.0)])
+    assert writer.written == 0
+    writer.add([_record(1, date(2024, 1, 3), 11.0)])
+    assert writer.written == 2
+
+
+def test_read_prices_filters_and_keeps_last_write(tmp_path):
+    _write(
+        tmp_path,
+        [_record(1, date(2024, 1, 2), 10.0), _record(2, date(2024, 1, 2), 20.0)],
+    )
+    _write(
+        tmp_path,
+        [_record(1, date(2024, 1, 2), 12.0), _record(1, date(2024, 1, 3), 13.0)],
+    )
+
+    frame = read_prices(ids=[1], start=date(2024, 1, 1), store_dir=str(tmp_path))
+    assert frame["date"].tolist() == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert frame["close_price"].tolist() == [12.0, 13.0]
+
+    frame = read_prices(
+        countries=["KR"], columns=["close_price"], store_dir=str(tmp_path)
+    )
+    assert frame["company_id"].tolist() == [2]
+    assert list(frame.columns) == ["company_id", "date", "country", "close_price"]
+
+
+def test_compact_store_merges_parts(tmp_path):
+    _write(tmp_path, [_record(1, date(2024, 1, 2), 10.0)])
+    _write(
+        tmp_path,
+        [_record(1, date(2024, 1, 2), 12.0), _record(1, date(2024, 1, 3), 13.0)],
+    )
+    assert len(_parts(tmp_path)) == 2
+
+    assert compact_store(store_dir=str(tmp_path)) == 1
+    assert len(_parts(tmp_path)) == 1
+    frame = read_prices(store_dir=str(tmp_path))
+    assert frame["close_price"].tolist() == [12.0, 13.0]
+
+
+def test_store_latest_dates(tmp_path):
+    assert get_store_latest_dates(store_dir=str(tmp_path)) == {}
+    _write(
+        tmp_path,
+        [
+            _record(1, date(2023, 12, 29), 10.0),
+            _record(1, date(2024, 1, 3), 11.0),
+            _record(2, date(2024, 1, 2), 20.0),
+        ],
+    )
+    assert get_store_latest_dates(store_dir=str(tmp_path)) == {
+        1: date(2024, 1, 3),
+        2: date(2024, 1, 2),
+    }
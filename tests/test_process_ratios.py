@@ -0,0 +1,123 @@
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from database.change_log import record_changes
+from database.models import FinancialRatio, FinancialStatement
+from data_processing.process_financials import (
+    AMOUNT_COLUMNS,
+    prepare_financial_statements,
+    round_decimal,
+    safe_ratio,
+)
+from data_processing.process_ratios import compute_ratios, update_financial_ratios
+
+
+def _statement(company_id, year, **values):
+    row = {name: 100.0 for name in AMOUNT_COLUMNS}
+    row.update(
+        company_id=company_id,
+        report_date=date(year, 12, 31),
+        dividend_payout_ratio=0.0,
+        **values,
+    )
+    return row
+
+
+def _ratios(rows):
+    statements = prepare_financial_statements(pd.DataFrame(rows))
+    frame = compute_ratios(statements)
+    return {
+        (row["company_id"], row["fiscal_year"]): row for row in frame.to_dict("records")
+    }
+
+
+def test_safe_ratio_rejects_zero_negative_and_missing_denominators():
+    result = safe_ratio([1.0, 1.0, 1.0, 1.0, None], [4.0, 0.0, -2.0, None, 2.0], 100)
+    assert result[0] == 25.0
+    assert np.isnan(result[1:]).all()
+
+
+def test_round_decimal_matches_column_precision():
+    values = round_decimal([1.005, 2.344, -3.456, 1e8, np.nan])
+    assert values[1] == 2.34
+    assert values[2] == -3.46
+    assert np.isnan(values[3])  # DECIMAL(10, 2) 범위를 넘으면 NULL
+    assert np.isnan(values[4])
+
+
+def test_ratios_with_zero_or_missing_denominator_are_null():
+    ratios = _ratios(
+        [
+            _statement(
+                1,
+                2023,
+                current_assets=150.0,
+                current_liabilities=0.0,
+                revenue=None,
+                total_equity=-50.0,
+                net_income=33.333,
+                total_assets=300.0,
+            )
+        ]
+    )[(1, 2023)]
+
+    assert math.isnan(ratios["current_ratio"])  # 분모 0
+    assert math.isnan(ratios["gross_margin"])  # 분모 결측
+    assert math.isnan(ratios["roe"])  # 자본잠식
+    assert math.isnan(ratios["sustainable_growth"])
+    assert ratios["equity_ratio"] == round(-50 / 300 * 100, 2)
+    assert ratios["roa"] == 33.33  # 100 / 300, 소수점 둘째 자리 반올림
+
+
+def test_growth_needs_the_previous_fiscal_year():
+    ratios = _ratios(
+        [
+            _statement(1, 2020, revenue=100.0),
+            _statement(1, 2021, revenue=150.0),
+            _statement(1, 2023, revenue=300.0),  # 2022 누락
+            _statement(2, 2021, revenue=80.0),
+        ]
+    )
+
+    assert ratios[(1, 2021)]["revenue_growth"] == 50.0
+    assert math.isnan(ratios[(1, 2020)]["revenue_growth"])
+    assert math.isnan(ratios[(1, 2023)]["revenue_growth"])
+    # ✅ 다른 기업의 값과 비교하지 않음
+    assert math.isnan(ratios[(2, 2021)]["revenue_growth"])
+
+
+def test_update_financial_ratios_recomputes_changed_companies(session):
+    session.add_all(
+        FinancialStatement(**row)
+        for row in [
+            _statement(1, 2022, revenue=100.0),
+            _statement(1, 2023, revenue=120.0),
+            _statement(2, 2023, revenue=100.0),
+        ]
+    )
+    session.commit()
+
+    assert update_financial_ratios()["ratios"] == 3
+
+    session.execute(
+        FinancialStatement.__table__.update()
+        .where(FinancialStatement.company_id == 1)
+        .where(FinancialStatement.report_date == date(2023, 12, 31))
+        .values(revenue=150)
+    )
+    record_changes(session, "financial_statements", [(1, date(2023, 12, 31))])
+    session.commit()
+
+    stats = update_financial_ratios()
+    assert (stats["companies"], stats["updated"]) == (1, 1)
+    session.expire_all()
+    growth = session.scalar(
+        select(FinancialRatio.revenue_growth).where(
+            FinancialRatio.company_id == 1, FinancialRatio.fiscal_year == 2023
+        )
+    )
+    assert float(growth) == 50.0
@@ -0,0 +1,112 @@
+import pytest
+
+from data_fetch import rate_limit
+from data_fetch.rate_limit import AdaptiveRateLimiter, TokenBucket
+
+
+class _FakeClock:
+    """time.monotonic / time.sleep 대체 (sleep은 시간만 앞으로 이동)"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # ✅ 실제 sleep처럼 최소 1µs는 흐름 (부동소수 오차로 남은 아주 작은 대기가 반복되지 않도록)
+        self.sleeps.append(seconds)
+        self.now += max(seconds, 1e-6)
+
+
+class _Throttled(Exception):
+    def __init__(self):
+        super().__init__("429 Too Many Requests")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda lo, hi: hi)
+    return clock
+
+
+def _limiter(**options):
+    options = {
+        "rate": 8,
+        "min_rate": 1,
+        "max_rate": 10,
+        "increase": 1,
+        "decrease": 0.5,
+        "retries": 3,
+        "base_delay": 1,
+        **options,
+    }
+    return AdaptiveRateLimiter("test", **options)
+
+
+def _flaky(failures):
+    calls = {"count": 0}
+
+    def fn():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise _Throttled()
+        return "ok"
+
+    return fn
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(2)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_throttle_errors_shrink_rate_with_backoff(clock):
+    limiter = _limiter()
+    assert limiter.call(_flaky(2)) == "ok"
+
+    # ✅ 스로틀링 2번: 8 → 4 → 2, 성공 1번: 2 → 3
+    assert limiter.bucket.rate == 3
+    assert [delay for delay in clock.sleeps if delay >= 1] == [1, 2]
+    metrics = limiter.metrics()
+    assert (metrics["requests"], metrics["throttled"], metrics["succeeded"]) == (
+        3,
+        2,
+        1,
+    )
+
+
+def test_rate_stays_within_bounds(clock):
+    limiter = _limiter(retries=0)
+    for _ in range(5):
+        with pytest.raises(_Throttled):
+            limiter.call(_flaky(1))
+    assert limiter.bucket.rate == 1  # min_rate
+
+    for _ in range(20):
+        limiter.call(lambda: None)
+    assert limiter.bucket.rate == 10  # max_rate
+
+
+def test_successes_restore_rate_after_throttling(clock):
+    limiter = _limiter()
+    limiter.call(_flaky(3))
+    assert limiter.bucket.rate == 2  # 8 → 4 → 2 → 1, 성공 후 2
+
+    for _ in range(8):
+        limiter.call(lambda: None)
+    assert limiter.bucket.rate == 10
+
+
+def test_other_errors_fail_without_slowing_down(clock):
+    limiter = _limiter()
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("잘못된 종목")))
+    assert limiter.bucket.rate == 8
+    assert limiter.counters["failed"] == 1
+    assert clock.sleeps == []
@@ -0,0 +1,120 @@
+from datetime import date
+
+import pytest
+
+from data_fetch.pipeline import run_pipeline
+from data_fetch.run_journal import RunJournal
+from data_fetch.stock_data import journal_items, select_journal_jobs
+
+RUN_DATE = date.today()  # ✅ RUN_JOURNAL_KEEP_DAYS보다 오래된 실행 기록은 삭제됨
+
+
+@pytest.fixture
+def open_journal(tmp_path):
+    journals = []
+
+    def open_(job="stock_prices", max_attempts=3):
+        journal = RunJournal(
+            job,
+            run_date=RUN_DATE,
+            path=str(tmp_path / "journal.sqlite"),
+            enabled=True,
+            max_attempts=max_attempts,
+        )
+        journals.append(journal)
+        return journal
+
+    yield open_
+    for journal in journals:
+        journal.close()
+
+
+def test_resume_skips_finished_items(open_journal):
+    journal = open_journal()
+    journal.start(["A", "B", "C"])
+    journal.done(["A"])
+    journal.fail(["B"], "timeout")
+    journal.close()  # ✅ C는 running 상태로 중단
+
+    resumed = open_journal()
+    assert resumed.summary() == {"done": 1, "failed": 1, "running": 1}
+    assert resumed.select(["A", "B", "C", "D"]) == {"B", "C", "D"}
+    assert resumed.select(["A", "B", "C", "D"], retry_failed=True) == {"B"}
+
+
+def test_items_failing_max_attempts_are_skipped(open_journal):
+    journal = open_journal(max_attempts=2)
+    for _ in range(2):
+        journal.start(["A"])
+        journal.fail(["A"], "timeout")
+    assert journal.select(["A", "B"]) == {"B"}
+    assert journal.errors() == [("A", 2, "timeout")]
+
+
+def test_journal_is_per_job_and_run_date(open_journal):
+    journal = open_journal()
+    journal.start(["A"])
+    journal.done(["A"])
+    assert open_journal(job="benchmark_prices").select(["A"]) == {"A"}
+
+
+def test_wrapped_pipeline_resumes_after_failures(open_journal):
+    fetched = []
+    unavailable, broken = {"B"}, {"D"}
+
+    def fetch(job):
+        fetched.append(job)
+        if job in unavailable:
+            raise RuntimeError("요청 실패")
+        return [] if job == "C" else [(job, f"{job}-data")]
+
+    def save(key, payload):
+        return None if key in broken else {"inserted": 1}
+
+    def run(items):
+        journal = open_journal()
+        fetch_fn, save_fn = journal.wrap_pipeline(
+            fetch, save, job_items=lambda job: [job], result_item=lambda job, key: key
+        )
+        run_pipeline(
+            sorted(journal.select(items)),
+            fetch_fn,
+            save_fn,
+            fetch_workers=2,
+            write_workers=1,
+        )
+        return journal.finish()
+
+    # ✅ B: 수집 실패, C: 데이터 없음, D: 저장 실패
+    assert run(["A", "B", "C", "D", "E"]) == {"done": 2, "failed": 3}
+    assert sorted(fetched) == ["A", "B", "C", "D", "E"]
+
+    # ✅ 다시 실행하면 완료한 A / E는 건너뛰고 남은 항목만 수집
+    fetched.clear()
+    unavailable.clear()
+    broken.clear()
+    assert run(["A", "B", "C", "D", "E"]) == {"done": 4, "failed": 1}
+    assert sorted(fetched) == ["B", "C", "D"]
+
+
+def test_select_journal_jobs_drops_finished_symbols_and_days(open_journal):
+    jobs = [
+        ("US", [(1, "AAPL", None), (2, "MSFT", None)], None),
+        ("KR", [(3, "005930", None)], None),
+        ("KR_DATE", [(4, "000660", None)], date(2024, 3, 4)),
+        ("KR_DATE", [(4, "000660", None)], date(2024, 3, 5)),
+    ]
+    journal = open_journal()
+    journal.start(["MSFT", "005930", "KR_DATE:2024-03-04"])
+    journal.done(["MSFT", "005930", "KR_DATE:2024-03-04"])
+
+    remaining = select_journal_jobs(jobs, journal)
+
+    assert remaining == [
+        ("US", [(1, "AAPL", None)], None),
+        ("KR_DATE", [(4, "000660", None)], date(2024, 3, 5)),
+    ]
+    assert [journal_items(job) for job in remaining] == [
+        ["AAPL"],
+        ["KR_DATE:2024-03-05"],
+    ]
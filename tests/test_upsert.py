@@ -0,0 +1,95 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+
+from database.models import StockPrice
+from database.upsert import bulk_upsert, comparable, to_python
+
+KEY = ("company_id", "date")
+
+
+def _price(company_id, day, close, volume=100):
+    return {
+        "company_id": company_id,
+        "date": date(2024, 1, day),
+        "close_price": close,
+        "adjusted_close_price": close,
+        "volume": volume,
+    }
+
+
+def _closes(session):
+    session.expire_all()
+    return {
+        (row.company_id, row.date.day): float(row.close_price)
+        for row in session.scalars(select(StockPrice))
+    }
+
+
+def test_bulk_upsert_counts_inserted_updated_unchanged(session, add_companies):
+    (company_id,) = add_companies(1)
+    records = [_price(company_id, day, 10.0 + day) for day in (2, 3, 4)]
+    assert bulk_upsert(session, StockPrice, records, KEY) == {
+        "inserted": 3,
+        "updated": 0,
+        "unchanged": 0,
+    }
+    session.commit()
+
+    records[0]["close_price"] = 99.0
+    records.append(_price(company_id, 5, 15.0))
+    result = bulk_upsert(session, StockPrice, records, KEY, batch_size=2)
+    session.commit()
+
+    assert result == {"inserted": 1, "updated": 1, "unchanged": 2}
+    assert _closes(session) == {
+        (company_id, 2): 99.0,
+        (company_id, 3): 13.0,
+        (company_id, 4): 14.0,
+        (company_id, 5): 15.0,
+    }
+
+
+def test_bulk_upsert_compares_at_column_precision(session, add_companies):
+    (company_id,) = add_companies(1)
+    bulk_upsert(session, StockPrice, [_price(company_id, 2, 10.25)], KEY)
+    session.commit()
+
+    # ✅ DECIMAL(10, 2)로 저장하면 같은 값 / numpy 스칼라도 같은 값으로 비교
+    record = _price(company_id, 2, np.float64(10.2500001), volume=np.int64(100))
+    result = bulk_upsert(session, StockPrice, [record], KEY)
+    assert result == {"inserted": 0, "updated": 0, "unchanged": 1}
+
+
+def test_bulk_upsert_stores_nan_as_null(session, add_companies):
+    (company_id,) = add_companies(1)
+    bulk_upsert(session, StockPrice, [_price(company_id, 2, float("nan"))], KEY)
+    session.commit()
+    assert session.scalar(select(StockPrice.close_price)) is None
+
+
+def test_bulk_upsert_only_updates_requested_columns(session, add_companies):
+    (company_id,) = add_companies(1)
+    bulk_upsert(session, StockPrice, [_price(company_id, 2, 10.0)], KEY)
+    session.commit()
+
+    record = _price(company_id, 2, 20.0, volume=500)
+    result = bulk_upsert(session, StockPrice, [record], KEY, update_columns=("volume",))
+    session.commit()
+
+    assert result["updated"] == 1
+    row = session.scalars(select(StockPrice)).one()
+    session.refresh(row)
+    assert (float(row.close_price), row.volume) == (10.0, 500)
+
+
+def test_value_helpers_normalize_to_column_precision():
+    columns = StockPrice.__table__.c
+    assert to_python(np.int64(3)) == 3 and type(to_python(np.int64(3))) is int
+    assert to_python(np.float64("nan")) is None
+    assert comparable(columns.close_price, 10.004) == comparable(
+        columns.close_price, 10.0
+    )
+    assert comparable(columns.volume, 7) == 7
+    assert comparable(columns.close_price, None) is None
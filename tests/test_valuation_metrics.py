@@ -0,0 +1,155 @@
+import math
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import select, update
+
+from config.settings import VALUATION_STATEMENT_LAG_DAYS
+from database.change_log import get_cursor, record_changes
+from database.models import Company, FinancialStatement, StockPrice, ValuationMetric
+from valuation.valuation_metrics import (
+    CHANGE_CONSUMER,
+    compute_valuations,
+    prepare_statements,
+    update_valuation_metrics,
+)
+
+LAG = timedelta(days=VALUATION_STATEMENT_LAG_DAYS)
+FY2022 = date(2022, 12, 31)
+FY2023 = date(2023, 12, 31)
+DAYS = [FY2022, FY2022 + LAG, FY2023 + LAG]
+
+
+def _statements(company_id=1):
+    return pd.DataFrame(
+        {
+            "company_id": [company_id, company_id],
+            "report_date": [FY2022, FY2023],
+            "net_income": [100.0, 125.0],
+            "total_equity": [500.0, -10.0],
+            "revenue": [1000.0, 1250.0],
+            "ebitda": [200.0, 250.0],
+            "total_debt": [300.0, 300.0],
+            "cash_equivalents": [100.0, 50.0],
+            "operating_cash_flow": [150.0, 160.0],
+            "capital_expenditure": [50.0, None],
+        }
+    )
+
+
+def _prices():
+    return pd.DataFrame(
+        {"company_id": [1, 1, 1], "date": DAYS, "close_price": [9.0, 10.0, 20.0]}
+    )
+
+
+def test_market_multiples_only_on_latest_date():
+    frame = compute_valuations(_prices(), prepare_statements(_statements()), {1: 100.0})
+
+    # ✅ 보고서 기준일 + LAG 이전 거래일에는 사용할 재무제표가 없음
+    assert frame["date"].tolist() == DAYS[1:]
+    history, latest = frame.to_dict("records")
+
+    # ✅ 현재 상장주식수로 과거 시가총액을 만들지 않음 (fcf만 계산)
+    assert not history["latest"]
+    assert pd.isna(history["market_cap"])
+    assert math.isnan(history["per"])
+    assert history["fcf"] == 100
+
+    assert latest["latest"]
+    assert latest["market_cap"] == 2000
+    assert latest["per"] == 16.0
+    assert latest["peg_ratio"] == 0.64  # 16 / 25%
+    assert math.isnan(latest["pbr"])  # 자본잠식 → NULL
+    assert latest["fcf"] == 160  # CAPEX 결측은 0으로 처리
+
+
+def test_as_of_date_selects_statement_in_effect():
+    frame = compute_valuations(
+        _prices(), prepare_statements(_statements()), {1: 100.0}, as_of={1: DAYS[1]}
+    )
+    row = frame[frame["latest"]].iloc[0]
+
+    assert row["date"] == DAYS[1]
+    assert row["market_cap"] == 1000
+    assert row["per"] == 10.0
+    assert math.isnan(row["peg_ratio"])  # 직전 연도가 없어 증가율 없음
+    assert row["pbr"] == 2.0
+    assert row["psr"] == 1.0
+    assert row["ev_ebitda"] == 6.0  # (1000 + 300 - 100) / 200
+
+
+@pytest.fixture
+def valuation_company(session, add_companies):
+    (company_id,) = add_companies(1, country="US")
+    session.add_all(
+        FinancialStatement(**row) for row in _statements(company_id).to_dict("records")
+    )
+    start = FY2023 + LAG
+    session.add_all(
+        StockPrice(
+            company_id=company_id,
+            date=start + timedelta(days=i),
+            close_price=20 + i,
+            adjusted_close_price=20 + i,
+        )
+        for i in range(5)
+    )
+    session.execute(update(Company).values(shares_outstanding=100))
+    session.commit()
+    return company_id, start
+
+
+def _saved(session):
+    session.expire_all()
+    return {
+        row.date: (None if row.per is None else float(row.per), int(row.fcf))
+        for row in session.scalars(
+            select(ValuationMetric).order_by(ValuationMetric.date)
+        )
+    }
+
+
+def test_update_valuation_metrics_keeps_point_in_time_market_cap(
+    session, valuation_company
+):
+    company_id, start = valuation_company
+    last = start + timedelta(days=4)
+
+    stats = update_valuation_metrics()
+    assert stats["rows"] == 5
+    saved = _saved(session)
+    assert saved[start] == (None, 160)
+    assert saved[last] == (24 * 100 / 125, 160)
+    assert get_cursor(session, CHANGE_CONSUMER) == 0
+
+    # ✅ 다음 거래일 주가가 추가되면 새 날짜에서 계산하고 이전 날짜의 값은 유지
+    session.add(
+        StockPrice(
+            company_id=company_id,
+            date=last + timedelta(days=1),
+            close_price=30,
+            adjusted_close_price=30,
+        )
+    )
+    record_changes(session, "stock_prices", [(company_id, last + timedelta(days=1))])
+    session.commit()
+
+    assert update_valuation_metrics()["rows"] == 1
+    saved = _saved(session)
+    assert saved[last] == (19.2, 160)
+    assert saved[last + timedelta(days=1)] == (24.0, 160)
+
+
+def test_shares_change_recomputes_latest_date(session, valuation_company):
+    company_id, start = valuation_company
+    last = start + timedelta(days=4)
+    update_valuation_metrics()
+
+    session.execute(update(Company).values(shares_outstanding=200))
+    record_changes(session, "companies", [(company_id, date.today())])
+    session.commit()
+
+    assert update_valuation_metrics()["rows"] == 1
+    assert _saved(session)[last] == (38.4, 160)
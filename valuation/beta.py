@@ -0,0 +1,259 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from config.settings import (
+    BETA_CHUNK_COMPANIES,
+    BETA_MIN_PERIODS,
+    BETA_WINDOW,
+    INCREMENTAL_UPDATE,
+)
+from database.change_log import advance_cursor, purge_changes, read_changes
+from database.db_connection import session_scope
+from database.models import Company, ValuationMetric
+from database.queries import load_price_frame
+from database.upsert import bulk_upsert
+from data_fetch.normalize import frame_to_records
+from data_processing.price_matrix import build_price_matrix, open_price_matrix
+
+# ✅ 전체 종목 롤링 베타 계산
+# - 수익률은 벤치마크 거래일 기준 (벤치마크별로 종목을 묶어 같은 달력에서 계산)
+# - 종목 가격은 가격 행렬(memory-mapped)에서 필요한 날짜 × 종목 구간만 읽음
+# - 누적합 차분으로 윈도우별 Σx, Σy, Σxy, Σy², n을 한 번에 구해서
+#   beta = Cov(종목, 벤치마크) / Var(벤치마크)를 행렬 단위로 계산
+# - 증분 갱신 시 변경 이력(stock_prices / benchmark_prices)에 있는 종목의
+#   변경 시작일 이후 날짜만 저장하고, 계산에는 그 앞의 윈도우 길이만큼의 가격만 사용
+
+# ✅ 변경 이력 consumer 이름
+CHANGE_CONSUMER = "beta"
+
+
+def _rolling_sum(values, window):
+    """axis 0 방향 롤링 합계 (윈도우보다 앞쪽 행은 있는 만큼만 합산)"""
+    cumulative = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    lower = np.maximum(np.arange(1, len(cumulative)) - window, 0)
+    return cumulative[1:] - cumulative[lower]
+
+
+def _returns(prices):
+    """가격 행렬(또는 벡터) → 단순 수익률 (첫 행 / 직전 가격 결측 → NaN)"""
+    returns = np.full(prices.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = prices[1:] / prices[:-1] - 1
+    return returns
+
+
+def rolling_beta(stock_returns, market_returns, window=None, min_periods=None):
+    """
+    여러 종목의 롤링 베타를 한 번에 계산
+    :param stock_returns: (날짜 × 종목) 수익률 행렬
+    :param market_returns: (날짜,) 벤치마크 수익률 벡터
+    :param window: 롤링 윈도우 길이 (기본값: BETA_WINDOW)
+    :param min_periods: 윈도우 내 최소 유효 수익률 수 (기본값: BETA_MIN_PERIODS)
+    :return: (날짜 × 종목) 베타 행렬 (계산할 수 없으면 NaN)
+    """
+    window = window or BETA_WINDOW
+    min_periods = min_periods or BETA_MIN_PERIODS
+
+    # ✅ 종목 / 벤치마크 수익률이 모두 있는 날만 사용 (종목마다 유효한 날이 다름)
+    market = np.broadcast_to(market_returns[:, None], stock_returns.shape)
+    valid = ~(np.isnan(stock_returns) | np.isnan(market))
+    x = np.where(valid, stock_returns, 0.0)
+    y = np.where(valid, market, 0.0)
+
+    n = _rolling_sum(valid.astype(np.float64), window)
+    sum_x = _rolling_sum(x, window)
+    sum_y = _rolling_sum(y, window)
+    sum_xy = _rolling_sum(x * y, window)
+    sum_yy = _rolling_sum(y * y, window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_xy - sum_x * sum_y / n
+        variance = sum_yy - sum_y * sum_y / n
+        beta = covariance / variance
+    beta[(n < min_periods) | ~(variance > 0)] = np.nan
+    return beta
+
+
+def load_benchmark_closes(start=None):
+    """벤치마크 수정 종가 (index: 날짜, columns: benchmark_id)"""
+    frame = load_price_frame(
+        ["adjusted_close_price"], start=start, table="benchmark_prices"
+    )
+    return frame.pivot_table(
+        index="date",
+        columns="benchmark_id",
+        values="adjusted_close_price",
+        aggfunc="last",
+    ).sort_index()
+
+
+def load_company_benchmarks():
+    """{benchmark_id: [company_id, ...]}"""
+    with session_scope() as session:
+        rows = session.execute(select(Company.id, Company.benchmark_id))
+        groups = {}
+        for company_id, benchmark_id in rows:
+            groups.setdefault(benchmark_id, []).append(company_id)
+    return groups
+
+
+def _stock_closes(matrix, dates, company_ids):
+    """가격 행렬에서 (벤치마크 거래일 × 종목) 구간을 읽음 (행렬에 없는 날짜는 NaN)"""
+    columns = matrix.columns_for(company_ids)
+    closes = np.full((len(dates), len(columns)), np.nan)
+    if len(matrix.dates) == 0 or len(columns) == 0:
+        return closes, matrix.company_ids[columns]
+
+    positions = np.searchsorted(matrix.dates, dates).clip(max=len(matrix.dates) - 1)
+    found = matrix.dates[positions] == dates
+    if found.any():
+        rows = positions[found]
+        first, last = rows.min(), rows.max()
+        block = matrix.field("adjusted_close")[first : last + 1][:, columns]
+        closes[found] = block[rows - first]
+    return closes, matrix.company_ids[columns]
+
+
+def beta_frame(beta, closes, dates, company_ids, start=None):
+    """
+    베타 행렬 → (company_id, date, beta) DataFrame
+    (종목 가격이 있는 날만, start 이후 날짜만 포함)
+    """
+    import pandas as pd
+
+    keep = ~np.isnan(beta) & ~np.isnan(closes)
+    if start is not None:
+        keep &= (dates >= np.datetime64(start, "D"))[:, None]
+    beta = np.round(beta, 2)
+    keep &= np.abs(beta) < 1e8
+    rows, columns = np.nonzero(keep)
+    return pd.DataFrame(
+        {
+            "company_id": company_ids[columns],
+            "date": dates[rows].astype(object),
+            "beta": beta[rows, columns],
+        }
+    )
+
+
+def save_betas(frame):
+    """베타를 (company_id, date) 기준 bulk upsert (beta 컬럼만 갱신)"""
+    with session_scope() as session:
+        return bulk_upsert(
+            session,
+            ValuationMetric,
+            frame_to_records(frame),
+            key_columns=("company_id", "date"),
+            update_columns=("beta",),
+        )
+
+
+def get_recompute_groups(full=False):
+    """
+    변경 이력(data_changes)으로 벤치마크별 재계산 대상 계산
+    - 주가 변경: 해당 종목만 / 벤치마크 가격 변경: 그 벤치마크의 전체 종목
+    - 시작일은 그룹 안에서 가장 이른 변경일
+    :return: ({benchmark_id: ([company_id, ...], 시작일 또는 None(전체 기간))}, 마지막 변경 id)
+    """
+    with session_scope() as session:
+        changes, last_id = read_changes(
+            session, CHANGE_CONSUMER, ["stock_prices", "benchmark_prices"]
+        )
+    groups = load_company_benchmarks()
+    if full or not INCREMENTAL_UPDATE or changes is None:
+        return {
+            benchmark_id: (company_ids, None)
+            for benchmark_id, company_ids in groups.items()
+        }, last_id
+
+    stock_changes = changes["stock_prices"]
+    benchmark_changes = changes["benchmark_prices"]
+    targets = {}
+    for benchmark_id, company_ids in groups.items():
+        selected = [
+            company_id for company_id in company_ids if company_id in stock_changes
+        ]
+        starts = [stock_changes[company_id][0] for company_id in selected]
+        if benchmark_id in benchmark_changes:
+            selected = company_ids
+            starts.append(benchmark_changes[benchmark_id][0])
+        if selected:
+            targets[benchmark_id] = (selected, min(starts))
+    return targets, last_id
+
+
+def update_betas(full=False, window=None, chunk_companies=None):
+    """
+    롤링 베타를 계산해서 valuation_metrics.beta에 저장
+    - 변경 이력에 있는 종목 / 벤치마크만, 변경 시작일 이후 날짜만 저장
+      (윈도우를 채우기 위해 그 앞의 가격은 읽지만 저장하지 않음)
+    - 처음 실행하거나 full=True / INCREMENTAL_UPDATE=0이면 전체 종목 전체 기간 계산
+    :return: {"companies", "saved", "seconds"}
+    """
+    window = window or BETA_WINDOW
+    chunk_companies = chunk_companies or BETA_CHUNK_COMPANIES
+    started = time.perf_counter()
+
+    build_price_matrix()
+    matrix = open_price_matrix()
+
+    targets, last_id = get_recompute_groups(full)
+    starts = [start for _, start in targets.values()]
+    # ✅ 벤치마크 거래일 window개 + 여유분 (휴장일 고려해 달력일 1.6배)
+    load_start = None
+    if starts and None not in starts:
+        load_start = min(starts) - timedelta(days=int(window * 1.6))
+    benchmarks = load_benchmark_closes(load_start) if targets else None
+    print(
+        f"📥 베타 계산: 벤치마크 {len(targets)}개, "
+        f"종목 {sum(len(ids) for ids, _ in targets.values()):,}개 (윈도우 {window}일)"
+    )
+
+    companies = saved = 0
+    for benchmark_id, (company_ids, start) in sorted(targets.items()):
+        if benchmark_id not in benchmarks:
+            print(
+                f"⚠️ 벤치마크 {benchmark_id} 가격이 없어 {len(company_ids)}개 종목 제외"
+            )
+            continue
+        market = benchmarks[benchmark_id].dropna()
+        dates = market.index.to_numpy().astype("datetime64[D]")
+        market_returns = _returns(market.to_numpy())
+
+        for lo in range(0, len(company_ids), chunk_companies):
+            closes, ids = _stock_closes(
+                matrix, dates, company_ids[lo : lo + chunk_companies]
+            )
+            if not len(ids):
+                continue
+            beta = rolling_beta(_returns(closes), market_returns, window)
+            frame = beta_frame(beta, closes, dates, ids, start=start)
+            result = save_betas(frame)
+            companies += len(ids)
+            saved += result["inserted"] + result["updated"]
+        print(
+            f"   벤치마크 {benchmark_id}: {len(company_ids):,}개 종목 계산 "
+            f"({'전체 기간' if start is None else f'{start} 이후'})"
+        )
+
+    with session_scope() as session:
+        advance_cursor(session, CHANGE_CONSUMER, last_id)
+        purge_changes(session)
+
+    return {
+        "companies": companies,
+        "saved": saved,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    stats = update_betas()
+    print(
+        f"✅ 베타 계산 완료: {stats['companies']:,}개 종목, 저장 {stats['saved']:,}행 "
+        f"({stats['seconds']}초)"
+    )
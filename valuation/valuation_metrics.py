@@ -1 +1,319 @@
+import time
+from datetime import timedelta
 
+import numpy as np
+from sqlalchemy import select
+
+from config.settings import (
+    INCREMENTAL_UPDATE,
+    VALUATION_CHUNK_ROWS,
+    VALUATION_STATEMENT_LAG_DAYS,
+)
+from database.change_log import advance_cursor, purge_changes, read_changes
+from database.db_connection import session_scope
+from database.models import Company, ValuationMetric
+from database.queries import load_price_frame
+from database.upsert import bulk_upsert
+from data_fetch.normalize import frame_to_records
+from data_fetch.stock_data import get_latest_price_dates
+from data_processing.process_financials import (
+    growth_rate,
+    load_financial_statements,
+    prepare_financial_statements,
+    round_decimal,
+    safe_ratio,
+)
+
+# ✅ 전체 종목 밸류에이션 일괄 계산
+# - 주가(company_id × 거래일)마다 그 날짜에 공시되어 있던 최신 연간 재무제표를
+#   as-of join(merge_asof)으로 붙이고, 모든 배수를 컬럼 단위 벡터 연산으로 계산
+# - 재무제표는 보고서 기준일 + VALUATION_STATEMENT_LAG_DAYS부터 사용 (미래 정보 참조 방지)
+# - 분모가 0 이하 / 결측이면 NaN → DB에는 NULL로 저장
+# - 시가총액과 시가총액으로 계산하는 배수(MARKET_COLUMNS)는 기업별 마지막 주가 저장일에만 계산
+#   (companies.shares_outstanding은 현재 상장주식수뿐이라 분할 / 증자 이전 날짜에 곱하면 틀림)
+#   → 시가총액 = 종가(수정 전) × 현재 상장주식수, 매일 실행하면 그날의 값이 이력으로 쌓임
+#   → 이전 날짜의 시가총액 컬럼은 갱신하지 않음 (재계산해도 그 시점에 저장한 값 유지)
+# - 평소에는 stock_prices / financial_statements / companies(상장주식수) 변경 이력에 있는
+#   기업 / 기간만 재계산
+# - beta 등 다른 컬럼은 별도 계산에서 채우므로 여기서는 갱신하지 않음
+
+# ✅ 변경 이력 consumer 이름
+CHANGE_CONSUMER = "valuation_metrics"
+
+# ✅ 이 엔진이 계산해서 저장하는 valuation_metrics 컬럼
+VALUATION_COLUMNS = ("market_cap", "per", "peg_ratio", "pbr", "psr", "ev_ebitda", "fcf")
+
+# ✅ 시가총액(현재 상장주식수)으로 계산하는 컬럼 (마지막 주가 저장일에만 계산 / 갱신)
+MARKET_COLUMNS = ("market_cap", "per", "peg_ratio", "pbr", "psr", "ev_ebitda")
+
+# ✅ 계산에 필요한 financial_statements 컬럼
+STATEMENT_COLUMNS = [
+    "net_income",
+    "total_equity",
+    "revenue",
+    "ebitda",
+    "total_debt",
+    "cash_equivalents",
+    "operating_cash_flow",
+    "capital_expenditure",
+]
+
+
+def load_statements(company_ids=None):
+    """연간 재무제표 조회 (company_ids가 None이면 전체) 후 prepare_statements() 적용"""
+    return prepare_statements(
+        load_financial_statements(STATEMENT_COLUMNS, company_ids=company_ids)
+    )
+
+
+def prepare_statements(frame):
+    """
+    재무제표에 순이익 증가율(%) / 사용 가능일(available_date) 추가
+    (증가율은 종목별 직전 연도 대비, 직전 순이익이 양수일 때만 계산)
+    """
+    import pandas as pd
+
+    frame = prepare_financial_statements(frame, STATEMENT_COLUMNS)
+    frame["net_income_growth"] = growth_rate(frame, "net_income")
+    frame["available_date"] = frame["report_date"] + pd.Timedelta(
+        days=VALUATION_STATEMENT_LAG_DAYS
+    )
+    return frame.sort_values("available_date").reset_index(drop=True)
+
+
+def load_shares_outstanding():
+    """{company_id: 상장주식수} (값이 있는 기업만)"""
+    with session_scope() as session:
+        rows = session.execute(
+            select(Company.id, Company.shares_outstanding).where(
+                Company.shares_outstanding.isnot(None)
+            )
+        )
+        return {company_id: float(shares) for company_id, shares in rows}
+
+
+def _bigint(values):
+    """BIGINT 컬럼용 정수 배열 (결측은 pd.NA)"""
+    import pandas as pd
+
+    return pd.array(np.round(values), dtype="Float64").astype("Int64")
+
+
+def compute_valuations(prices, statements, shares, as_of=None):
+    """
+    주가 + 재무제표 + 상장주식수로 밸류에이션 배수를 일괄 계산
+    :param prices: (company_id, date, close_price) DataFrame
+    :param statements: prepare_statements() 결과
+    :param shares: {company_id: 현재 상장주식수}
+    :param as_of: {company_id: 마지막 주가 저장일} — MARKET_COLUMNS는 이 날짜에만 계산
+                  (기본값: prices에 있는 기업별 마지막 날짜)
+    :return: (company_id, date, VALUATION_COLUMNS..., latest) DataFrame
+             latest: MARKET_COLUMNS를 계산한 마지막 주가 저장일 행 여부
+             (재무제표가 아직 없거나 모든 값이 결측인 행은 제외)
+    """
+    import pandas as pd
+
+    prices = prices[["company_id", "date", "close_price"]].copy()
+    prices["company_id"] = prices["company_id"].astype("int64")
+    prices["date"] = pd.to_datetime(prices["date"]).astype("datetime64[ns]")
+    if as_of is None:
+        as_of = prices.groupby("company_id")["date"].max()
+    else:
+        as_of = pd.to_datetime(pd.Series(as_of, dtype="object")).astype(
+            "datetime64[ns]"
+        )
+
+    # ✅ 각 거래일에 사용 가능했던 최신 재무제표 (종목별 backward as-of join)
+    merged = pd.merge_asof(
+        prices.sort_values("date"),
+        statements,
+        left_on="date",
+        right_on="available_date",
+        by="company_id",
+        direction="backward",
+    )
+    merged = merged[merged["report_date"].notna()]
+
+    # ✅ 시가총액: 종가 × 현재 상장주식수 (상장주식수가 유효한 마지막 주가 저장일만)
+    latest = (merged["date"] == merged["company_id"].map(as_of)).to_numpy()
+    market_cap = np.where(
+        latest,
+        merged["close_price"].to_numpy()
+        * merged["company_id"].map(shares).to_numpy(dtype="float64"),
+        np.nan,
+    )
+    net_income = merged["net_income"].to_numpy()
+    enterprise_value = (
+        market_cap
+        + np.nan_to_num(merged["total_debt"].to_numpy())
+        - np.nan_to_num(merged["cash_equivalents"].to_numpy())
+    )
+    per = safe_ratio(market_cap, net_income)
+    fcf = merged["operating_cash_flow"].to_numpy() - np.nan_to_num(
+        merged["capital_expenditure"].to_numpy()
+    )
+
+    result = pd.DataFrame(
+        {
+            "company_id": merged["company_id"].to_numpy(),
+            "date": merged["date"].dt.date.to_numpy(),
+            "market_cap": _bigint(market_cap),
+            "per": round_decimal(per),
+            "peg_ratio": round_decimal(
+                safe_ratio(per, merged["net_income_growth"].to_numpy())
+            ),
+            "pbr": round_decimal(
+                safe_ratio(market_cap, merged["total_equity"].to_numpy())
+            ),
+            "psr": round_decimal(safe_ratio(market_cap, merged["revenue"].to_numpy())),
+            "ev_ebitda": round_decimal(
+                safe_ratio(enterprise_value, merged["ebitda"].to_numpy())
+            ),
+            "fcf": _bigint(fcf),
+        }
+    )
+    result["latest"] = latest
+    result = result.dropna(how="all", subset=list(VALUATION_COLUMNS))
+    return result.reset_index(drop=True)
+
+
+def get_recompute_starts(full=False, latest_dates=None):
+    """
+    변경 이력(data_changes)으로 기업별 재계산 시작일 계산
+    - 주가 변경: 변경된 첫 날짜부터
+    - 재무제표 변경: 보고서 기준일 + VALUATION_STATEMENT_LAG_DAYS(사용 가능일)부터
+    - 상장주식수 변경(companies): 마지막 주가 저장일부터 (시가총액은 그날만 계산)
+    :param latest_dates: {company_id: 마지막 주가 저장일}
+    :return: ({company_id: 시작일} 또는 None(전체 재계산), 마지막 변경 id)
+    """
+    with session_scope() as session:
+        changes, last_id = read_changes(
+            session,
+            CHANGE_CONSUMER,
+            ["stock_prices", "financial_statements", "companies"],
+        )
+    if full or not INCREMENTAL_UPDATE or changes is None:
+        return None, last_id
+
+    lag = timedelta(days=VALUATION_STATEMENT_LAG_DAYS)
+    starts = {
+        company_id: start for company_id, (start, _) in changes["stock_prices"].items()
+    }
+    for company_id, (start, _) in changes["financial_statements"].items():
+        available = start + lag
+        starts[company_id] = min(starts.get(company_id, available), available)
+    for company_id in changes["companies"]:
+        latest = (latest_dates or {}).get(company_id)
+        if latest is not None:
+            starts[company_id] = min(starts.get(company_id, latest), latest)
+    return starts, last_id
+
+
+def save_valuations(frame):
+    """
+    계산 결과를 (company_id, date) 기준 bulk upsert (session_scope 종료 시 커밋)
+    - 마지막 주가 저장일 행: VALUATION_COLUMNS 전체 갱신
+    - 이전 날짜 행: fcf만 갱신 (그 시점에 저장한 시가총액 / 배수는 유지)
+    """
+    result = {"inserted": 0, "updated": 0, "unchanged": 0}
+    with session_scope() as session:
+        for latest, update_columns in (
+            (True, VALUATION_COLUMNS),
+            (False, tuple(c for c in VALUATION_COLUMNS if c not in MARKET_COLUMNS)),
+        ):
+            part = frame[frame["latest"] == latest].drop(columns="latest")
+            counts = bulk_upsert(
+                session,
+                ValuationMetric,
+                frame_to_records(part),
+                key_columns=("company_id", "date"),
+                update_columns=update_columns,
+            )
+            for name, amount in counts.items():
+                result[name] += amount
+    return result
+
+
+def update_valuation_metrics(full=False, chunk_rows=None):
+    """
+    일별 밸류에이션을 계산해서 valuation_metrics에 저장
+    - 변경 이력에 있는 기업의 변경 시작일 이후 company-day만 재계산
+    - 처음 실행하거나 full=True / INCREMENTAL_UPDATE=0이면 전체 기간 재계산
+    - 시가총액 / 배수는 기업별 마지막 주가 저장일에만 계산 (이전 날짜는 fcf만 갱신)
+    - 종목 단위로 chunk_rows 행씩 나눠 계산 / 커밋 (메모리 사용량 제한)
+    :return: {"rows", "saved", "seconds", "rows_per_minute"}
+    """
+    import pandas as pd
+
+    chunk_rows = chunk_rows or VALUATION_CHUNK_ROWS
+    started = time.perf_counter()
+
+    latest_dates = get_latest_price_dates()
+    starts, last_id = get_recompute_starts(full, latest_dates)
+    if starts is None:
+        prices = load_price_frame(["close_price"])
+        statements = load_statements()
+    else:
+        prices = load_price_frame(
+            ["close_price"],
+            start=min(starts.values(), default=None),
+            ids=list(starts),
+        )
+        prices = prices[
+            prices["date"] >= pd.to_datetime(prices["company_id"].map(starts))
+        ]
+        statements = load_statements(company_ids=list(starts))
+    shares = load_shares_outstanding()
+    print(
+        f"📥 주가 {len(prices):,}행 로드 "
+        f"({'전체' if starts is None else f'변경된 {len(starts):,}개 기업'})"
+    )
+
+    # ✅ 종목 경계에서 chunk를 나눔 (as-of join은 종목 단위로 독립적)
+    prices = prices.sort_values(["company_id", "date"]).reset_index(drop=True)
+    bounds = [0]
+    for end in prices["company_id"].value_counts().sort_index().cumsum():
+        if end - bounds[-1] >= chunk_rows:
+            bounds.append(int(end))
+    if bounds[-1] != len(prices):
+        bounds.append(len(prices))
+
+    rows = saved = 0
+    for lo, hi in zip(bounds, bounds[1:]):
+        chunk = prices.iloc[lo:hi]
+        company_ids = chunk["company_id"].unique()
+        valuations = compute_valuations(
+            chunk,
+            statements[statements["company_id"].isin(company_ids)],
+            shares,
+            as_of=latest_dates,
+        )
+        result = save_valuations(valuations)
+        rows += len(chunk)
+        saved += result["inserted"] + result["updated"]
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"   {rows:,}/{len(prices):,} company-day 처리 "
+            f"(신규 {result['inserted']:,}, 갱신 {result['updated']:,}) "
+            f"{rows / elapsed * 60:,.0f} company-day/분"
+        )
+
+    with session_scope() as session:
+        advance_cursor(session, CHANGE_CONSUMER, last_id)
+        purge_changes(session)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return {
+        "rows": rows,
+        "saved": saved,
+        "seconds": round(elapsed, 3),
+        "rows_per_minute": round(rows / elapsed * 60),
+    }
+
+
+if __name__ == "__main__":
+    stats = update_valuation_metrics()
+    print(
+        f"✅ 밸류에이션 계산 완료: {stats['rows']:,} company-day, 저장 {stats['saved']:,}행 "
+        f"({stats['seconds']}초, {stats['rows_per_minute']:,} company-day/분)"
+    )